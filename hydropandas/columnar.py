@@ -0,0 +1,457 @@
+"""
+module with the ColumnarStore class, a columnar backing store for the
+measurements in an ObsCollection.
+
+All measurements of a collection are stored in one contiguous array per
+column together with one shared array of timestamps. Per observation an
+offset array points to the rows that belong to this observation (similar to
+the row pointers of a compressed sparse row matrix). The Obs objects in the
+collection are created as views on these arrays, without copying the data.
+Collection-wide statistics can then be computed with a single numpy
+operation over all observations instead of a loop over the Obs objects.
+
+The arrays of a store can be saved as .npy files and memory-mapped when they
+are loaded, in that case the Obs objects are views on the mapped files.
+
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .util import ChangeSet, _watch
+
+
+def _to_datetime64(t, side='left'):
+    """convert a time to a numpy datetime64. Strings are interpreted in the
+    same way as partial string indexing in pandas, e.g. '2010' as the end of
+    2010 if side is 'right'.
+    """
+    if isinstance(t, str):
+        period = pd.Period(t)
+        if side == 'left':
+            t = period.start_time
+        else:
+            t = period.end_time
+    return np.datetime64(pd.Timestamp(t), 'ns')
+
+
+def _same_data(arr, view):
+    """check if arr uses the same memory as view"""
+    return (arr.shape == view.shape and arr.strides == view.strides and
+            arr.__array_interface__['data'][0] ==
+            view.__array_interface__['data'][0])
+
+
+class ColumnarStore:
+    """Columnar storage of the measurements of multiple observations.
+
+    Parameters
+    ----------
+    obs_list : list of observation.Obs
+        observations that are stored. The index of every observation must be
+        a sorted DatetimeIndex (empty observations are allowed).
+    times : numpy.ndarray
+        datetime64[ns] array with the timestamps of all observations.
+    values : numpy.ndarray
+        float array with shape (ncolumns, nrows). Every row of this array is
+        one contiguous column with the values of all observations.
+    offsets : numpy.ndarray
+        integer array with length nobs + 1. The measurements of observation
+        i are stored in times[offsets[i]:offsets[i+1]].
+    columns : list of str
+        the column names of values.
+
+    Notes
+    -----
+    Only numeric columns are stored (as float). Non-numeric columns, e.g.
+    remarks, are not part of the views.
+
+    The views report changes of their data or index to the store. Only these
+    observations are checked (with is_view) before the store is used.
+    """
+
+    def __init__(self, obs_list, times, values, offsets, columns):
+        self.obs_list = obs_list
+        self.times = times
+        self.values = values
+        self.offsets = offsets
+        self.columns = list(columns)
+
+        self._obs_position = {id(o): i for i, o in enumerate(obs_list)}
+        # the positions of the views that reported a change and of the
+        # observations that are no longer a view on the store
+        self._changed = ChangeSet()
+        self._not_views = set()
+
+    def __len__(self):
+        return len(self.obs_list)
+
+    def __repr__(self):
+        return '{}(nobs={}, nrows={}, columns={})'.format(
+            self.__class__.__name__, len(self), self.times.shape[0],
+            self.columns)
+
+    @classmethod
+    def from_obs_list(cls, obs_list, columns=None):
+        """Create a columnar store from a list of observations. The
+        observations in the store (store.obs_list) are views on the arrays of
+        the store.
+
+        Parameters
+        ----------
+        obs_list : list of observation.Obs
+            list of observations
+        columns : list of str, optional
+            the columns that are stored. If None all numeric columns of the
+            observations are stored. The default is None.
+
+        Raises
+        ------
+        ValueError
+            if the index of an observation is not a sorted DatetimeIndex.
+
+        Returns
+        -------
+        ColumnarStore
+
+        Notes
+        -----
+        The measurements of lazy observations (see lazy.LazyObs) are read.
+        """
+        from .lazy import LazyObs
+
+        obs_list = [o.load() if isinstance(o, LazyObs) else o
+                    for o in obs_list]
+        for o in obs_list:
+            if o.empty:
+                continue
+            if not isinstance(o.index, pd.DatetimeIndex):
+                raise ValueError(f'{o.name} has no DatetimeIndex')
+            if not o.index.is_monotonic_increasing:
+                raise ValueError(f'the index of {o.name} is not sorted')
+
+        if columns is None:
+            columns = []
+            for o in obs_list:
+                for col, dtype in o.dtypes.items():
+                    if (col not in columns) and (dtype.kind in 'biuf'):
+                        columns.append(col)
+
+        nrows = np.array([o.shape[0] for o in obs_list], dtype=np.int64)
+        offsets = np.zeros(len(obs_list) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(nrows)
+
+        times = np.empty(offsets[-1], dtype='datetime64[ns]')
+        values = np.full((len(columns), offsets[-1]), np.nan)
+        for i, o in enumerate(obs_list):
+            if nrows[i] == 0:
+                continue
+            start, end = offsets[i], offsets[i + 1]
+            times[start:end] = o.index.values
+            for j, col in enumerate(columns):
+                if col in o.columns:
+                    values[j, start:end] = pd.to_numeric(o[col],
+                                                         errors='coerce')
+
+        return cls.from_arrays(obs_list, times, values, offsets, columns)
+
+    @classmethod
+    def from_arrays(cls, obs_list, times, values, offsets, columns):
+        """Create a columnar store from existing arrays. The observations in
+        the store (store.obs_list) are views on these arrays and have the
+        type and attributes of the observations in obs_list.
+
+        Parameters
+        ----------
+        obs_list : list of observation.Obs
+            observations with the type and attributes of the observations in
+            the store. The measurements of these observations are not used.
+        times : numpy.ndarray
+            datetime64[ns] array with the timestamps of all observations.
+        values : numpy.ndarray
+            float array with shape (ncolumns, nrows).
+        offsets : numpy.ndarray
+            integer array with length nobs + 1.
+        columns : list of str
+            the column names of values.
+
+        Returns
+        -------
+        ColumnarStore
+        """
+        if len(offsets) != len(obs_list) + 1:
+            raise ValueError('the length of offsets should be the number of '
+                             'observations + 1')
+
+        store = cls([], times, values, offsets, columns)
+        store.obs_list = [store._create_view(i, o)
+                          for i, o in enumerate(obs_list)]
+        store._obs_position = {id(o): i for i, o in
+                               enumerate(store.obs_list)}
+        for i, o in enumerate(store.obs_list):
+            _watch(o, store._changed, i)
+
+        return store
+
+    def save(self, dirname):
+        """save the arrays of the store as .npy files in a directory. The
+        attributes of the observations are not saved.
+
+        Parameters
+        ----------
+        dirname : str
+            directory, created if it does not exist.
+        """
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        np.save(os.path.join(dirname, 'times.npy'), self.times)
+        np.save(os.path.join(dirname, 'values.npy'),
+                np.ascontiguousarray(self.values))
+        np.save(os.path.join(dirname, 'offsets.npy'), self.offsets)
+        with open(os.path.join(dirname, 'columns.json'), 'w') as fo:
+            json.dump([str(col) for col in self.columns], fo)
+
+    @classmethod
+    def load(cls, dirname, obs_list, mmap_mode='r'):
+        """load a store saved with the save method. By default the files are
+        memory-mapped, the observations are views on the mapped files and the
+        measurements are only read from disk when they are used. Processes
+        that map the same files share the memory through the page cache.
+
+        Parameters
+        ----------
+        dirname : str
+            directory with the saved store.
+        obs_list : list of observation.Obs
+            observations with the type and attributes of the observations in
+            the store.
+        mmap_mode : str or None, optional
+            the mode to memory-map the files, see numpy.load. With 'r' the
+            measurements are read-only, with 'c' changes are kept in memory
+            and not written to disk. If None the files are read into memory.
+            The default is 'r'.
+
+        Returns
+        -------
+        ColumnarStore
+        """
+        times = np.load(os.path.join(dirname, 'times.npy'),
+                        mmap_mode=mmap_mode)
+        values = np.load(os.path.join(dirname, 'values.npy'),
+                         mmap_mode=mmap_mode)
+        # the offsets are small and used in every reduction
+        offsets = np.load(os.path.join(dirname, 'offsets.npy'))
+        with open(os.path.join(dirname, 'columns.json')) as fo:
+            columns = json.load(fo)
+
+        return cls.from_arrays(obs_list, times, values, offsets, columns)
+
+    def _create_view(self, i, o):
+        """create an observation of the same type and with the same
+        attributes as o, with data that is a view on the store.
+        """
+        from .lazy import LazyObs
+
+        if isinstance(o, LazyObs):
+            # only the type and the attributes are used
+            o = o._obs_meta
+        start, end = self.offsets[i], self.offsets[i + 1]
+        index = pd.DatetimeIndex(self.times[start:end], copy=False)
+        attrs = {att: getattr(o, att) for att in o._metadata}
+
+        return o._constructor(self.values[:, start:end].T, index=index,
+                              columns=self.columns, copy=False, **attrs)
+
+    def is_view(self, i, o):
+        """check if an observation is still a view on the rows of observation
+        i in the store. This is no longer the case when the measurements of
+        the observation are replaced, e.g. by drop(inplace=True) or by
+        assigning a new column, while values that are changed in place are
+        changed in the store as well.
+
+        Parameters
+        ----------
+        i : int
+            position of the observation in the store.
+        o : observation.Obs
+            observation
+
+        Returns
+        -------
+        bool
+        """
+        start, end = self.offsets[i], self.offsets[i + 1]
+        if o.shape[0] != end - start:
+            return False
+        if start == end:
+            return True
+        if not _same_data(o.index.values, self.times[start:end]):
+            return False
+        for j, col in enumerate(self.columns):
+            if col not in o.columns or not _same_data(
+                    o[col].values, self.values[j, start:end]):
+                return False
+        return True
+
+    def get_positions(self, obs_list):
+        """get the position of observations in the store.
+
+        Parameters
+        ----------
+        obs_list : list or pandas.Series of observation.Obs
+            observations
+
+        Returns
+        -------
+        numpy.ndarray or None
+            the positions of the observations in the store. None if one of
+            the observations is not (or no longer) a view on the store.
+        """
+        # only check the observations that reported a change
+        while self._changed:
+            pos = self._changed.pop()
+            if not self.is_view(pos, self.obs_list[pos]):
+                self._not_views.add(pos)
+
+        try:
+            positions = np.fromiter(
+                map(self._obs_position.__getitem__, map(id, obs_list)),
+                dtype=np.int64, count=len(obs_list))
+        except KeyError:
+            return None
+        if self._not_views and np.isin(positions,
+                                       list(self._not_views)).any():
+            return None
+
+        return positions
+
+    @property
+    def n_observations(self):
+        """number of measurements per observation"""
+        return np.diff(self.offsets)
+
+    @property
+    def dates_first_obs(self):
+        """date of the first measurement per observation, NaT if empty"""
+        return self._get_dates(self.offsets[:-1])
+
+    @property
+    def dates_last_obs(self):
+        """date of the last measurement per observation, NaT if empty"""
+        return self._get_dates(self.offsets[1:] - 1)
+
+    def _get_dates(self, rows):
+        dates = np.full(len(self), np.datetime64('NaT'),
+                        dtype='datetime64[ns]')
+        mask = self.n_observations > 0
+        dates[mask] = self.times[rows[mask]]
+        return dates
+
+    def _get_mask(self, column, tmin=None, tmax=None):
+        """boolean array with the non-nan values of a column within tmin and
+        tmax (both inclusive).
+        """
+        mask = ~np.isnan(self.values[self.columns.index(column)])
+        return mask & self._get_time_mask(tmin, tmax)
+
+    def _get_time_mask(self, tmin=None, tmax=None):
+        """boolean array with the rows within tmin and tmax"""
+        mask = np.ones(self.times.shape[0], dtype=bool)
+        if tmin is not None:
+            mask &= self.times >= _to_datetime64(tmin, 'left')
+        if tmax is not None:
+            mask &= self.times <= _to_datetime64(tmax, 'right')
+        return mask
+
+    def reduce(self, how, column, tmin=None, tmax=None):
+        """reduce the values of a column per observation in one pass.
+
+        Parameters
+        ----------
+        how : str
+            the type of reduction, options are 'count', 'sum', 'mean', 'min'
+            and 'max'.
+        column : str
+            name of the column.
+        tmin : str or datetime, optional
+            only use values at or after tmin. The default is None.
+        tmax : str or datetime, optional
+            only use values at or before tmax. The default is None.
+
+        Raises
+        ------
+        KeyError
+            if the column is not in the store.
+        ValueError
+            if how is not a valid option.
+
+        Returns
+        -------
+        numpy.ndarray
+            the reduced value per observation. NaN for observations without
+            values (except for count, which is 0).
+        """
+        if column not in self.columns:
+            raise KeyError(f'{column} not in columns of the store')
+
+        mask = self._get_mask(column, tmin, tmax)
+        cumcount = np.zeros(mask.shape[0] + 1, dtype=np.int64)
+        cumcount[1:] = np.cumsum(mask)
+        count = cumcount[self.offsets[1:]] - cumcount[self.offsets[:-1]]
+        if how == 'count':
+            return count
+
+        values = np.where(mask, self.values[self.columns.index(column)],
+                          np.nan)
+        result = np.full(len(self), np.nan)
+        if how in ['sum', 'mean']:
+            cumsum = np.zeros(values.shape[0] + 1)
+            cumsum[1:] = np.cumsum(np.where(mask, values, 0.))
+            result = cumsum[self.offsets[1:]] - cumsum[self.offsets[:-1]]
+            if how == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result = result / count
+        elif how in ['min', 'max']:
+            ufunc = np.fmin if how == 'min' else np.fmax
+            # reduceat cannot handle empty segments, only use the start of
+            # non-empty observations as the segment boundaries
+            nonempty = self.n_observations > 0
+            if nonempty.any():
+                result[nonempty] = ufunc.reduceat(
+                    values, self.offsets[:-1][nonempty])
+        else:
+            raise ValueError(f"'{how}' is not a valid option for how")
+
+        result[count == 0] = np.nan
+
+        return result
+
+    def get_series(self, column, tmin=None, tmax=None):
+        """get the values of a column of all observations in long format.
+
+        Parameters
+        ----------
+        column : str
+            name of the column.
+        tmin : str or datetime, optional
+            only use values at or after tmin. The default is None.
+        tmax : str or datetime, optional
+            only use values at or before tmax. The default is None.
+
+        Returns
+        -------
+        positions : numpy.ndarray
+            the position of the observation for every value.
+        times : numpy.ndarray
+            the timestamps of the values.
+        values : numpy.ndarray
+            the values.
+        """
+        mask = self._get_time_mask(tmin, tmax)
+        positions = np.repeat(np.arange(len(self)), self.n_observations)
+
+        return (positions[mask], self.times[mask],
+                self.values[self.columns.index(column)][mask])
@@ -3,12 +3,41 @@ import pandas as pd
 
 
 from . import accessor
+from .. import util
 
 
 @accessor.register_obscollection_accessor("geo")
 class GeoAccessor:
     def __init__(self, oc_obj):
         self._obj = oc_obj
+        self._spatial_index = {}
+
+    def get_spatial_index(self, xcol='x', ycol='y'):
+        """get a spatial index (KD-tree) on the coordinates of the
+        observations. The index is built when it is first requested and
+        cached. It is rebuilt when the coordinates have changed.
+
+        Parameters
+        ----------
+        xcol : str, optional
+            column name with x values
+        ycol : str, optional
+            column name with y values
+
+        Returns
+        -------
+        util.SpatialIndex
+            spatial index, the query results are positions in the
+            ObsCollection.
+        """
+        x = self._obj[xcol].values
+        y = self._obj[ycol].values
+        sindex = self._spatial_index.get((xcol, ycol))
+        if sindex is None or not sindex.equals(x, y):
+            sindex = util.SpatialIndex(x, y)
+            self._spatial_index[(xcol, ycol)] = sindex
+
+        return sindex
 
     def get_bounding_box(self, xcol='x', ycol='y', buffer=0):
         """returns the bounding box of all observations
@@ -86,15 +115,10 @@ class GeoAccessor:
         """
 
         df_lat_lon = self._obj.geo.get_lat_lon(in_epsg, out_epsg)
-        for iname in df_lat_lon.index:
-            self._obj._set_metadata_value(iname, 'lat',
-                                          df_lat_lon.loc[iname,
-                                                         'lat'], add_to_meta,
-                                          verbose)
-            self._obj._set_metadata_value(iname, 'lon',
-                                          df_lat_lon.loc[iname,
-                                                         'lon'], add_to_meta,
-                                          verbose)
+        self._obj._set_metadata_values('lat', df_lat_lon['lat'].values,
+                                       add_to_meta, verbose)
+        self._obj._set_metadata_values('lon', df_lat_lon['lon'].values,
+                                       add_to_meta, verbose)
 
     def get_lat_lon(self, in_epsg='epsg:28992', out_epsg='epsg:4326'):
         """get lattitude and longitude from x and y attributes
@@ -113,12 +137,21 @@ class GeoAccessor:
 
         """
 
-        df_lat_lon = pd.DataFrame(
-            index=self._obj.index, columns=['lat', 'lon'])
-        for iname in self._obj.index:
-            o = self._obj.loc[iname, 'obs']
-            df_lat_lon.loc[iname, ['lat', 'lon']
-                           ] = o.geo.get_lat_lon(in_epsg, out_epsg)
+        from pyproj import Proj, transform
+
+        x = np.array([o.x for o in self._obj.obs.values], dtype=float)
+        y = np.array([o.y for o in self._obj.obs.values], dtype=float)
+
+        # transform all points at once
+        lat = np.full(len(x), np.nan)
+        lon = np.full(len(x), np.nan)
+        mask = ~(np.isnan(x) | np.isnan(y))
+        if mask.any():
+            lat[mask], lon[mask] = transform(Proj(in_epsg), Proj(out_epsg),
+                                             x[mask], y[mask])
+
+        df_lat_lon = pd.DataFrame({'lat': lat, 'lon': lon},
+                                  index=self._obj.index)
 
         return df_lat_lon
 
@@ -151,36 +184,28 @@ class GeoAccessor:
             with columns 'nearest point' and 'distance nearest point'
         """
 
-        from shapely.ops import nearest_points
-
-        gdf1 = self._obj.to_gdf(xcol=xcol_obs1, ycol=ycol_obs1)
         if obs_collection2 is not None:
-            gdf2 = obs_collection2.to_gdf(xcol=xcol_obs2, ycol=ycol_obs2)
-        elif gdf2 is None:
+            sindex = obs_collection2.geo.get_spatial_index(xcol_obs2,
+                                                           ycol_obs2)
+            index2 = obs_collection2.index
+        elif gdf2 is not None:
+            sindex = util.SpatialIndex(gdf2.geometry.x, gdf2.geometry.y)
+            index2 = gdf2.index
+        else:
             raise ValueError('obs_collecction2 or gdf2 should be defined')
 
-        pts_gdf2 = gdf2.geometry.unary_union
-
-        def nearest_point(point_gdf1, pts=pts_gdf2):
-            # find the nearest point and return the corresponding Place value
-            nearest_point_gdf2 = nearest_points(point_gdf1, pts_gdf2)[1]
-            nearest = gdf2[gdf2.geometry == nearest_point_gdf2]
-            return nearest.index[0]
-
-        def distance_nearest_point(point_gdf1, pts=pts_gdf2):
-            # find the nearest point and return the corresponding Place value
-            nearest_point_gdf2 = nearest_points(point_gdf1, pts_gdf2)[1]
-            distance = point_gdf1.distance(nearest_point_gdf2)
-            return distance
+        distance, positions = sindex.nearest(self._obj[xcol_obs1].values,
+                                             self._obj[ycol_obs1].values)
+        found = positions >= 0
+        nearest = np.full(len(positions), np.nan, dtype=object)
+        nearest[found] = index2.values[positions[found]]
 
-        gdf1['nearest point'] = gdf1.apply(
-            lambda row: nearest_point(row.geometry), axis=1)
-        gdf1['distance nearest point'] = gdf1.apply(
-            lambda row: distance_nearest_point(row.geometry), axis=1)
-        
-        
+        df = pd.DataFrame({'nearest point': nearest,
+                           'distance nearest point': np.where(found, distance,
+                                                              np.nan)},
+                          index=self._obj.index)
 
-        return gdf1[['nearest point', 'distance nearest point']]
+        return df
 
     def get_distance_to_point(self, point, xcol='x', ycol='y'):
         """get distance of every observation to a point.
@@ -305,11 +330,11 @@ class GeoAccessor:
         elif column_name not in self._obj.columns:
             self._obj[column_name] = np.nan
 
-        obs_new_maaiveld = self._obj[column_name].isna()
-        maaiveld_arr = zp[obs_new_maaiveld]
+        obs_new_maaiveld = self._obj[column_name].isna().values
+        maaiveld_arr = np.where(obs_new_maaiveld, zp,
+                                self._obj[column_name].values)
 
-        for i, iname in enumerate(self._obj.loc[obs_new_maaiveld].index):
-            self._obj._set_metadata_value(iname, column_name, maaiveld_arr[i])
+        self._obj._set_metadata_values(column_name, maaiveld_arr)
 
 
 @accessor.register_obs_accessor("geo")
@@ -269,22 +269,52 @@ class GwObsAccessor:
             self._obj['filternr'] = np.nan
 
         # ken filternummers toe aan peilbuizen die dicht bij elkaar staan
-        for name in self._obj.index:
-            if np.isnan(self._obj.loc[name, 'filternr']):
-                x = self._obj.loc[name, xcol]
-                y = self._obj.loc[name, ycol]
-                distance_to_other_filters = np.sqrt(
-                    (self._obj[xcol] - x)**2 + (self._obj[ycol] - y)**2)
-                dup_x = self._obj.loc[distance_to_other_filters < radius]
-                if dup_x.shape[0] == 1:
-                    self._obj._set_metadata_value(name, 'filternr', 1,
-                                                  add_to_meta=add_to_meta)
-                else:
-                    dup_x2 = dup_x.sort_values(
-                        'onderkant_filter', ascending=False)
-                    for i, pb_dub in enumerate(dup_x2.index):
-                        self._obj._set_metadata_value(pb_dub, 'filternr', i + 1,
-                                                      add_to_meta=add_to_meta)
+        filternr, _, changed = self._get_filter_num(radius, xcol, ycol)
+        self._obj._set_metadata_values(
+            'filternr', pd.Series(filternr[changed].astype(int),
+                                  index=self._obj.index[changed]),
+            add_to_meta=add_to_meta)
+
+    def _get_filter_num(self, radius=1, xcol='x', ycol='y'):
+        """compute the filternumbers of the observations without filternr
+        based on the distance between the observations.
+
+        Returns
+        -------
+        filternr : numpy.ndarray
+            filternumber of every observation
+        first : numpy.ndarray
+            position of the filter with filternr 1 at the same location
+        changed : numpy.ndarray
+            boolean array, True if the filternr is computed
+        """
+        sindex = self._obj.geo.get_spatial_index(xcol, ycol)
+        x, y = sindex.x, sindex.y
+        onderkant_filter = pd.to_numeric(self._obj['onderkant_filter'],
+                                         errors='coerce').values
+
+        filternr = self._obj['filternr'].values.astype(float)
+        first = np.arange(len(x))
+        changed = np.zeros(len(x), dtype=bool)
+        for i in range(len(x)):
+            if np.isnan(filternr[i]):
+                dup_x = sindex.within_radius(x[i], y[i], radius)
+                # only use filters closer than radius
+                distance_to_other_filters = np.sqrt((x[dup_x] - x[i])**2 +
+                                                    (y[dup_x] - y[i])**2)
+                dup_x = dup_x[distance_to_other_filters < radius]
+                if len(dup_x) == 0:
+                    # no coordinates
+                    continue
+                elif len(dup_x) > 1:
+                    # deepest filter gets the highest filternr
+                    dup_x = pd.Series(onderkant_filter[dup_x], index=dup_x
+                                      ).sort_values(ascending=False).index
+                filternr[dup_x] = np.arange(1, len(dup_x) + 1)
+                first[dup_x] = dup_x[0]
+                changed[dup_x] = True
+
+        return filternr, first, changed
 
     def set_filter_num_location(self, loc_col, radius=1, xcol='x', ycol='y',
                                 if_exists='error', add_to_meta=False):
@@ -343,29 +373,16 @@ class GwObsAccessor:
             self._obj['locatie'] = np.nan
 
         # ken filternummers toe aan peilbuizen die dicht bij elkaar staan
-        for name in self._obj.index:
-            if np.isnan(self._obj.loc[name, 'filternr']):
-                x = self._obj.loc[name, xcol]
-                y = self._obj.loc[name, ycol]
-                distance_to_other_filters = np.sqrt(
-                    (self._obj[xcol] - x)**2 + (self._obj[ycol] - y)**2)
-                dup_x = self._obj.loc[distance_to_other_filters < radius]
-                if dup_x.shape[0] == 1:
-                    self._obj._set_metadata_value(name, 'filternr', 1,
-                                                  add_to_meta=add_to_meta)
-                    locatie = self._obj.loc[name, loc_col]
-                    self._obj._set_metadata_value(name, 'locatie', locatie,
-                                                  add_to_meta=add_to_meta)
-                else:
-                    dup_x2 = dup_x.sort_values(
-                        'onderkant_filter', ascending=False)
-                    for i, pb_dub in enumerate(dup_x2.index):
-                        if i == 0:
-                            locatie = self._obj.loc[pb_dub, loc_col]
-                        self._obj._set_metadata_value(pb_dub, 'filternr', i + 1,
-                                                      add_to_meta=add_to_meta)
-                        self._obj._set_metadata_value(pb_dub, 'locatie', locatie,
-                                                      add_to_meta=add_to_meta)
+        filternr, first, changed = self._get_filter_num(radius, xcol, ycol)
+        locatie = self._obj[loc_col].values[first]
+        index = self._obj.index[changed]
+        self._obj._set_metadata_values(
+            'filternr', pd.Series(filternr[changed].astype(int),
+                                  index=index),
+            add_to_meta=add_to_meta)
+        self._obj._set_metadata_values(
+            'locatie', pd.Series(locatie[changed], index=index),
+            add_to_meta=add_to_meta)
 
     def get_modellayers(self, ml, zgr=None, verbose=False):
         """Get the modellayer per observation. The layers can be obtained
@@ -3,28 +3,244 @@ import pandas as pd
 import datetime as dt
 
 from . import accessor
+from ..columnar import _to_datetime64
+from ..lazy import LazyObs
+from ..util import ChangeSet, _watch
+
+
+class CoverageIndex:
+    """Index with the date of the first and the last measurement and the
+    number of measurements of every observation in a collection.
+
+    The dates are also stored sorted, so the observations that have
+    measurements in a period can be found without touching the measurements.
+    The observations report changes of their data to the index, so a
+    refresh only reads the observations that are new or changed.
+    """
+
+    def __init__(self):
+        self._ids = None
+        self._cache = {}
+        self._positions = {}
+        self._changed = ChangeSet()
+        self.first = np.array([], dtype='datetime64[ns]')
+        self.last = np.array([], dtype='datetime64[ns]')
+        self.count = np.array([], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.count)
+
+    def __repr__(self):
+        return '{}(nobs={})'.format(self.__class__.__name__, len(self))
+
+    @staticmethod
+    def _get_coverage(o):
+        if isinstance(o, LazyObs):
+            o = o.load()
+        index = o.index
+        if len(index) == 0:
+            return np.datetime64('NaT'), np.datetime64('NaT'), 0
+        if isinstance(index, pd.DatetimeIndex):
+            return index.values[0], index.values[-1], len(index)
+        return (pd.Timestamp(index[0]).to_datetime64(),
+                pd.Timestamp(index[-1]).to_datetime64(),
+                len(index))
+
+    def refresh(self, obs_list=None):
+        """update the index with the observations in obs_list.
+
+        Parameters
+        ----------
+        obs_list : list or pandas.Series of observation.Obs, optional
+            observations in the collection, in the order of the collection.
+            If None the observations did not change since the last refresh,
+            only the observations that reported a change are read. The
+            default is None.
+
+        Returns
+        -------
+        bool
+            True if the index is changed.
+        """
+        if obs_list is not None:
+            ids = list(map(id, obs_list))
+            if ids != self._ids:
+                self._set_obs(obs_list, ids)
+                return True
+
+        if not self._changed:
+            return False
+        changed = list(self._changed)
+        self._changed.clear()
+        for key in changed:
+            if key not in self._cache:
+                continue
+            o = self._cache[key][0]
+            coverage = self._get_coverage(o)
+            self._cache[key] = (o, coverage)
+            for i in self._positions[key]:
+                self.first[i], self.last[i], self.count[i] = coverage
+        self._sort()
+
+        return True
+
+    def _set_obs(self, obs_list, ids):
+        """set the observations of the index, only the observations that are
+        new or changed are read"""
+        # keep a reference to the obs so their id's are not reused
+        cache = {}
+        positions = {}
+        for i, (key, o) in enumerate(zip(ids, obs_list)):
+            if key not in cache:
+                if key in self._cache and key not in self._changed:
+                    cache[key] = self._cache[key]
+                else:
+                    cache[key] = (o, self._get_coverage(o))
+                    _watch(o, self._changed, key)
+                positions[key] = []
+            positions[key].append(i)
+        self._changed.clear()
+
+        coverage = [cache[key][1] for key in ids]
+        self.first = np.array([c[0] for c in coverage],
+                              dtype='datetime64[ns]')
+        self.last = np.array([c[1] for c in coverage],
+                             dtype='datetime64[ns]')
+        self.count = np.array([c[2] for c in coverage], dtype=np.int64)
+        self._sort()
+
+        self._ids = ids
+        self._cache = cache
+        self._positions = positions
+
+    def _sort(self):
+        # NaT (observations without measurements) is sorted at the end
+        self._order_first = np.argsort(self.first, kind='stable')
+        self._first_sorted = self.first[self._order_first]
+        self._last_sorted = np.sort(self.last)
+
+    def _n_first_before(self, tmax):
+        if tmax is None:
+            return int((~np.isnat(self.first)).sum())
+        return np.searchsorted(self._first_sorted,
+                               _to_datetime64(tmax, 'right'), 'right')
+
+    def count_active(self, tmin=None, tmax=None):
+        """number of observations with measurements in the period between
+        tmin and tmax (both inclusive).
+        """
+        n = self._n_first_before(tmax)
+        if tmin is not None:
+            n -= np.searchsorted(self._last_sorted,
+                                 _to_datetime64(tmin, 'left'), 'left')
+        return int(n)
+
+    def active(self, tmin=None, tmax=None):
+        """boolean array, True for the observations with measurements in the
+        period between tmin and tmax (both inclusive). An observation is
+        active if the period between its first and last measurement overlaps
+        with the period between tmin and tmax.
+        """
+        candidates = self._order_first[:self._n_first_before(tmax)]
+        if tmin is not None:
+            candidates = candidates[self.last[candidates] >=
+                                    _to_datetime64(tmin, 'left')]
+        mask = np.zeros(len(self), dtype=bool)
+        mask[candidates] = True
+        return mask
 
 
 @accessor.register_obscollection_accessor("stats")
 class StatsAccessor:
     def __init__(self, oc_obj):
         self._obj = oc_obj
+        self._coverage = CoverageIndex()
+        # contains True when the collection changed after the last refresh
+        self._collection_changed = ChangeSet([True])
+        _watch(oc_obj, self._collection_changed, True)
+
+    @property
+    def coverage(self):
+        """CoverageIndex with the first and last date and the number of
+        measurements of every observation. The index is refreshed when
+        observations are added or changed."""
+        if self._collection_changed:
+            self._collection_changed.clear()
+            self._coverage.refresh(self._obj.obs.values)
+        else:
+            self._coverage.refresh()
+        return self._coverage
+
+    def _from_coverage(self, attr):
+        values = getattr(self.coverage, attr)
+        return pd.Series(values, index=self._obj.index, name='obs')
+
+    def _from_store(self, attr):
+        """get an attribute per observation from the columnar store, returns
+        None if the collection is not backed by a columnar store."""
+        positions = self._obj._get_store_positions()
+        if positions is None:
+            return None
+        values = getattr(self._obj._store, attr)[positions]
+        return pd.Series(values, index=self._obj.index, name='obs')
+
+    def _reduce_store(self, how, column_name, tmin=None, tmax=None):
+        """reduce a column per observation using the columnar store, returns
+        None if the collection is not backed by a columnar store or if the
+        column is not in the store."""
+        positions = self._obj._get_store_positions()
+        if positions is None or column_name not in self._obj._store.columns:
+            return None
+        values = self._obj._store.reduce(how, column_name, tmin, tmax)
+        return pd.Series(values[positions], index=self._obj.index,
+                         name='obs')
 
     @property
     def n_observations(self):
-        return self._obj.obs.apply(lambda o: o.shape[0])
+        n_obs = self._from_store('n_observations')
+        if n_obs is not None:
+            return n_obs
+        return self._from_coverage('count')
 
     @property
     def dates_first_obs(self):
-        return self._obj.obs.apply(lambda o: o.index[0])
+        dates = self._from_store('dates_first_obs')
+        if dates is not None:
+            return dates
+        return self._from_coverage('first')
 
     @property
     def dates_last_obs(self):
-        return self._obj.obs.apply(lambda o: o.index[-1])
+        dates = self._from_store('dates_last_obs')
+        if dates is not None:
+            return dates
+        return self._from_coverage('last')
 
     @property
     def obs_periods(self):
-        return self._obj.dates_last_obs - self._obj.dates_first_obs
+        return self.dates_last_obs - self.dates_first_obs
+
+    def active_in_period(self, tmin=None, tmax=None):
+        """get the observations with measurements in a period. An
+        observation is active if the period between its first and last
+        measurement overlaps with the period between tmin and tmax. The
+        measurements themselves are not used, so gaps in a series are
+        ignored.
+
+        Parameters
+        ----------
+        tmin : str or datetime, optional
+            start of the period (inclusive). The default is None.
+        tmax : str or datetime, optional
+            end of the period (inclusive). The default is None.
+
+        Returns
+        -------
+        pd.Series
+            boolean series, True for the active observations.
+        """
+        return pd.Series(self.coverage.active(tmin, tmax),
+                         index=self._obj.index, name='obs')
 
     def obs_per_year(self, col="stand_m_tov_nap"):
         pblist = {o.name: o.obs_per_year(col=col) for o in self._obj.obs}
@@ -83,9 +299,13 @@ class StatsAccessor:
 
         """
         if tmin is None:
-            tmin = self._obj.dates_first_obs.min()
+            tmin = self.dates_first_obs.min()
         if tmax is None:
-            tmax = self._obj.dates_last_obs.max()
+            tmax = self.dates_last_obs.max()
+
+        mean = self._reduce_store('mean', col, tmin, tmax)
+        if mean is not None:
+            return mean
 
         return self._obj.obs.apply(lambda o: o.loc[tmin:tmax, col].mean())
 
@@ -115,6 +335,11 @@ class StatsAccessor:
             except KeyError:
                 return 0
 
+        result = self._reduce_store('count', column_name, after_date,
+                                    before_date)
+        if result is not None:
+            return result
+
         return self._obj.obs.apply(get_num_obs)
 
     def get_seasonal_stat(self, column_name='stand_m_tov_nap', stat='mean',
@@ -157,8 +382,14 @@ class StatsAccessor:
 
         """
 
-        date_first_measurement = [o.index.min() for o in self._obj.obs.values]
-        date_last_measurement = [o.index.max() for o in self._obj.obs.values]
+        if self._obj._get_store_positions() is not None:
+            date_first_measurement = self.dates_first_obs.values
+            date_last_measurement = self.dates_last_obs.values
+        else:
+            date_first_measurement = [o.index.min()
+                                      for o in self._obj.obs.values]
+            date_last_measurement = [o.index.max()
+                                     for o in self._obj.obs.values]
 
         first_last_obs = pd.DataFrame(index=self._obj.index,
                                       data={'date_first_measurement': date_first_measurement,
@@ -193,6 +424,11 @@ class StatsAccessor:
             except KeyError:
                 return np.nan
 
+        result = self._reduce_store('min', column_name, after_date,
+                                    before_date)
+        if result is not None:
+            return result
+
         return self._obj.obs.apply(get_min_obs)
 
     def get_max(self, column_name='stand_m_tov_nap',
@@ -222,6 +458,11 @@ class StatsAccessor:
             except KeyError:
                 return np.nan
 
+        result = self._reduce_store('max', column_name, after_date,
+                                    before_date)
+        if result is not None:
+            return result
+
         return self._obj.obs.apply(get_max_obs)
 
 
@@ -0,0 +1,217 @@
+"""
+module with the GridForcing class, gridded meteorological forcing (e.g.
+precipitation or evaporation for a groundwater model) derived from station
+measurements.
+
+Every cell of a model grid gets the measurements of one station, usually the
+nearest station. Instead of one time series per cell, a GridForcing stores
+the measurements once per station in a (time, station) matrix, together
+with an integer array with shape (nrow, ncol) with the position of the
+station of every cell. The (time, row, col) values of the grid are only
+created when they are requested, for a period or in chunks of time steps.
+
+"""
+import numpy as np
+import pandas as pd
+
+from .columnar import _to_datetime64
+
+
+class GridForcing:
+    """Gridded forcing stored as the measurements of the stations and the
+    station of every cell.
+
+    Parameters
+    ----------
+    values : pandas.DataFrame
+        measurements with a DatetimeIndex and one column per station.
+    station_grid : numpy.ndarray
+        integer array with shape (nrow, ncol) with the position of the
+        station of every cell in the columns of values. Cells without a
+        station are -1.
+    xmid : numpy.ndarray, optional
+        x-coordinates of the cell centers. The default is None.
+    ymid : numpy.ndarray, optional
+        y-coordinates of the cell centers. The default is None.
+    name : str, optional
+        name of the variable, e.g. 'RD'. The default is ''.
+    """
+
+    def __init__(self, values, station_grid, xmid=None, ymid=None, name=''):
+        station_grid = np.asarray(station_grid)
+        if station_grid.ndim != 2:
+            raise ValueError('station_grid should have 2 dimensions, '
+                             'not {}'.format(station_grid.ndim))
+        if station_grid.size and station_grid.max() >= values.shape[1]:
+            raise ValueError('station_grid refers to {} stations, values '
+                             'contains {} stations'.format(
+                                 station_grid.max() + 1, values.shape[1]))
+        self.values = values
+        self.station_grid = station_grid
+        self.xmid = xmid
+        self.ymid = ymid
+        self.name = name
+
+    def __repr__(self):
+        return '{}(name={}, shape={}, nstations={})'.format(
+            self.__class__.__name__, self.name, self.shape,
+            self.values.shape[1])
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def shape(self):
+        """the shape (ntime, nrow, ncol) of the gridded values"""
+        return (len(self.values),) + self.station_grid.shape
+
+    @property
+    def index(self):
+        """the time steps of the gridded values"""
+        return self.values.index
+
+    @property
+    def stations(self):
+        """the stations in the order of the positions in station_grid"""
+        return self.values.columns
+
+    @classmethod
+    def from_obscollection(cls, oc, meteo_var):
+        """get the gridded forcing of a meteo variable from an ObsCollection
+        created with ObsCollection.from_knmi with xmid and ymid.
+
+        Parameters
+        ----------
+        oc : ObsCollection
+            collection with KnmiObs and meta['station_grid'].
+        meteo_var : str
+            meteo variable, e.g. 'RD' or 'EV24'.
+
+        Returns
+        -------
+        GridForcing
+        """
+        if meteo_var not in oc.meta.get('station_grid', {}):
+            raise KeyError('no station grid of {} in the meta of the '
+                           'collection, use ObsCollection.from_knmi with '
+                           'xmid and ymid'.format(meteo_var))
+        station_grid = oc.meta['station_grid'][meteo_var]
+
+        series = {}
+        for o in oc.obs.values:
+            if meteo_var in o.columns:
+                series[o.station] = o[meteo_var]
+        stns = station_grid['stations']
+        if stns is None:
+            stns = []
+        missing = [stn for stn in stns if stn not in series]
+        if missing:
+            raise KeyError('no measurements of {} of stations {} in the '
+                           'collection'.format(meteo_var, missing))
+
+        if len(stns):
+            values = pd.concat([series[stn] for stn in stns], axis=1)
+        else:
+            values = pd.DataFrame()
+        values.columns = list(stns)
+        return cls(values, station_grid['grid'],
+                   xmid=station_grid.get('xmid'),
+                   ymid=station_grid.get('ymid'), name=meteo_var)
+
+    def _get_rows(self, tmin=None, tmax=None):
+        """get the slice of the rows of values between tmin and tmax, a
+        string includes the whole period, e.g. the whole day of tmax"""
+        index = self.values.index
+        start = (0 if tmin is None else
+                 index.searchsorted(_to_datetime64(tmin, 'left')))
+        end = (len(index) if tmax is None else
+               index.searchsorted(_to_datetime64(tmax, 'right'),
+                                  side='right'))
+        return slice(start, end)
+
+    def _to_grid(self, rows, dtype):
+        """get the gridded values of a slice of the rows of values"""
+        values = self.values.values[rows].astype(dtype, copy=False)
+        # add a column of nan for the cells without a station (-1)
+        values = np.concatenate(
+            [values, np.full((len(values), 1), np.nan, dtype=dtype)], axis=1)
+        return values[:, self.station_grid]
+
+    def get_values(self, tmin=None, tmax=None, dtype=float):
+        """get the gridded values between tmin and tmax.
+
+        Parameters
+        ----------
+        tmin : str or datetime, optional
+            start of the period. If None the period starts at the first time
+            step. The default is None.
+        tmax : str or datetime, optional
+            end of the period. If None the period ends at the last time step.
+            A string is the end of the period it describes, e.g. '2020-1-5'
+            includes all time steps on that day. The default is None.
+        dtype : numpy dtype, optional
+            dtype of the values, e.g. numpy.float32 to halve the memory. The
+            default is float.
+
+        Returns
+        -------
+        numpy.ndarray
+            array with shape (ntime, nrow, ncol), nan for cells without a
+            station.
+        """
+        return self._to_grid(self._get_rows(tmin, tmax), dtype)
+
+    def iter_chunks(self, chunksize=100, tmin=None, tmax=None, dtype=float):
+        """iterate over the gridded values in chunks of time steps, so only
+        one chunk is in memory at a time.
+
+        Parameters
+        ----------
+        chunksize : int, optional
+            number of time steps per chunk. The default is 100.
+        tmin : str or datetime, optional
+            start of the period. The default is None.
+        tmax : str or datetime, optional
+            end of the period. The default is None.
+        dtype : numpy dtype, optional
+            dtype of the values. The default is float.
+
+        Yields
+        ------
+        index : pandas.DatetimeIndex
+            the time steps of the chunk.
+        values : numpy.ndarray
+            array with shape (len(index), nrow, ncol).
+        """
+        rows = self._get_rows(tmin, tmax)
+        for start in range(rows.start, rows.stop, chunksize):
+            chunk = slice(start, min(start + chunksize, rows.stop))
+            yield self.values.index[chunk], self._to_grid(chunk, dtype)
+
+    def to_xarray(self, tmin=None, tmax=None, dtype=float):
+        """get the gridded values between tmin and tmax as an
+        xarray.DataArray with dimensions (time, y, x).
+
+        Parameters
+        ----------
+        tmin : str or datetime, optional
+            start of the period. The default is None.
+        tmax : str or datetime, optional
+            end of the period. The default is None.
+        dtype : numpy dtype, optional
+            dtype of the values. The default is float.
+
+        Returns
+        -------
+        xarray.DataArray
+        """
+        import xarray as xr
+
+        rows = self._get_rows(tmin, tmax)
+        coords = {'time': self.values.index[rows]}
+        if self.xmid is not None:
+            coords['x'] = self.xmid
+        if self.ymid is not None:
+            coords['y'] = self.ymid
+        return xr.DataArray(self._to_grid(rows, dtype), coords=coords,
+                            dims=('time', 'y', 'x'), name=self.name)
@@ -1,7 +1,9 @@
+import io
 import os
 import re
-import tempfile
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import geopandas as gpd
 import numpy as np
@@ -11,10 +13,15 @@ import zeep
 from requests.exceptions import HTTPError
 from shapely.geometry import Point
 from zeep import Plugin
+from zeep.exceptions import TransportError
 from zeep.plugins import HistoryPlugin
+from zeep.transports import Transport
 from zeep.wsa import WsAddressingPlugin
 
-from ..util import unzip_file
+from ..lazy import LazyObs, ObsMemoryCache
+from ..remote_cache import _get_remote_cache
+from ..util import (RateLimiter, _call_with_retry, _read_files,
+                    list_zip_files, open_file, unzip_file)
 
 
 # %% DINO groundwater CSV methods
@@ -87,11 +94,14 @@ def _read_dino_groundwater_metadata(f, line):
 
     meta_ts = {}
     if metalist:
-        # add time dependent metadata to meta_ts
+        # add time dependent metadata to meta_ts, the values are collected
+        # per start date first and converted to a Series in one go
+        start_dates = pd.to_datetime([meta.pop('startdatum')
+                                      for meta in metalist], dayfirst=True)
+        values_ts = {}
         for i, meta in enumerate(metalist):
             meta_tsi = {}
-            start_date = pd.to_datetime(meta.pop('startdatum'), dayfirst=True)
-            end_date = pd.to_datetime(meta.pop('einddatum'), dayfirst=True)
+            meta.pop('einddatum')
             meta_tsi['locatie'] = meta['locatie']
             for key in _translate_dic_float.keys():
                 if meta[key] == '':
@@ -106,12 +116,17 @@ def _read_dino_groundwater_metadata(f, line):
                     meta_tsi[_translate_dic_div_100[key]
                              ] = float(meta[key]) / 100.
             if i == 0:
-                for key in meta_tsi.keys():
-                    meta_ts[key] = pd.Series(name=key, 
-                                             dtype=type(meta_tsi[key]))
+                dtypes = {key: type(val) for key, val in meta_tsi.items()}
 
-            for key in meta_tsi.keys():
-                meta_ts[key].loc[start_date] = meta_tsi[key]
+            # a later row with the same start date replaces the value
+            for key, val in meta_tsi.items():
+                values_ts.setdefault(key, {})[start_dates[i]] = val
+
+        # every key has a value for every start date, use one index
+        index = pd.DatetimeIndex(list(values_ts['locatie'].keys()))
+        for key, val in values_ts.items():
+            meta_ts[key] = pd.Series(list(val.values()), index=index,
+                                     name=key, dtype=dtypes[key])
 
         # remove series with non time variant metadata from meta_ts
         ts_keys = ['locatie'] + list(_translate_dic_float.values()) + \
@@ -153,22 +168,66 @@ def _read_dino_groundwater_measurements(f, line):
         titel = [s.lower() for s in validator(titel)]
         usecols = range(0, len(titel))
 
+        start = f.tell()
         try:
+            # read the dates as strings and parse them with the fixed format
+            # of dinoloket, much faster than parsing every date separately
             measurements = pd.read_csv(f, header=None, names=titel,
-                                       parse_dates=['peildatum'],
-                                       index_col='peildatum',
-                                       dayfirst=True,
+                                       dtype={'peildatum': str},
                                        usecols=usecols)
+            peildatum = measurements.pop('peildatum')
+            measurements.index = pd.DatetimeIndex(
+                _parse_dino_dates(peildatum.values), name=peildatum.name)
         except pd.errors.ParserError:
             # for now the workflow is to remove the files that cannot be read
             # manually.
             measurements = None
+        except (ValueError, KeyError):
+            # dates in another format, let pandas infer the format
+            f.seek(start)
+            measurements = _read_dino_csv_measurements(f, titel, usecols)
     else:
         measurements = None
 
     return line, measurements
 
 
+def _parse_dino_dates(dates):
+    """parse an array of dates in the format dd-mm-yyyy (missing values are
+    allowed). The characters are reordered to the iso format yyyy-mm-dd,
+    which numpy parses without a Python loop. Raises a ValueError if a date
+    has another format.
+    """
+    notna = pd.notna(dates)
+    chars = dates[notna].astype(str)
+    if chars.dtype != np.dtype('U10'):
+        raise ValueError('dates are not in the format dd-mm-yyyy')
+    codes = chars.view(np.uint32).reshape(-1, 10)
+    digits = codes[:, [0, 1, 3, 4, 6, 7, 8, 9]]
+    if ((codes[:, [2, 5]] != ord('-')).any() or (digits < ord('0')).any() or
+            (digits > ord('9')).any()):
+        raise ValueError('dates are not in the format dd-mm-yyyy')
+    iso = np.ascontiguousarray(codes[:, [6, 7, 8, 9, 5, 3, 4, 2, 0, 1]])
+
+    parsed = np.full(len(dates), np.datetime64('NaT'), dtype='datetime64[ns]')
+    parsed[notna] = iso.view('U10').ravel().astype('datetime64[D]')
+
+    return parsed
+
+
+def _read_dino_csv_measurements(f, titel, usecols):
+    try:
+        measurements = pd.read_csv(f, header=None, names=titel,
+                                   parse_dates=['peildatum'],
+                                   index_col='peildatum',
+                                   dayfirst=True,
+                                   usecols=usecols)
+    except pd.errors.ParserError:
+        measurements = None
+
+    return measurements
+
+
 def read_dino_groundwater_quality_txt(fname, verbose=False):
     """Read dino groundwater quality (grondwatersamenstelling) from a dinoloket
     txt file
@@ -193,7 +252,7 @@ def read_dino_groundwater_quality_txt(fname, verbose=False):
 
     if verbose:
         print('reading -> {}'.format(os.path.split(fname)[-1]))
-    with open(fname, 'r') as f:
+    with open_file(fname, 'r') as f:
 
         # LOCATIE gegevens
         line = f.readline().rstrip('\n')
@@ -262,7 +321,11 @@ def read_dino_groundwater_csv(fname, to_mnap=True,
     if verbose:
         print('reading -> {}'.format(os.path.split(fname)[-1]))
 
-    with open(fname, 'r') as f:
+    # read the file at once, the sections are parsed from memory
+    with open_file(fname, 'r') as fo:
+        f = io.StringIO(fo.read())
+
+    with f:
         # read header
         line, header = _read_dino_groundwater_header(f)
         line = _read_empty(f, line)
@@ -292,11 +355,13 @@ def read_dino_groundwater_csv(fname, to_mnap=True,
             if to_mnap and measurements is not None:
                 measurements['stand_m_tov_nap'] = measurements['stand_cm_tov_nap'] / 100.
 
-            # add time variant metadata to measurements
-            for s in meta_ts.values():
-                measurements = pd.concat([measurements, s], axis=1)
-                measurements.loc[:,
-                                 s.name] = measurements.loc[:, s.name].ffill()
+            # add time variant metadata to measurements, all series have the
+            # start dates of the metadata as index
+            if meta_ts:
+                measurements = pd.concat([measurements,
+                                          pd.DataFrame(meta_ts)], axis=1)
+                measurements[list(meta_ts)] = \
+                    measurements[list(meta_ts)].ffill()
 
         else:
             measurements = None
@@ -418,7 +483,7 @@ def read_artdino_groundwater_csv(fname, to_mnap=True,
     if verbose:
         print('reading -> {}'.format(os.path.split(fname)[-1]))
 
-    with open(fname, 'r') as f:
+    with open_file(fname, 'r') as f:
         # read header
         line, header = _read_dino_groundwater_header(f)
         line = _read_empty(f, line)
@@ -451,8 +516,9 @@ def read_artdino_groundwater_csv(fname, to_mnap=True,
 def read_artdino_dir(dirname, ObsClass=None,
                      subdir='csv', suffix='.csv',
                      unpackdir=None, force_unpack=False, preserve_datetime=False,
-                     verbose=False, keep_all_obs=True, **kwargs
-                     ):
+                     verbose=False, keep_all_obs=True, n_workers=None,
+                     executor=None, errors='raise', parse_cache=None,
+                     **kwargs):
     '''Read Dino directory with point observations
 
     to do:
@@ -471,7 +537,8 @@ def read_artdino_dir(dirname, ObsClass=None,
     suffix : str
         suffix of files in subdir that will be read
     unpackdir : str
-        destination directory of the unzipped file
+        destination directory of the unzipped file. If None (default) the
+        files are read from the zip file without extracting it
     force_unpack : boolean, optional
         force unpack if dst already exists
     preserve_datetime : boolean, optional
@@ -481,54 +548,122 @@ def read_artdino_dir(dirname, ObsClass=None,
     keep_all_obs : boolean, optional
         add all observation points to the collection, even without data or
         metadata
+    n_workers : int, optional
+        number of worker processes used to read the files. The order of the
+        files is kept. If None (and executor is None) the files are read one
+        by one. The default is None.
+    executor : concurrent.futures.Executor, optional
+        executor used to read the files, e.g. a ProcessPoolExecutor that is
+        shared by multiple calls. The default is None.
+    errors : str, optional
+        if 'raise' an error while reading a file is raised. If 'report' the
+        file is skipped and the files that could not be read are returned as
+        well. The default is 'raise'.
+    parse_cache : str or ParseCache, optional
+        cache (or the directory of a cache) with the parsed files. Only the
+        files that are not in the cache or that changed since they were
+        cached are parsed. The default is None.
     **kwargs: dict, optional
         Extra arguments are passed to ObsClass.from_dino_file()
 
     Returns
     -------
-    obs_df : pd.DataFrame
-        collection of multiple point observations
+    obs_list : list of observations
+        observations in the directory
+    failures : dict
+        only returned if errors is 'report'. The filename and error message
+        of the files that could not be read.
 
     '''
 
-    # unzip dir
-    if dirname.endswith('.zip'):
-        zipf = dirname
-        if unpackdir is None:
-            dirname = tempfile.TemporaryDirectory().name
-        else:
-            dirname = unpackdir
-        unzip_file(zipf, dirname, force=force_unpack,
+    fnames = _get_dino_files(dirname, subdir, suffix, unpackdir,
+                             force_unpack, preserve_datetime)
+
+    # read individual files
+    obs_list, failures = _read_files(
+        ObsClass.from_artdino_file, fnames, n_workers=n_workers,
+        executor=executor, errors=errors,
+        parse_cache=parse_cache, verbose=verbose, **kwargs)
+    obs_list = _select_obs(obs_list, fnames, keep_all_obs, verbose)
+
+    if errors == 'report':
+        return obs_list, failures
+    return obs_list
+
+
+def _get_dino_files(dirname, subdir, suffix, unpackdir=None,
+                    force_unpack=False, preserve_datetime=False):
+    """get the paths of the files in subdir of a directory or zip file. The
+    files in a zip file are read from the zip file without extracting them,
+    unless unpackdir is specified."""
+    if dirname.endswith('.zip') and unpackdir is not None:
+        # unzip dir
+        unzip_file(dirname, unpackdir, force=force_unpack,
                    preserve_datetime=preserve_datetime)
+        dirname = unpackdir
 
     # read filenames
-    files = os.listdir(os.path.join(dirname, subdir))
-    if suffix:
-        files = [file for file in files if file.endswith(suffix)]
+    if dirname.endswith('.zip'):
+        fnames = list_zip_files(dirname, ext=suffix or '', subdir=subdir)
+    else:
+        files = os.listdir(os.path.join(dirname, subdir))
+        if suffix:
+            files = [file for file in files if file.endswith(suffix)]
+        fnames = [os.path.join(dirname, subdir, file) for file in files]
 
-    if not files:
+    if not fnames:
         raise FileNotFoundError('no files were found in {} that end with {}'.format(
             os.path.join(dirname, subdir), suffix))
 
-    # read individual files
-    obs_list = []
-    for _, file in enumerate(files):
-        fname = os.path.join(dirname, subdir, file)
-        obs = ObsClass.from_artdino_file(
-            fname=fname, verbose=verbose, **kwargs)
+    return fnames
+
+
+def _select_obs(obs_list, fnames, keep_all_obs=True, verbose=False):
+    """remove the files that could not be read and, if keep_all_obs is
+    False, the observations without metadata or measurements"""
+    selected = []
+    for fname, obs in zip(fnames, obs_list):
+        if obs is None:
+            if verbose:
+                print('could not read -> {}'.format(fname))
+            continue
         if obs.metadata_available and (not obs.empty):
-            obs_list.append(obs)
+            selected.append(obs)
         elif keep_all_obs:
-            obs_list.append(obs)
+            selected.append(obs)
         else:
             if verbose:
                 print('not added to collection -> {}'.format(fname))
 
-    return obs_list
+    return selected
 
 
 # %% DINO download methods
 
+def _is_transient_error(err):
+    """check if a request to the dino server failed because of an error that
+    can be solved by trying again (no connection, a timeout, a server error
+    or too many requests)"""
+    if isinstance(err, (requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout)):
+        return True
+    if isinstance(err, HTTPError):
+        status_code = getattr(err.response, 'status_code', None)
+    elif isinstance(err, TransportError):
+        status_code = err.status_code
+    else:
+        return False
+    return status_code is not None and (status_code == 429 or
+                                        status_code >= 500)
+
+
+def _get_rate_limiter(rate_limit):
+    """get a RateLimiter from a number of requests per second"""
+    if isinstance(rate_limit, RateLimiter):
+        return rate_limit
+    return RateLimiter(rate_limit)
+
+
 class RemoveWSA(Plugin):
     """Helper class to remove wsa tags from header in zeep XML post.
     As described by:
@@ -555,7 +690,8 @@ class DinoREST:
         "peilschaal": "lks_owo_rd"
     }
 
-    def __init__(self, query_url=None, gwo_url=None):
+    def __init__(self, query_url=None, gwo_url=None, session=None,
+                 max_retries=0, backoff_factor=1., rate_limit=None):
         """DinoREST object for getting metadata from dinoloket
 
         Parameters
@@ -564,6 +700,20 @@ class DinoREST:
             url for passing queries to, by default None
         gwo_url : str, optional
             url for getting details for dino piezometers, by default None
+        session : requests.Session, optional
+            session used for the requests, the connections of a session are
+            kept open and reused. If None a new session is created, by
+            default None
+        max_retries : int, optional
+            maximum number of retries of a request after a connection error,
+            timeout or server error, by default 0
+        backoff_factor : float, optional
+            the time in seconds before the first retry, doubled for every
+            next retry, by default 1.
+        rate_limit : float or RateLimiter, optional
+            maximum number of requests per second, a RateLimiter can be
+            shared with other objects. If None the number of requests is not
+            limited, by default None
         """
         if query_url is None:
             self.query_url = (
@@ -579,6 +729,25 @@ class DinoREST:
         else:
             self.gwo_url = gwo_url
 
+        if session is None:
+            session = requests.Session()
+        self.session = session
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = _get_rate_limiter(rate_limit)
+
+    def _request(self, method, url, **kwargs):
+        """send a request and retry it after a transient error"""
+        def request():
+            response = self.session.request(method, url, **kwargs)
+            response.raise_for_status()
+            return response
+
+        return _call_with_retry(request, max_retries=self.max_retries,
+                                backoff_factor=self.backoff_factor,
+                                retry_if=_is_transient_error,
+                                rate_limiter=self.rate_limiter)
+
     def get(self, url, query):
         """GET method
 
@@ -595,15 +764,7 @@ class DinoREST:
             response from dinoloket REST API
 
         """
-        try:
-            response = requests.get(url, params=query)
-            response.raise_for_status()
-        except HTTPError as http_err:
-            raise http_err
-        except Exception as err:
-            raise err
-        else:
-            return response
+        return self._request('GET', url, params=query)
 
     def post(self, url, json):
         """POST method
@@ -621,15 +782,7 @@ class DinoREST:
             response from dinoloket REST API
 
         """
-        try:
-            response = requests.post(url, json=json)
-            response.raise_for_status()
-        except HTTPError as http_err:
-            raise http_err
-        except Exception as err:
-            raise err
-        else:
-            return response
+        return self._request('POST', url, json=json)
 
     def query_locations_by_extent(self, extent, layer="grondwatermonitoring"):
         """Get unique locations by extent
@@ -979,14 +1132,32 @@ class DinoWSDL:
 
     """
 
-    def __init__(self, wsdl="http://www.dinoservices.nl/gwservices/gws-v11?wsdl"):
+    def __init__(self, wsdl="http://www.dinoservices.nl/gwservices/gws-v11?wsdl",
+                 session=None, max_retries=0, backoff_factor=1.,
+                 rate_limit=None):
         """Initialize DinoWSDL object that can be used to query DINO Webservice
 
         Parameters
         ----------
         wsdl : str, optional
             wsdl url, by default "http://www.dinoservices.nl/gwservices/gws-v11?wsdl"
+        session : requests.Session, optional
+            session used by the zeep transport, the connections of a session
+            are kept open and reused, by default None
+        max_retries : int, optional
+            maximum number of retries of a request after a connection error,
+            timeout or server error, by default 0
+        backoff_factor : float, optional
+            the time in seconds before the first retry, doubled for every
+            next retry, by default 1.
+        rate_limit : float or RateLimiter, optional
+            maximum number of requests per second, a RateLimiter can be
+            shared with other objects. If None the number of requests is not
+            limited, by default None
         """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = _get_rate_limiter(rate_limit)
 
         # Create some plugins, some currently unused but left here as a reminder.
         history = HistoryPlugin()
@@ -994,9 +1165,11 @@ class DinoWSDL:
         rwsa = RemoveWSA()
 
         # Configure the client
-        self.client = zeep.Client(
-            wsdl=wsdl,
-            plugins=[history, wsa, rwsa])
+        transport = None if session is None else Transport(session=session)
+        self.client = _call_with_retry(
+            zeep.Client, wsdl=wsdl, transport=transport,
+            plugins=[history, wsa, rwsa], max_retries=max_retries,
+            backoff_factor=backoff_factor, retry_if=_is_transient_error)
 
         # Set prefix
         self.client.set_ns_prefix("v11", "http://v11.ws.gws.dino.tno.nl/")
@@ -1046,10 +1219,7 @@ class DinoWSDL:
                 "END_DATE": tmax,
                 "UNIT": unit}
 
-        try:
-            r = self.client.service.findMeetreeks(**data)
-        except Exception as e:
-            raise e
+        r = self._call_service('findMeetreeks', **data)
 
         if raw_response:
             return r
@@ -1082,10 +1252,7 @@ class DinoWSDL:
         data = {"WELL_NITG_NR": location,
                 "WELL_TUBE_NR": filter_nr}
 
-        try:
-            r = self.client.service.findTechnischeGegevens(**data)
-        except Exception as e:
-            raise e
+        r = self._call_service('findTechnischeGegevens', **data)
 
         if raw_response:
             return r
@@ -1093,6 +1260,15 @@ class DinoWSDL:
             meta = self._parse_technische_gegevens(r)
             return meta
 
+    def _call_service(self, name, **data):
+        """call an operation of the webservice and retry it after a
+        transient error"""
+        return _call_with_retry(getattr(self.client.service, name), **data,
+                                max_retries=self.max_retries,
+                                backoff_factor=self.backoff_factor,
+                                retry_if=_is_transient_error,
+                                rate_limiter=self.rate_limiter)
+
     @staticmethod
     def _parse_grondwaterstand(r, column_name='stand_m_tov_nap'):
         """Parse the response from findMeetreeks
@@ -1168,7 +1344,8 @@ class DinoWSDL:
 
 
 def download_dino_groundwater(location, filternr, tmin, tmax,
-                              verbose=False, **kwargs):
+                              verbose=False, dino=None, dinorest=None,
+                              **kwargs):
     """Download measurements and metadata from a dino groundwater
     observation well
 
@@ -1183,6 +1360,12 @@ def download_dino_groundwater(location, filternr, tmin, tmax,
     tmax : str or pandas.Timestamp
         end date in format YYYY-MM-DD (will be converted if Timestamp)
     verbose :
+    dino : DinoWSDL, optional
+        client of the dino webservice, reuse a client when downloading
+        multiple observation wells. If None a new client is created.
+    dinorest : DinoREST, optional
+        client of the dino REST API, reuse a client when downloading
+        multiple observation wells. If None a new client is created.
     kwargs : key-word arguments
             these arguments are passed to dino.findMeetreeks functie
 
@@ -1196,7 +1379,8 @@ def download_dino_groundwater(location, filternr, tmin, tmax,
     filternr = "{0:03g}".format(int(filternr))
 
     # download data from dino
-    dino = DinoWSDL()
+    if dino is None:
+        dino = DinoWSDL()
 
     # measurements
     measurements = dino.findMeetreeks(location, filternr, tmin, tmax,
@@ -1206,7 +1390,8 @@ def download_dino_groundwater(location, filternr, tmin, tmax,
     #meta = dino.findTechnischeGegevens(location, filternr)
 
     # new metadata method
-    dinorest = DinoREST()
+    if dinorest is None:
+        dinorest = DinoREST()
     meta = dinorest.get_gwo_metadata(location, filternr, verbose=verbose)
 
     return measurements, meta
@@ -1289,12 +1474,38 @@ def split_extent(method, extent0, dx=1000, dy=None, **kwargs):
                 gdf = pd.concat((gdf, gdft))
 
 
+def _download_dino_obs(loc, ObsClass, tmin, tmax, unit, cache=None,
+                       **kwargs):
+    """download the observation of one filter in download_dino_within_extent,
+    kwargs are passed to ObsClass.from_dino"""
+    tmin = loc.startDate if tmin is None else tmin
+    tmax = loc.endDate if tmax is None else tmax
+
+    def fetch(tmin, tmax):
+        return ObsClass.from_dino(location=loc.locatie,
+                                  filternr=float(loc.filternr),
+                                  tmin=tmin,
+                                  tmax=tmax,
+                                  unit=unit,
+                                  **kwargs)
+
+    if cache is None:
+        return fetch(tmin, tmax)
+    key = ('dino', ObsClass.__name__, loc.locatie, f'{loc.filternr:03d}',
+           unit)
+    return cache.read(key, fetch, tmin, tmax)
+
+
 def download_dino_within_extent(extent=None, bbox=None, ObsClass=None,
                                 layer='grondwatermonitoring',
                                 tmin="1900-01-01", tmax="2040-01-01",
                                 zmin=None, zmax=None, unit="NAP",
                                 keep_all_obs=True,
                                 cache=False,
+                                n_workers=None,
+                                max_retries=3,
+                                backoff_factor=1.,
+                                rate_limit=None,
                                 verbose=False):
     """Download DINO data within a certain extent (or a bounding box)
 
@@ -1323,10 +1534,25 @@ def download_dino_within_extent(extent=None, bbox=None, ObsClass=None,
     keep_all_obs : boolean, optional
             add all observation points to the collection, even without data or
             metadata
-    cache : boolean, optional
-        if True each observation that has been downloaded is cached. Can be
-        helpful because the dino server give errors frequently. default is
-        False
+    cache : boolean, str or RemoteCache, optional
+        if True each observation that has been downloaded is cached in the
+        default RemoteCache, a str is the directory of the cache. Only the
+        periods that are not in the cache are downloaded. Can be helpful
+        because the dino server give errors frequently. default is False
+    n_workers : int, optional
+        number of threads that download observations at the same time. If
+        None the observations are downloaded one by one. The default is
+        None.
+    max_retries : int, optional
+        maximum number of retries of a request after a connection error,
+        timeout or server error. The default is 3.
+    backoff_factor : float, optional
+        the time in seconds before the first retry of a request, doubled for
+        every next retry. The default is 1.
+    rate_limit : float or RateLimiter, optional
+        maximum number of requests per second to the dino server, for all
+        threads together. If None the number of requests is not limited. The
+        default is None.
     verbose : boolean, optional
         print additional information to the screen (default is False).
 
@@ -1370,43 +1596,42 @@ def download_dino_within_extent(extent=None, bbox=None, ObsClass=None,
     if gdf_loc.empty:
         return pd.DataFrame()
 
-    # read measurements
-    obs_list = []
-    for index, loc in gdf_loc.iterrows():
-        if tmin is None:
-            tmin_t = loc.startDate
-        else:
-            tmin_t = tmin
-        if tmax is None:
-            tmax_t = loc.endDate
-        else:
-            tmax_t = tmax
-
+    cache = _get_remote_cache(cache)
+
+    # one session and one client of each service for all downloads, so the
+    # connections to the dino server are reused
+    session = requests.Session()
+    if n_workers is not None:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2,
+                                                pool_maxsize=n_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    client_kwargs = dict(session=session, max_retries=max_retries,
+                         backoff_factor=backoff_factor,
+                         rate_limit=_get_rate_limiter(rate_limit))
+    dino = DinoWSDL(**client_kwargs)
+    dinorest = DinoREST(**client_kwargs)
+
+    def download(row):
+        index, loc = row
         if verbose:
             print('reading -> {}'.format(index))
+        return _download_dino_obs(loc, ObsClass, tmin, tmax, unit, cache,
+                                  dino=dino, dinorest=dinorest)
 
-        if cache:
-            cache_dir = os.path.join(tempfile.gettempdir(), 'dino')
-            if not os.path.isdir(cache_dir):
-                os.mkdir(cache_dir)
-            fname = os.path.join(
-                cache_dir, f'{loc.locatie}-{loc.filternr:03d}' + '.pklz')
-            if os.path.isfile(fname):
-                o = pd.read_pickle(fname)
-            else:
-                o = ObsClass.from_dino(location=loc.locatie,
-                                       filternr=float(loc.filternr),
-                                       tmin=tmin_t,
-                                       tmax=tmax_t,
-                                       unit=unit)
-                o.to_pickle(fname)
-        else:  
-            o = ObsClass.from_dino(location=loc.locatie,
-                                   filternr=float(loc.filternr),
-                                   tmin=tmin_t,
-                                   tmax=tmax_t,
-                                   unit=unit)
+    # read measurements
+    try:
+        if n_workers is None:
+            downloaded = [download(row) for row in gdf_loc.iterrows()]
+        else:
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                downloaded = list(executor.map(download,
+                                               gdf_loc.iterrows()))
+    finally:
+        session.close()
 
+    obs_list = []
+    for o in downloaded:
         if o.metadata_available and (not o.empty):
             obs_list.append(o)
         elif keep_all_obs:
@@ -1512,7 +1737,7 @@ def read_dino_waterlvl_csv(fname, to_mnap=True, read_series=True, verbose=False)
     p_data = re.compile(
         r'Locatie,Peildatum,Stand \(cm t.o.v. NAP\),Bijzonderheid')
 
-    with open(fname, 'r') as f:
+    with open_file(fname, 'r') as f:
         line = f.readline()
         while line != '':
             line = f.readline()
@@ -1534,8 +1759,9 @@ def read_dino_waterlvl_csv(fname, to_mnap=True, read_series=True, verbose=False)
 def read_dino_dir(dirname, ObsClass=None,
                   subdir='Boormonsterprofiel_Geologisch booronderzoek', suffix='.txt',
                   unpackdir=None, force_unpack=False, preserve_datetime=False, verbose=False,
-                  keep_all_obs=True, **kwargs
-                  ):
+                  keep_all_obs=True, lazy=False, max_memory=None,
+                  n_workers=None, executor=None, errors='raise',
+                  parse_cache=None, **kwargs):
     '''Read Dino directory with point observations
 
     to do:
@@ -1554,7 +1780,8 @@ def read_dino_dir(dirname, ObsClass=None,
     suffix : str
         suffix of files in subdir that will be read
     unpackdir : str
-        destination directory of the unzipped file
+        destination directory of the unzipped file. If None (default) the
+        files are read from the zip file without extracting it
     force_unpack : boolean, optional
         force unpack if dst already exists
     preserve_datetime : boolean, optional
@@ -1564,46 +1791,72 @@ def read_dino_dir(dirname, ObsClass=None,
     keep_all_obs : boolean, optional
         add all observation points to the collection, even without data or
         metadata
+    lazy : boolean, optional
+        if True only the metadata is read, the measurements are read the first
+        time they are accessed. Observations without measurements are only
+        removed (keep_all_obs=False) if they have no metadata. The default is
+        False.
+    max_memory : int, optional
+        only used if lazy is True. The maximum memory in bytes that is used
+        by the measurements of the observations. The measurements of the least
+        recently used observations are removed from memory when this is
+        exceeded. If None the memory is not limited. The default is None.
+    n_workers : int, optional
+        number of worker processes used to read the files. The order of the
+        files is kept. If None (and executor is None) the files are read one
+        by one. The default is None.
+    executor : concurrent.futures.Executor, optional
+        executor used to read the files, e.g. a ProcessPoolExecutor that is
+        shared by multiple calls. The default is None.
+    errors : str, optional
+        if 'raise' an error while reading a file is raised. If 'report' the
+        file is skipped and the files that could not be read are returned as
+        well. The default is 'raise'.
+    parse_cache : str or ParseCache, optional
+        cache (or the directory of a cache) with the parsed files. Only the
+        files that are not in the cache or that changed since they were
+        cached are parsed. The default is None.
     **kwargs: dict, optional
         Extra arguments are passed to ObsClass.from_dino_file()
 
     Returns
     -------
-    obs_df : pd.DataFrame
-        collection of multiple point observations
+    obs_list : list of observations
+        observations in the directory
+    failures : dict
+        only returned if errors is 'report'. The filename and error message
+        of the files that could not be read.
 
     '''
 
-    # unzip dir
-    if dirname.endswith('.zip'):
-        zipf = dirname
-        if unpackdir is None:
-            dirname = tempfile.TemporaryDirectory().name
-        else:
-            dirname = unpackdir
-        unzip_file(zipf, dirname, force=force_unpack,
-                   preserve_datetime=preserve_datetime)
-
-    # read filenames
-    files = os.listdir(os.path.join(dirname, subdir))
-    if suffix:
-        files = [file for file in files if file.endswith(suffix)]
-
-    if not files:
-        raise FileNotFoundError('no files were found in {} that end with {}'.format(
-            os.path.join(dirname, subdir), suffix))
+    fnames = _get_dino_files(dirname, subdir, suffix, unpackdir,
+                             force_unpack, preserve_datetime)
 
     # read individual files
-    obs_list = []
-    for _, file in enumerate(files):
-        fname = os.path.join(dirname, subdir, file)
-        obs = ObsClass.from_dino(fname=fname, verbose=verbose, **kwargs)
-        if obs.metadata_available and (not obs.empty):
-            obs_list.append(obs)
-        elif keep_all_obs:
-            obs_list.append(obs)
-        else:
-            if verbose:
-                print('not added to collection -> {}'.format(fname))
-
+    if lazy:
+        cache = ObsMemoryCache(max_memory)
+        obs_metas, failures = _read_files(
+            ObsClass.from_dino, fnames, n_workers=n_workers,
+            executor=executor, errors=errors,
+            parse_cache=parse_cache, verbose=verbose,
+            read_series=False, **kwargs)
+        obs_list = []
+        for fname, obs_meta in zip(fnames, obs_metas):
+            if obs_meta is None:
+                continue
+            if not (obs_meta.metadata_available or keep_all_obs):
+                if verbose:
+                    print('not added to collection -> {}'.format(fname))
+                continue
+            loader = partial(ObsClass.from_dino, fname=fname, **kwargs)
+            obs_list.append(LazyObs(obs_meta, loader, cache))
+    else:
+        obs_list, failures = _read_files(
+            ObsClass.from_dino, fnames, n_workers=n_workers,
+            executor=executor, errors=errors,
+            parse_cache=parse_cache, verbose=verbose, **kwargs)
+        obs_list = _select_obs(obs_list, fnames, keep_all_obs, verbose)
+
+    if errors == 'report':
+        return obs_list, failures
     return obs_list
@@ -1,44 +1,107 @@
 import os
 import re
-import tempfile
-from io import StringIO
+from functools import lru_cache
+from io import StringIO, TextIOWrapper
 
 import numpy as np
 import pandas as pd
 import datetime as dt
 import requests
 
+from ..remote_cache import _get_remote_cache
+from ..util import SpatialIndex
 
-def get_stations(meteo_var='RD'):
-    """get knmi stations from json files according to variable
 
-    Parameters
-    ----------
-    meteo_var : str, optional
-        [description], by default 'RD'
-
-    Returns
-    -------
-    pandas DataFrame with stations, names and coordinates (Lat/Lon & RD)
-    """
-    
+@lru_cache(maxsize=None)
+def _read_station_file(fname):
+    """read a json file with knmi stations, only once per process"""
     dir_path = os.path.dirname(os.path.realpath(__file__))
+    return pd.read_json(os.path.join(dir_path, fname))
+
 
+@lru_cache(maxsize=None)
+def _get_station_catalogue(meteo_var='RD'):
+    """get the knmi stations that measure meteo_var and a spatial index on
+    the locations of these stations, built once per process. Do not modify
+    the returned DataFrame."""
     if meteo_var == "RD":
         fname = "../data/knmi_neerslagstation.json"
     else:
         fname = "../data/knmi_meteostation.json"
 
-    stations = pd.read_json(os.path.join(dir_path, fname))
+    stations = _read_station_file(fname)
 
     if meteo_var == 'PG':
         # in Ell wordt geen luchtdruk gemeten
-        stations.drop(377, inplace=True)
-    if meteo_var == 'EV24':
+        stations = stations.drop(377)
+    elif meteo_var == 'EV24':
         # in Woensdrecht wordt geen verdamping gemeten
-        stations.drop(340, inplace=True)
+        stations = stations.drop(340)
+
+    sindex = SpatialIndex(pd.to_numeric(stations.x),
+                          pd.to_numeric(stations.y))
+    return stations, sindex
+
+
+def _get_station_index(stations, meteo_var):
+    """get the stations and a spatial index on the stations, the index of
+    the catalogue is reused if stations is None or equal to the catalogue"""
+    catalogue, sindex = _get_station_catalogue(meteo_var)
+    if stations is None:
+        return catalogue, sindex
+    x = pd.to_numeric(stations.x)
+    y = pd.to_numeric(stations.y)
+    if not (stations.index.equals(catalogue.index) and sindex.equals(x, y)):
+        sindex = SpatialIndex(x, y)
+    return stations, sindex
+
+
+def _get_nearest_positions(x, y, stations, sindex, n=1, ignore=None):
+    """get the positions of the n nearest stations of every point, skipping
+    the stations in ignore. Returns an array of shape (npoints, n), -1 if
+    there is no station."""
+    ignored = np.zeros(len(stations), dtype=bool)
+    if ignore is not None:
+        ignored = stations.index.isin(ignore)
+    k = min(n + int(ignored.sum()), len(stations))
+    npoints = len(np.atleast_1d(x))
+    if k == 0:
+        return np.full((npoints, n), -1, dtype=int)
+
+    _, positions = sindex.nearest(x, y, k=k)
+    positions = positions.reshape(npoints, k)
+    found = positions >= 0
+    found[found] = ~ignored[positions[found]]
+
+    # move the stations that are found to the front, keeping the order
+    order = np.argsort(~found, axis=1, kind='stable')[:, :n]
+    positions = np.take_along_axis(positions, order, axis=1)
+    found = np.take_along_axis(found, order, axis=1)
+    positions[~found] = -1
+    if positions.shape[1] < n:
+        positions = np.pad(positions, ((0, 0), (0, n - positions.shape[1])),
+                           constant_values=-1)
+    return positions
+
+
+def get_stations(meteo_var='RD'):
+    """get knmi stations from json files according to variable
 
-    return stations
+    Parameters
+    ----------
+    meteo_var : str, optional
+        [description], by default 'RD'
+
+    Returns
+    -------
+    pandas DataFrame with stations, names and coordinates (Lat/Lon & RD)
+
+    Notes
+    -----
+    The json files are read once per process, a copy of the stations is
+    returned.
+    """
+    return _get_station_catalogue(meteo_var)[0].copy()
 
 
 def get_nearest_stations_xy(x, y, meteo_var, n=1, stations=None, ignore=None):
@@ -69,16 +132,14 @@ def get_nearest_stations_xy(x, y, meteo_var, n=1, stations=None, ignore=None):
 
     """
 
-    if stations is None:
-        stations = get_stations(meteo_var=meteo_var)
-    if ignore is not None:
-        stations.drop(ignore, inplace=True)
-        if stations.empty:
-            return None
-
-    d = np.sqrt((stations.x - x)**2 + (stations.y - y)**2)
+    stations, sindex = _get_station_index(stations, meteo_var)
+    positions = _get_nearest_positions(x, y, stations, sindex, n=n,
+                                       ignore=ignore)[0]
+    positions = positions[positions >= 0]
+    if len(positions) == 0 and ignore is not None:
+        return None
 
-    return d.nsmallest(n).index.to_list()
+    return stations.index[positions].to_list()
 
 
 def get_nearest_station_df(locations, xcol='x', ycol='y',
@@ -109,30 +170,19 @@ def get_nearest_station_df(locations, xcol='x', ycol='y',
         station numbers.
 
     """
-    if stations is None:
-        stations = get_stations(meteo_var=meteo_var)
-    if ignore is not None:
-        stations.drop(ignore, inplace=True)
-        if stations.empty:
-            return None
+    stations, sindex = _get_station_index(stations, meteo_var)
+    if ignore is not None and stations.index.isin(ignore).all():
+        return None
 
     xo = pd.to_numeric(locations[xcol])
-    xt = pd.to_numeric(stations.x)
     yo = pd.to_numeric(locations[ycol])
-    yt = pd.to_numeric(stations.y)
+    positions = _get_nearest_positions(xo, yo, stations, sindex,
+                                       ignore=ignore)[:, 0]
 
-    xh, xi = np.meshgrid(xt, xo)
-    yh, yi = np.meshgrid(yt, yo)
+    stns = stations.index.values[positions[positions >= 0]]
 
-    distances = pd.DataFrame(np.sqrt((xh - xi) ** 2 + (yh - yi) ** 2),
-                             index=locations.index,
-                             columns=stations.index)
+    return pd.unique(stns)
 
-    stns = distances.idxmin(axis=1).unique()
-    if np.any(np.isnan(stns)):
-        stns = stns[~np.isnan(stns)].astype(int)
-
-    return stns
 
 def get_nearest_station_grid(xmid, ymid,
                              stations=None, 
@@ -164,18 +214,77 @@ def get_nearest_station_grid(xmid, ymid,
     assumes you have a structured rectangular grid.
 
     """
-    mg = np.meshgrid(xmid, ymid)
-    
-    locations = pd.DataFrame(data={'x': mg[0].ravel(),
-                                   'y': mg[1].ravel()})
-    
-    stns = get_nearest_station_df(locations, xcol='x', ycol='y',
-                                  stations=stations, meteo_var=meteo_var, 
-                                  ignore=ignore)
+    stns, _ = get_station_grid(xmid, ymid, stations=stations,
+                               meteo_var=meteo_var, ignore=ignore)
 
     return stns
 
 
+def get_station_grid(xmid, ymid, stations=None, meteo_var="RD", ignore=None,
+                     chunksize=1000000):
+    """find the KNMI station that measures 'meteo_var' closest to every cell
+    in a grid, without creating arrays with the coordinates of all cells.
+
+    Parameters
+    ----------
+    xmid : np.array
+        x coördinates of the cell centers of your grid shape(ncol)
+    ymid : np.array
+        y coördinates of the cell centers of your grid shape(nrow)
+    stations : pd.DataFrame, optional
+        if None stations will be obtained using the get_stations function.
+        The default is None.
+    meteo_var : str
+        measurement variable e.g. 'RD' or 'EV24'
+    ignore : list, optional
+        list of stations to ignore. The default is None.
+    chunksize : int, optional
+        maximum number of cells that is queried at once. The default is
+        1000000.
+
+    Returns
+    -------
+    stns : numpy.ndarray or None
+        numbers of the stations that are the nearest station of at least one
+        cell, in the order of the cells. None if all stations are ignored.
+    station_grid : numpy.ndarray
+        integer array with shape (nrow, ncol) with the position in stns of
+        the nearest station of every cell, -1 if a cell has no station.
+
+    Notes
+    -----
+    assumes you have a structured rectangular grid.
+    """
+    stations, sindex = _get_station_index(stations, meteo_var)
+    xmid = np.atleast_1d(np.asarray(xmid, dtype=float))
+    ymid = np.atleast_1d(np.asarray(ymid, dtype=float))
+    nrow, ncol = len(ymid), len(xmid)
+    dtype = np.int16 if len(stations) < 2**15 else np.int32
+
+    # nearest station per cell as position in stations, for blocks of rows
+    positions = np.empty((nrow, ncol), dtype=dtype)
+    nrow_chunk = max(1, chunksize // max(ncol, 1))
+    for row in range(0, nrow, nrow_chunk):
+        rows = ymid[row:row + nrow_chunk]
+        x = np.tile(xmid, len(rows))
+        y = np.repeat(rows, ncol)
+        positions[row:row + len(rows)] = _get_nearest_positions(
+            x, y, stations, sindex, ignore=ignore)[:, 0].reshape(len(rows),
+                                                                 ncol)
+
+    if ignore is not None and stations.index.isin(ignore).all():
+        return None, positions
+
+    # only keep the stations that are used
+    used = pd.unique(positions.ravel())
+    used = used[used >= 0]
+    lookup = np.full(len(stations) + 1, -1, dtype=dtype)
+    lookup[used] = np.arange(len(used))
+    station_grid = lookup[positions]
+
+    return stations.index.values[used], station_grid
+
+
 def _start_end_to_datetime(start, end):
     """convert start and endtime to datetime
 
@@ -209,6 +318,10 @@ def _start_end_to_datetime(start, end):
 
     return start, end
 
+# the last date with measurements at de Bilt per day it is requested
+_LATEST_MEASUREMENT_DATE_RD_DEBILT = {}
+
+
 def _check_latest_measurement_date_RD_debilt(verbose=False):
     """ According to the website of the knmi it can take up to 3 weeks before
     precipitation data is updated. If you use the fill_missing_measurements
@@ -220,6 +333,9 @@ def _check_latest_measurement_date_RD_debilt(verbose=False):
     recent measurements, no station will have measurements for these dates.
     
     website knmi: https://www.knmi.nl/nederland-nu/klimatologie/monv/reeksen
+
+    The date is downloaded once per day, later calls on the same day return
+    the same date.
     
     Parameters
     ----------
@@ -232,9 +348,11 @@ def _check_latest_measurement_date_RD_debilt(verbose=False):
         last date with measurements at station de Bilt
 
     """
-    
+    today = pd.Timestamp.today().normalize()
+    if today in _LATEST_MEASUREMENT_DATE_RD_DEBILT:
+        return _LATEST_MEASUREMENT_DATE_RD_DEBILT[today]
+
     url = 'http://projects.knmi.nl/klimatologie/monv/reeksen/getdata_rr.cgi'
-    start = dt.datetime.now() - pd.Timedelta(21, unit='D')
     knmi_df, variables = get_knmi_daily_rainfall(url, 550, "RD", None, None, 
                                                  False, verbose=verbose)
     knmi_df = knmi_df.dropna()
@@ -242,6 +360,8 @@ def _check_latest_measurement_date_RD_debilt(verbose=False):
         raise ValueError('knmi station de Bilt has no RD measurements in the past 3 weeks.')
         
     last_measurement_date_debilt = knmi_df.index[-1]
+    _LATEST_MEASUREMENT_DATE_RD_DEBILT.clear()
+    _LATEST_MEASUREMENT_DATE_RD_DEBILT[today] = last_measurement_date_debilt
     
     if verbose:
         print(f'last measurement available at the Bilt is from'
@@ -253,7 +373,7 @@ def _check_latest_measurement_date_RD_debilt(verbose=False):
 
 def download_knmi_data(stn, meteo_var='RD', start=None, end=None, interval='daily',
                        inseason=False, raise_exceptions=True,
-                       verbose=False):
+                       verbose=False, aggregate=None):
     """download knmi data of a measurements station for certain observation
     type
 
@@ -269,18 +389,23 @@ def download_knmi_data(stn, meteo_var='RD', start=None, end=None, interval='dail
     end : str, datetime or None, optional
         end date of observations. The default is None.
     interval : str, optional
-        time interval of observations. The default is 'daily'.
+        time interval of observations, 'daily' or 'hourly'. Hourly data is
+        only available for meteorological stations. The default is 'daily'.
     inseason : bool, optional
         passed to the knmi api. The default is False.
     raise_exceptions : bool, optional
         if True you get errors when no data is returned. The default is True.
     verbose : boolean, optional
         Print additional information to the screen (default is False).
+    aggregate : str, optional
+        only used if interval is 'hourly'. If not None the hourly
+        measurements are aggregated to daily values while they are read,
+        with 'sum', 'mean', 'min' or 'max'. The default is None.
 
     Raises
     ------
     NotImplementedError
-        different time intervals and inseason data is not yet working.
+        other time intervals and inseason data is not yet working.
     ValueError
         if the data from knmi cannot not be read a ValueError is raised.
         Unless raise_exceptions is False
@@ -300,8 +425,9 @@ def download_knmi_data(stn, meteo_var='RD', start=None, end=None, interval='dail
         message = 'Interval can not be hourly for rainfall-stations'
         raise (ValueError(message))
 
-    if interval != 'daily':
-        raise NotImplementedError('only daily intervals are working now')
+    if interval != 'daily' and not interval.startswith('hour'):
+        raise NotImplementedError('only daily and hourly intervals are '
+                                  'working now')
 
     if inseason:
         raise NotImplementedError('season stuff not implemented')
@@ -321,7 +447,8 @@ def download_knmi_data(stn, meteo_var='RD', start=None, end=None, interval='dail
         if interval.startswith('hour'):
             # hourly data from meteorological stations
             url = 'http://projects.knmi.nl/klimatologie/uurgegevens/getdata_uur.cgi'
-            knmi_df = get_knmi_hourly(url, stn, meteo_var, start, end)
+            knmi_df, variables, stations = get_knmi_hourly(
+                url, stn, meteo_var, start, end, aggregate, verbose)
 
         elif meteo_var == 'RD':
             # daily data from rainfall-stations
@@ -619,8 +746,39 @@ def read_knmi_daily_meteo(f, verbose=False):
    # return knmi_series
 
 
-def get_knmi_hourly(url, stn, meteo_var, start, end):
+def get_knmi_hourly(url, stn, meteo_var, start, end, aggregate=None,
+                    verbose=False):
+    """download and read hourly knmi data, the response is streamed to the
+    parser.
+
+
+    Parameters
+    ----------
+    url : str
+        download url.
+    stn : str
+        station number.
+    meteo_var : str
+        e.g. 'RH'.
+    start : pd.TimeStamp
+        start time of observations.
+    end : pd.TimeStamp
+        end time of observations.
+    aggregate : str, optional
+        if not None the hourly measurements are aggregated to daily values,
+        see read_knmi_hourly. The default is None.
+    verbose : boolean, optional
+        Print additional information to the screen (default is False).
 
+    Returns
+    -------
+    pd.DataFrame
+        measurements.
+    variables : dictionary
+        additional information about the variables
+    stations : pd.DataFrame
+        additional data about the measurement station
+    """
     data = {
         'start': start.strftime('%Y%m%d') + '01',
         'end': end.strftime('%Y%m%d') + '24',
@@ -628,23 +786,322 @@ def get_knmi_hourly(url, stn, meteo_var, start, end):
         'stns': stn,
     }
 
-    result = requests.get(url, params=data).text
-    f = StringIO(result)
-    knmi_series = read_knmi_hourly(f)
+    f = _get_knmi_stream(url, data)
+    try:
+        knmi_df, variables, stations = read_knmi_hourly(
+            f, aggregate=aggregate, nrows=_get_hourly_nrows(start, end),
+            verbose=verbose)
+    finally:
+        f.close()
 
-    return knmi_series
+    return knmi_df[[meteo_var]], variables, stations
 
 
-def read_knmi_hourly(f):
-    raise NotImplementedError('work in progress')
-    knmi_df = pd.DataFrame()
-    return knmi_df
+def _get_knmi_stream(url, data):
+    """request knmi data and get the response as a text stream, so the
+    response is not read into memory at once"""
+    r = requests.get(url, params=data, stream=True)
+    r.raw.decode_content = True
+    return TextIOWrapper(r.raw, encoding='latin-1')
+
+
+def _get_hourly_nrows(start, end, nstns=1):
+    """get the number of hourly measurements between start and end"""
+    return nstns * ((end - start).days + 1) * 24
+
+
+def read_knmi_hourly(f, aggregate=None, chunksize=100000, nrows=None,
+                     verbose=False):
+    """read hourly knmi data of a meteorological station.
+
+
+    Parameters
+    ----------
+    f : file or str
+        file object or path of the file.
+    aggregate : str, optional
+        if not None the hourly measurements are aggregated to daily values
+        while they are read, with 'sum', 'mean', 'min' or 'max'. The
+        timestamps of the daily values are the same as those of the daily
+        meteorological data. The default is None.
+    chunksize : int, optional
+        number of lines that is parsed at once. The default is 100000.
+    nrows : int, optional
+        expected number of measurements, used to allocate the arrays with
+        the measurements. The arrays grow if there are more measurements.
+        The default is None.
+    verbose : boolean, optional
+        Print additional information to the screen (default is False).
+
+    Returns
+    -------
+    pd.DataFrame
+        measurements.
+    variables : dictionary
+        additional information about the variables
+    stations : pd.DataFrame
+        additional data about the measurement station
+    """
+    if isinstance(f, str):
+        f = open(f, encoding='latin-1')
+    f, stations = _read_station_location(f, verbose)
+    f, variables, header = _read_knmi_header(f)
+    header[0] = header[0].lstrip('# ')
+    df = _read_knmi_hourly_values(f, header, aggregate, chunksize, nrows)
+    f.close()
+
+    df, variables = _transform_variables(df, variables, verbose)
+
+    return df, variables, stations
+
+
+def read_knmi_hourly_multi(f, meteo_var, aggregate=None, chunksize=100000,
+                           nrows=None, verbose=False):
+    """read hourly knmi data of one or more meteorological stations.
+
+    Returns
+    -------
+    knmi_df : pd.DataFrame
+        measurements of meteo_var with a column per station
+    variables : dictionary
+        information about the observerd variables
+    """
+    f, variables, header = _read_knmi_header(f, verbose)
+    header[0] = header[0].lstrip('# ')
+    df = _read_knmi_hourly_values(f, header, aggregate, chunksize, nrows)
+    f.close()
+
+    df, variables = _transform_variables(df, variables, verbose)
+
+    knmi_df = df.pivot(columns='STN', values=meteo_var).astype(float)
+    knmi_df.columns = knmi_df.columns.astype(int)
+    knmi_df.columns.name = None
+
+    return knmi_df, variables
+
+
+def _read_knmi_hourly_values(f, header, aggregate=None, chunksize=100000,
+                             nrows=None):
+    """read the measurements of an hourly knmi file in chunks of lines. The
+    measurements are copied to preallocated arrays, or aggregated to daily
+    values per chunk."""
+    columns = [col for col in header if col not in ('STN', 'YYYYMMDD', 'HH')]
+    if aggregate not in (None, 'sum', 'mean', 'min', 'max'):
+        raise ValueError(f'invalid value for aggregate: {aggregate}')
+
+    size = 2**16 if nrows is None else max(nrows, 1)
+    times = np.empty(size, dtype='datetime64[ns]')
+    stns = np.empty(size, dtype=int)
+    values = np.empty((size, len(columns)))
+    n = 0
+    daily = []
+
+    reader = pd.read_csv(f, header=None, names=header, na_values='     ',
+                         skipinitialspace=True, chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk.loc[chunk.YYYYMMDD.notna()]
+        if chunk.empty:
+            continue
+        # the first chunk can contain comments, with other dtypes
+        chunk = chunk.astype({'STN': int, 'YYYYMMDD': int, 'HH': int})
+        if aggregate is not None:
+            # a day can be split over two chunks, the partial aggregates are
+            # combined after all chunks are read
+            grouped = chunk.groupby(['STN', 'YYYYMMDD'])[columns]
+            if aggregate == 'mean':
+                daily.append(pd.concat([grouped.sum(min_count=1),
+                                        grouped.count()], axis=1,
+                                       keys=['sum', 'count']))
+            elif aggregate == 'sum':
+                daily.append(grouped.sum(min_count=1))
+            else:
+                daily.append(grouped.agg(aggregate))
+            continue
+
+        m = len(chunk)
+        if n + m > size:
+            size = max(2 * size, n + m)
+            times = _grow(times, size)
+            stns = _grow(stns, size)
+            values = _grow(values, size)
+        # hour HH is the period from HH-1 to HH UT, from UT to UT+1
+        times[n:n + m] = (pd.to_datetime(chunk.YYYYMMDD,
+                                         format='%Y%m%d').values +
+                          (chunk.HH.values + 1) * np.timedelta64(1, 'h'))
+        stns[n:n + m] = chunk.STN.values
+        values[n:n + m] = chunk[columns].values
+        n += m
+
+    if aggregate is None:
+        df = pd.DataFrame(values[:n], index=pd.DatetimeIndex(times[:n]),
+                          columns=columns)
+        df.insert(0, 'STN', stns[:n])
+        return df
+
+    if not daily:
+        df = pd.DataFrame(columns=['STN'] + columns, dtype=float,
+                          index=pd.DatetimeIndex([]))
+        return df
+    daily = pd.concat(daily).groupby(level=[0, 1])
+    if aggregate == 'mean':
+        daily = daily.sum(min_count=1)
+        df = daily['sum'] / daily['count'].where(daily['count'] > 0)
+    elif aggregate == 'sum':
+        df = daily.sum(min_count=1)
+    else:
+        df = daily.agg(aggregate)
+    df = df.reset_index()
+    # the same timestamps as the daily meteorological data
+    df.index = (pd.to_datetime(df.pop('YYYYMMDD'), format='%Y%m%d') +
+                pd.to_timedelta(1, unit='d') + pd.to_timedelta(1, unit='h'))
+    df.index.name = None
+    return df
+
+
+def _grow(arr, size):
+    """get a copy of arr with a larger first dimension"""
+    new = np.empty((size,) + arr.shape[1:], dtype=arr.dtype)
+    new[:len(arr)] = arr
+    return new
+
+
+def download_knmi_data_multi(stns, meteo_var='RD', start=None, end=None,
+                             interval='daily', raise_exceptions=True,
+                             verbose=False, aggregate=None):
+    """download daily or hourly knmi data of multiple measurement stations
+    in one request
+
+
+    Parameters
+    ----------
+    stns : list of int or str
+        numbers of the measurement stations
+    meteo_var : str, optional
+        measurement type 'RD' or 'EV24'. The default is 'RD'.
+    start : str, datetime or None, optional
+        start date of observations. The default is None.
+    end : str, datetime or None, optional
+        end date of observations. The default is None.
+    interval : str, optional
+        time interval of observations, 'daily' or 'hourly'. The default is
+        'daily'.
+    raise_exceptions : bool, optional
+        if True you get errors when no data is returned. The default is True.
+    verbose : boolean, optional
+        Print additional information to the screen (default is False).
+    aggregate : str, optional
+        only used if interval is 'hourly', see download_knmi_data. The
+        default is None.
+
+    Returns
+    -------
+    knmi_df : pd.DataFrame
+        measurements with a column per station, stations without
+        measurements are not in the DataFrame.
+    variables : dictionary
+        information about the observerd variables
+    """
+    hourly = interval.startswith('hour')
+    if interval != 'daily' and not hourly:
+        raise NotImplementedError('only daily and hourly intervals are '
+                                  'working now')
+    if hourly and meteo_var == 'RD':
+        raise ValueError('Interval can not be hourly for rainfall-stations')
+
+    start, end = _start_end_to_datetime(start, end)
+
+    if hourly:
+        url = 'http://projects.knmi.nl/klimatologie/uurgegevens/getdata_uur.cgi'
+    elif meteo_var == 'RD':
+        url = 'http://projects.knmi.nl/klimatologie/monv/reeksen/getdata_rr.cgi'
+    else:
+        url = 'http://projects.knmi.nl/klimatologie/daggegevens/getdata_dag.cgi'
+    # the knmi scripts accept multiple stations separated by a colon
+    data = {
+        'start': start.strftime('%Y%m%d'),
+        'end': end.strftime('%Y%m%d'),
+        'inseason': '0',
+        'vars': meteo_var,
+        'stns': ':'.join(str(stn) for stn in stns)}
+
+    try:
+        if hourly:
+            data['start'] += '01'
+            data['end'] += '24'
+            del data['inseason']
+            f = _get_knmi_stream(url, data)
+            try:
+                knmi_df, variables = read_knmi_hourly_multi(
+                    f, meteo_var, aggregate=aggregate,
+                    nrows=_get_hourly_nrows(start, end, len(stns)),
+                    verbose=verbose)
+            finally:
+                f.close()
+        else:
+            result = requests.get(url, params=data).text
+            knmi_df, variables = read_knmi_daily_multi(StringIO(result),
+                                                       meteo_var,
+                                                       verbose=verbose)
+    except ValueError as e:
+        if verbose:
+            print(e)
+        if raise_exceptions:
+            raise ValueError(e)
+        knmi_df, variables = pd.DataFrame(), {}
+
+    return knmi_df, variables
+
+
+def read_knmi_daily_multi(f, meteo_var, verbose=False):
+    """read daily knmi data of one or more stations, from the rainfall
+    stations (meteo_var is 'RD') or the meteorological stations.
+
+    Returns
+    -------
+    knmi_df : pd.DataFrame
+        measurements of meteo_var with a column per station
+    variables : dictionary
+        information about the observerd variables
+    """
+    f, variables, header = _read_knmi_header(f, verbose)
+    header[0] = header[0].lstrip('# ')
+    df = pd.read_csv(f, header=None, names=header, na_values='     ')
+    f.close()
+
+    df = df.loc[df.YYYYMMDD.notna()]
+    df.set_index(pd.to_datetime(df.YYYYMMDD.astype(int), format='%Y%m%d'),
+                 inplace=True)
+    df = df.drop('YYYYMMDD', axis=1)
+
+    # the same corrections as for a single station, per station
+    duplicated = pd.MultiIndex.from_arrays([df.STN, df.index]).duplicated()
+    df = df.loc[~duplicated]
+    if meteo_var == 'RD':
+        # sometimes the last row is messed up, remove it
+        last = ~df.STN.duplicated(keep='last').values
+        df = df.loc[~(last & df.isna().any(axis=1).values)]
+
+        # daily precipitation amount over the period 08.00 preceding day -
+        # 08.00 UTC present day, from UT to UT+1
+        df.index = df.index + pd.to_timedelta(9, unit='h')
+    else:
+        # add a full day, from UT to UT+1
+        df.index = df.index + pd.to_timedelta(1, unit='d') + \
+            pd.to_timedelta(1, unit='h')
+
+    df, variables = _transform_variables(df, variables, verbose)
+
+    knmi_df = df.pivot(columns='STN', values=meteo_var).astype(float)
+    knmi_df.columns = knmi_df.columns.astype(int)
+    knmi_df.columns.name = None
+
+    return knmi_df, variables
 
 
 def get_knmi_timeseries_xy(x, y, meteo_var, start, end, fill_missing_obs=True,
                            interval='daily', inseason=False,
                            raise_exceptions=False,
-                           verbose=False):
+                           verbose=False, batch_size=None, aggregate=None):
 
     # get station
     stations = get_stations(meteo_var=meteo_var)
@@ -655,12 +1112,14 @@ def get_knmi_timeseries_xy(x, y, meteo_var, start, end, fill_missing_obs=True,
         knmi_df, variables, station_meta = \
             fill_missing_measurements(stn, meteo_var, start, end,
                                       interval, raise_exceptions,
-                                      verbose=verbose)
+                                      verbose=verbose,
+                                      batch_size=batch_size,
+                                      aggregate=aggregate)
     else:
         knmi_df, variables, station_meta = \
             download_knmi_data(stn, meteo_var, start, end,
                                interval, inseason, raise_exceptions,
-                               verbose=verbose)
+                               verbose=verbose, aggregate=aggregate)
 
     meta = station_meta.to_dict()
     meta.update(variables)
@@ -677,7 +1136,7 @@ def get_knmi_timeseries_xy(x, y, meteo_var, start, end, fill_missing_obs=True,
 def get_knmi_timeseries_stn(stn, meteo_var, start, end,
                             fill_missing_obs=True, interval='daily',
                             inseason=False, raise_exceptions=False,
-                            verbose=False):
+                            verbose=False, batch_size=None, aggregate=None):
     """Get a knmi time series and metadata
 
     Parameters
@@ -701,6 +1160,14 @@ def get_knmi_timeseries_stn(stn, meteo_var, start, end,
         if True you get errors when no data is returned. The default is True.
     verbose : boolean, optional
         Print additional information to the screen (default is False).
+    batch_size : int, optional
+        only used if fill_missing_obs is True. The number of stations that is
+        downloaded per request to fill missing measurements, see
+        fill_missing_measurements. The default is None.
+    aggregate : str, optional
+        only used if interval is 'hourly'. If not None the hourly
+        measurements are aggregated to daily values with 'sum', 'mean',
+        'min' or 'max', see download_knmi_data. The default is None.
 
     Returns
     -------
@@ -719,12 +1186,14 @@ def get_knmi_timeseries_stn(stn, meteo_var, start, end,
         knmi_df, variables, station_meta = \
             fill_missing_measurements(stn, meteo_var, start, end,
                                       interval, raise_exceptions,
-                                      verbose=verbose)
+                                      verbose=verbose,
+                                      batch_size=batch_size,
+                                      aggregate=aggregate)
     else:
         knmi_df, variables, station_meta = \
             download_knmi_data(stn, meteo_var, start, end,
                                interval, inseason, raise_exceptions,
-                               verbose=verbose)
+                               verbose=verbose, aggregate=aggregate)
 
     meta = station_meta.to_dict()
     meta.update(variables)
@@ -751,7 +1220,9 @@ def get_knmi_obslist(locations=None, stns=None,
                      inseason=False,
                      cache=False,
                      raise_exceptions=False,
-                     verbose=False):
+                     verbose=False,
+                     batch_size=None,
+                     aggregate=None):
     """Get a list of observations of knmi stations. Either specify a list of
     knmi stations (stns) or a dataframe with x, y coordinates (locations).
 
@@ -780,17 +1251,28 @@ def get_knmi_obslist(locations=None, stns=None,
         if True nan values in time series are filled with nearby time series.
         The default is True.
     normalize_index : bool, optional
-        if True the index is normalized.
+        if True the index of daily observations is normalized.
     interval : str, optional
-        desired time interval for observations. The default is 'daily'.
+        desired time interval for observations, 'daily' or 'hourly'. The
+        default is 'daily'.
     inseason : boolean, optional
         flag to obtain inseason data. The default is False
-    cache : boolean, optional
-        if True the observation data will be cached or read from cache.
+    cache : boolean, str or RemoteCache, optional
+        if True the observation data will be cached in or read from the
+        default RemoteCache, a str is the directory of the cache. Only the
+        periods that are not in the cache are downloaded.
     raise_exceptions : bool, optional
         if True you get errors when no data is returned. The default is True.
     verbose : boolean, optional
         Print additional information to the screen (default is False).
+    batch_size : int, optional
+        only used if fill_missing_obs is True. The number of stations that is
+        downloaded per request to fill missing measurements, see
+        fill_missing_measurements. The default is None.
+    aggregate : str, optional
+        only used if interval is 'hourly'. If not None the hourly
+        measurements are aggregated to daily values with 'sum', 'mean',
+        'min' or 'max', see download_knmi_data. The default is None.
 
     Returns
     -------
@@ -798,6 +1280,8 @@ def get_knmi_obslist(locations=None, stns=None,
         collection of multiple point observations
 
     """
+    cache = _get_remote_cache(cache)
+
     obs_list = []
     for i, meteo_var in enumerate(meteo_vars):
         start[i], end[i] = _start_end_to_datetime(start[i], end[i])
@@ -818,31 +1302,23 @@ def get_knmi_obslist(locations=None, stns=None,
             _stns = stns
         
         for stn in _stns:
-            if cache:
-                cache_dir = os.path.join(tempfile.gettempdir(), 'knmi')
-                if not os.path.isdir(cache_dir):
-                    os.mkdir(cache_dir)
-                    
-                    
-                fname = f'{stn}-{meteo_var}-{start[i].strftime("%Y%m%d")}-{end[i].strftime("%Y%m%d")}-{fill_missing_obs}' + '.pklz'
-                pklz_path = os.path.join(cache_dir, fname)
-
-                if os.path.isfile(pklz_path):
-                    if verbose:
-                        print(f'reading {fname} from cache')
-                    o = pd.read_pickle(pklz_path)
-                else:
-                    o = ObsClass.from_knmi(stn, meteo_var, start[i], end[i],
-                                           fill_missing_obs=fill_missing_obs,
-                                           verbose=verbose)
-                    o = o.loc[:, [meteo_var]]
-                    o.to_pickle(pklz_path)
-            else:
-                o = ObsClass.from_knmi(stn, meteo_var, start[i], end[i],
+            def fetch(start, end):
+                o = ObsClass.from_knmi(stn, meteo_var, start, end,
                                        fill_missing_obs=fill_missing_obs,
-                                       verbose=verbose)
-                o = o.loc[:, [meteo_var]]
-            if normalize_index:
+                                       verbose=verbose,
+                                       batch_size=batch_size,
+                                       interval=interval,
+                                       aggregate=aggregate)
+                return o.loc[:, [meteo_var]]
+
+            if cache is None:
+                o = fetch(start[i], end[i])
+            else:
+                key = ('knmi', stn, meteo_var, fill_missing_obs, interval,
+                       aggregate)
+                o = cache.read(key, fetch, start[i], end[i])
+            if normalize_index and (interval == 'daily' or
+                                    aggregate is not None):
                 o.index = o.index.normalize()
 
             obs_list.append(o)
@@ -850,7 +1326,165 @@ def get_knmi_obslist(locations=None, stns=None,
     return obs_list
 
 
-def add_missing_indices(knmi_df, stn, start, end, verbose=False):
+def _get_meteo_var(o):
+    """get the meteo variable of a knmi observation"""
+    for col in o.columns:
+        # the variables are in the meta dictionary of a downloaded observation
+        if col in o.meta:
+            return col
+    # the name of a downloaded observation starts with the variable
+    meteo_var = str(o.name).split(' ')[0]
+    if meteo_var in o.columns:
+        return meteo_var
+    raise ValueError(f'cannot determine the meteo variable of {o.name}, '
+                     'please specify meteo_var')
+
+
+def _get_update_start(o, meteo_var):
+    """get the date of the last measurement of a knmi observation"""
+    last = o[meteo_var].last_valid_index()
+    if last is None:
+        return None
+    return pd.Timestamp(last)
+
+
+def update_knmi_obslist(obs_list, meteo_var=None, end=None,
+                        fill_missing_obs=True, batch_size=50,
+                        raise_exceptions=False, verbose=False):
+    """Append the measurements after the last measurement to knmi
+    observations.
+
+    The observations are updated per meteo variable with batched requests
+    of batch_size stations. Only the period after the first last
+    measurement of the stations in a batch is downloaded.
+
+    Parameters
+    ----------
+    obs_list : list of observation.KnmiObs
+        observations of knmi stations, e.g. from get_knmi_obslist.
+    meteo_var : str, optional
+        meteo variable of the observations. If None the meteo variable is
+        determined per observation. The default is None.
+    end : str, datetime or None, optional
+        end date of the update. If None the update ends yesterday. The
+        default is None.
+    fill_missing_obs : bool, optional
+        if True nan values in the new measurements are filled with nearby
+        stations. The default is True.
+    batch_size : int, optional
+        number of stations that is downloaded per request. The default is
+        50.
+    raise_exceptions : bool, optional
+        if True you get errors when no data is returned. The default is
+        False.
+    verbose : boolean, optional
+        Print additional information to the screen (default is False).
+
+    Returns
+    -------
+    obs_list : list of observation.KnmiObs
+        the updated observations, in the same order as obs_list. An
+        observation without new measurements is returned unchanged.
+
+    Notes
+    -----
+    The downloaded periods are added to o.meta['updates'] of the updated
+    observations, with the time of the download, the first and the last
+    new measurement and the number of new measurements.
+
+    Observations without measurements are not updated, use
+    get_knmi_obslist to download them.
+    """
+    if end is None:
+        end = pd.Timestamp.today() - pd.Timedelta(1, unit='D')
+    else:
+        end = pd.to_datetime(end)
+
+    # group the positions of the observations per meteo variable
+    positions = {}
+    for i, o in enumerate(obs_list):
+        var = _get_meteo_var(o) if meteo_var is None else meteo_var
+        last = _get_update_start(o, var)
+        if last is None:
+            if verbose:
+                print(f'{o.name} has no measurements and is not updated')
+            continue
+        positions.setdefault(var, []).append((last, i))
+
+    obs_list = list(obs_list)
+    for var, var_positions in positions.items():
+        var_end = end
+        if (var == 'RD') and (var_end > (dt.datetime.now() -
+                                         pd.Timedelta(21, unit='D'))):
+            var_end = min(var_end,
+                          _check_latest_measurement_date_RD_debilt(verbose))
+
+        # stations with about the same last measurement in one request
+        var_positions.sort()
+        for j in range(0, len(var_positions), batch_size):
+            batch = var_positions[j:j + batch_size]
+            # start a day early, the knmi dates and the index of the
+            # observations can differ a day
+            start = batch[0][0].normalize() - pd.Timedelta(1, unit='D')
+            if start > var_end:
+                continue
+            stns = [obs_list[i].station for _, i in batch]
+            if verbose:
+                print(f'update {var} of stations {stns} from '
+                      f'{start.strftime("%Y-%m-%d")}')
+            knmi_df, variables = download_knmi_data_multi(
+                stns, var, start=start, end=var_end,
+                raise_exceptions=raise_exceptions, verbose=verbose)
+
+            for last, i in batch:
+                obs_list[i] = _append_knmi_measurements(
+                    obs_list[i], knmi_df, var, last, start, var_end,
+                    fill_missing_obs, batch_size, raise_exceptions, verbose)
+
+    return obs_list
+
+
+def _append_knmi_measurements(o, knmi_df, meteo_var, last, start, end,
+                              fill_missing_obs, batch_size,
+                              raise_exceptions, verbose):
+    """append the measurements in knmi_df after last to a knmi observation"""
+    stn = o.station
+    if stn in knmi_df.columns:
+        new = knmi_df[[stn]].rename(columns={stn: meteo_var})
+    else:
+        new = pd.DataFrame(columns=[meteo_var], index=pd.DatetimeIndex([]),
+                           dtype=float)
+
+    if fill_missing_obs and new[meteo_var].isna().any():
+        new = _fill_missing_measurements_batch(
+            new, stn, meteo_var, start, end, [stn], batch_size,
+            raise_exceptions=raise_exceptions, verbose=verbose)
+
+    index = o.index
+    if len(index) and (index == index.normalize()).all():
+        new.index = new.index.normalize()
+    new = new.loc[new.index > last]
+    # measurements that are not available yet are downloaded next time
+    last_new = new[meteo_var].last_valid_index()
+    if last_new is None:
+        return o
+    new = new.loc[:last_new]
+
+    # the new measurements replace the missing values after last
+    data = pd.concat([o.loc[o.index <= last], new])
+    meta = dict(o.meta)
+    meta['updates'] = list(meta.get('updates', [])) + [{
+        'downloaded': pd.Timestamp.now().isoformat(),
+        'start': new.index[0].isoformat(),
+        'end': new.index[-1].isoformat(),
+        'n': len(new)}]
+    attrs = {att: getattr(o, att) for att in o._metadata if att != 'meta'}
+    if verbose:
+        print(f'{len(new)} measurements added to {o.name}')
+    return o.__class__(data, meta=meta, **attrs)
+
+
+def add_missing_indices(knmi_df, stn, start, end, verbose=False, freq='D'):
     """when downloading KNMI data you don't always get a DataFrame with the
     periods that you provided in your request. Thus the index does not cover
     the complete period that you are interested in. This function adds the
@@ -870,6 +1504,9 @@ def add_missing_indices(knmi_df, stn, start, end, verbose=False):
         end time of observations.
     verbose : boolean, optional
         Print additional information to the screen (default is False).
+    freq : str, optional
+        frequency of the measurements, 'D' for daily and 'H' for hourly
+        measurements. The default is 'D'.
 
     Returns
     -------
@@ -900,7 +1537,7 @@ def add_missing_indices(knmi_df, stn, start, end, verbose=False):
                 f'station {stn} has no measurements after {knmi_df.index[-1]}')
 
     # add missing indices
-    new_index = pd.date_range(new_start, new_end, freq='D')
+    new_index = pd.date_range(new_start, new_end, freq=freq)
     knmi_df = knmi_df.reindex(new_index)
 
     return knmi_df
@@ -908,7 +1545,8 @@ def add_missing_indices(knmi_df, stn, start, end, verbose=False):
 
 def fill_missing_measurements(stn, meteo_var='RD', start=None, end=None,
                               interval='daily',
-                              raise_exceptions=False, verbose=False):
+                              raise_exceptions=False, verbose=False,
+                              batch_size=None, aggregate=None):
     """fill missing measurements in knmi data
 
 
@@ -928,6 +1566,16 @@ def fill_missing_measurements(stn, meteo_var='RD', start=None, end=None,
         if True you get errors when no data is returned. The default is True.
     verbose : boolean, optional
         Print additional information to the screen (default is False).
+    batch_size : int, optional
+        if None the nearest stations are downloaded one at a time until all
+        missing measurements are filled. Otherwise the batch_size nearest
+        stations are downloaded in one request and the missing measurements
+        are filled with the nearest station that has a measurement. The
+        default is None.
+    aggregate : str, optional
+        only used if interval is 'hourly'. If not None the hourly
+        measurements are aggregated to daily values with 'sum', 'mean',
+        'min' or 'max', see download_knmi_data. The default is None.
 
     Returns
     -------
@@ -958,7 +1606,7 @@ def fill_missing_measurements(stn, meteo_var='RD', start=None, end=None,
                            end=end, interval=interval,
                            inseason=False,
                            raise_exceptions=raise_exceptions,
-                           verbose=verbose)
+                           verbose=verbose, aggregate=aggregate)
 
     # if the first station cannot be read, read another station as the first
     ignore = [stn]
@@ -973,17 +1621,26 @@ def fill_missing_measurements(stn, meteo_var='RD', start=None, end=None,
                                end=end, interval=interval,
                                inseason=False,
                                raise_exceptions=raise_exceptions,
-                               verbose=verbose)
+                               verbose=verbose, aggregate=aggregate)
         ignore.append(stn)
 
     # find missing values
-    knmi_df = add_missing_indices(knmi_df, stn, start, end, verbose)
+    freq = 'H' if interval.startswith('hour') and aggregate is None else 'D'
+    knmi_df = add_missing_indices(knmi_df, stn, start, end, verbose,
+                                  freq=freq)
 
     missing = knmi_df[meteo_var].isna()
     if verbose:
         print(f'station {stn} has {missing.sum()} missing measurements')
 
     # fill missing values
+    if batch_size is not None:
+        knmi_df = _fill_missing_measurements_batch(
+            knmi_df, stn, meteo_var, start, end, ignore, batch_size,
+            interval=interval, raise_exceptions=raise_exceptions,
+            verbose=verbose, aggregate=aggregate)
+        return knmi_df, variables, station_meta
+
     while np.any(missing) and not np.all(missing):
         stn_comp = get_nearest_station_df(
             stations.loc[[stn]], meteo_var=meteo_var, ignore=ignore)
@@ -1004,7 +1661,7 @@ def fill_missing_measurements(stn, meteo_var='RD', start=None, end=None,
                                interval=interval,
                                inseason=False,
                                raise_exceptions=raise_exceptions,
-                               verbose=verbose)
+                               verbose=verbose, aggregate=aggregate)
 
         if knmi_df_comp.empty:
             if verbose:
@@ -1027,3 +1684,49 @@ def fill_missing_measurements(stn, meteo_var='RD', start=None, end=None,
         ignore.append(stn_comp)
 
     return knmi_df, variables, station_meta
+
+
+def _fill_missing_measurements_batch(knmi_df, stn, meteo_var, start, end,
+                                     ignore, batch_size, interval='daily',
+                                     raise_exceptions=False, verbose=False,
+                                     aggregate=None):
+    """fill the missing measurements of station stn with the nearest
+    stations, downloading batch_size stations per request"""
+    catalogue, sindex = _get_station_catalogue(meteo_var)
+    x, y = catalogue.loc[stn, 'x'], catalogue.loc[stn, 'y']
+    ignore = list(ignore)
+
+    missing = knmi_df[meteo_var].isna().values
+    while missing.any() and not missing.all():
+        stns_comp = get_nearest_stations_xy(x, y, meteo_var, n=batch_size,
+                                            ignore=ignore)
+        if not stns_comp:
+            if verbose:
+                print('could not fill all missing measurements there are '
+                      'no stations left to check')
+            break
+        if verbose:
+            print(f'trying to fill {missing.sum()} '
+                  f'measurements with stations {stns_comp}')
+        knmi_df_comp, _ = download_knmi_data_multi(
+            stns_comp, meteo_var, start=start, end=end, interval=interval,
+            raise_exceptions=raise_exceptions, verbose=verbose,
+            aggregate=aggregate)
+        ignore.extend(stns_comp)
+
+        # the columns in order of distance, stations that could not be
+        # downloaded only contain nan
+        values = knmi_df_comp.reindex(index=knmi_df.index,
+                                      columns=stns_comp).values
+        available = ~np.isnan(values)
+        nearest = available.argmax(axis=1)
+        fill = missing & available.any(axis=1)
+        if fill.any():
+            rows = np.nonzero(fill)[0]
+            knmi_df.loc[fill, meteo_var] = values[rows, nearest[rows]]
+            # add source station number
+            knmi_df.loc[fill, 'station_opvulwaarde'] = np.array(
+                [str(s) for s in stns_comp], dtype=object)[nearest[rows]]
+        missing = knmi_df[meteo_var].isna().values
+
+    return knmi_df
@@ -0,0 +1,98 @@
+"""
+module to write and read an ObsCollection to and from a directory with
+memory-mapped arrays.
+
+The measurements are stored in the arrays of a ColumnarStore (one .npy file
+with the timestamps, one with the values and one with the offsets per
+observation). The collection table and the attributes of the observations
+are stored in a json file. When reading, the .npy files are memory-mapped
+and the observations are views on the mapped files, so the measurements are
+not copied into memory. Multiple processes that read the same directory
+share one copy of the data through the page cache of the operating system.
+
+"""
+import json
+import os
+
+import numpy as np
+
+from ..columnar import ColumnarStore
+from .io_parquet import (_collection_from_dict, _collection_to_dict,
+                         _get_obs_class, _loads, _obs_to_dict,
+                         _to_json_value)
+
+_COLLECTION_FILE = 'collection.json'
+
+
+def write_memmap(oc, dirname, columns=None):
+    """write an ObsCollection to a directory with arrays that can be
+    memory-mapped.
+
+    Parameters
+    ----------
+    oc : ObsCollection
+        collection of observations with a sorted DatetimeIndex.
+    dirname : str
+        directory, created if it does not exist.
+    columns : list of str, optional
+        the columns that are stored. If None all numeric columns of the
+        observations are stored. Other columns are not written. The default
+        is None.
+    """
+    # use the existing store if the observations are views on it
+    positions = oc._get_store_positions()
+    if (columns is None and positions is not None and
+            len(positions) == len(oc._store) and
+            (positions == np.arange(len(positions))).all()):
+        store = oc._store
+    else:
+        store = ColumnarStore.from_obs_list(list(oc.obs.values), columns)
+
+    store.save(dirname)
+
+    info = _collection_to_dict(oc)
+    info['observations'] = [_obs_to_dict(o) for o in oc.obs.values]
+    with open(os.path.join(dirname, _COLLECTION_FILE), 'w') as fo:
+        json.dump(info, fo, default=_to_json_value)
+
+
+def read_memmap(dirname, mmap_mode='r'):
+    """read an ObsCollection from a directory written with write_memmap.
+
+    Parameters
+    ----------
+    dirname : str
+        directory written with write_memmap.
+    mmap_mode : str or None, optional
+        the mode to memory-map the arrays, see numpy.load. With 'r' the
+        measurements are read-only, with 'c' changes are kept in memory and
+        not written to disk. If None the arrays are read into memory. The
+        default is 'r'.
+
+    Returns
+    -------
+    obs_df : pandas.DataFrame
+        collection table with an obs column.
+    name : str
+        name of the collection
+    meta : dict
+        meta dictionary of the collection
+    store : ColumnarStore
+        the store with the (memory-mapped) measurements
+    """
+    with open(os.path.join(dirname, _COLLECTION_FILE)) as fo:
+        info = _loads(fo.read())
+    obs_df, meta = _collection_from_dict(info)
+
+    obs_list = []
+    for r in info['observations']:
+        ObsClass = _get_obs_class(r['obs_class'])
+        obs_list.append(ObsClass(meta=r['meta'], **r['attrs']))
+    store = ColumnarStore.load(dirname, obs_list, mmap_mode=mmap_mode)
+
+    obs_arr = np.empty(len(store), dtype=object)
+    for i, o in enumerate(store.obs_list):
+        obs_arr[i] = o
+    obs_df.insert(info['collection']['obs_loc'], 'obs', obs_arr)
+
+    return obs_df, info['name'], meta, store
@@ -0,0 +1,339 @@
+"""
+module to write and read an ObsCollection to and from a single parquet file.
+
+The measurements of all observations are stored in long format in one table
+with an 'obs_id' column, a 'time' column and the union of the columns of all
+observations. The table is sorted by the name of the observations and by
+time, so every row group contains the measurements of a few neighbouring
+observations. The collection table (without the obs column) and the
+attributes and meta dictionary of every observation are stored as json in
+the metadata of the parquet file.
+
+When reading, the selection on names and extent is done on the metadata and
+the selection on obs_id and time is passed on to pyarrow. Row groups without
+selected observations or without measurements in the period are skipped
+using the statistics in the parquet file.
+
+"""
+import datetime as dt
+import json
+
+import numpy as np
+import pandas as pd
+
+from .. import observation
+from ..columnar import _to_datetime64
+
+_METADATA_KEY = b'hydropandas'
+
+
+# the key of the type of values that are stored with a type tag in json
+_TYPE_KEY = '__hydropandas_type__'
+
+
+def _to_json_value(val):
+    """convert values that are not supported by json. Times, time deltas,
+    arrays and sets are stored as a dictionary with a type tag, see
+    _from_json_value. Classes are stored by their name.
+
+    Raises
+    ------
+    TypeError
+        if the value cannot be stored in json.
+    """
+    if val is pd.NaT:
+        return {_TYPE_KEY: 'Timestamp', 'value': None}
+    if isinstance(val, (pd.Timestamp, dt.datetime, np.datetime64)):
+        return {_TYPE_KEY: 'Timestamp',
+                'value': pd.Timestamp(val).isoformat()}
+    if isinstance(val, dt.date):
+        return {_TYPE_KEY: 'date', 'value': val.isoformat()}
+    if isinstance(val, (pd.Timedelta, dt.timedelta, np.timedelta64)):
+        return {_TYPE_KEY: 'Timedelta',
+                'value': pd.Timedelta(val).isoformat()}
+    if isinstance(val, np.generic):
+        return val.item()
+    if isinstance(val, np.ndarray):
+        return {_TYPE_KEY: 'ndarray', 'dtype': val.dtype.str,
+                'value': val.tolist()}
+    if isinstance(val, (set, frozenset)):
+        return {_TYPE_KEY: 'set', 'value': list(val)}
+    if isinstance(val, type):
+        return val.__name__
+    raise TypeError('{} of type {} cannot be stored in the metadata'.format(
+        val, type(val).__name__))
+
+
+def _from_json_value(d):
+    """convert a dictionary with a type tag created by _to_json_value back
+    to the value, used as object_hook of json.loads"""
+    kind = d.get(_TYPE_KEY)
+    if kind is None:
+        return d
+    if kind == 'Timestamp':
+        return pd.Timestamp(d['value']) if d['value'] else pd.NaT
+    if kind == 'date':
+        return dt.date.fromisoformat(d['value'])
+    if kind == 'Timedelta':
+        return pd.Timedelta(d['value'])
+    if kind == 'ndarray':
+        return np.array(d['value'], dtype=d['dtype'])
+    if kind == 'set':
+        return set(d['value'])
+    raise ValueError(f'unknown type {kind} in the metadata')
+
+
+def _loads(s):
+    """read json created with _to_json_value"""
+    return json.loads(s, object_hook=_from_json_value)
+
+
+def _get_obs_class(name):
+    """get the observation class from its name"""
+    ObsClass = getattr(observation, name, None)
+    if not isinstance(ObsClass, type):
+        raise ValueError(f'unknown observation type {name}')
+    return ObsClass
+
+
+def _obs_to_dict(o):
+    """get the class, attributes and meta dictionary of an observation"""
+    return {'obs_class': type(o).__name__,
+            'attrs': {att: getattr(o, att) for att in o._metadata
+                      if att != 'meta'},
+            'meta': o.meta}
+
+
+def _collection_to_dict(oc):
+    """get the name, meta and collection table (without the obs column) of
+    an ObsCollection as a dictionary that can be stored as json"""
+    collection = pd.DataFrame(oc.drop(columns='obs'))
+    collection.columns = [str(col) for col in collection.columns]
+    return {'name': oc.name,
+            'meta': oc.meta,
+            'collection': {'index': collection.index.tolist(),
+                           'index_name': collection.index.name,
+                           'columns': collection.columns.tolist(),
+                           'data': collection.values.tolist(),
+                           'obs_loc': oc.columns.get_loc('obs')}}
+
+
+def _collection_from_dict(info):
+    """get the collection table (without the obs column) and the meta
+    dictionary from a dictionary created with _collection_to_dict"""
+    collection = info['collection']
+    obs_df = pd.DataFrame(collection['data'],
+                          index=pd.Index(collection['index'],
+                                         name=collection['index_name']),
+                          columns=collection['columns'])
+
+    meta = info['meta']
+    if isinstance(meta.get('type'), str):
+        try:
+            meta['type'] = _get_obs_class(meta['type'])
+        except ValueError:
+            pass
+
+    return obs_df, meta
+
+
+def _to_arrow_table(data, info):
+    """convert a DataFrame to an arrow table, with info stored as json in the
+    metadata of the table"""
+    import pyarrow as pa
+
+    # arrow cannot store columns with mixed types, store these as strings
+    for col in data.columns:
+        if data[col].dtype == object:
+            notna = data[col].notna()
+            data[col] = data[col].where(~notna, data[col].astype(str))
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_METADATA_KEY] = json.dumps(info, default=_to_json_value)
+    return table.replace_schema_metadata(metadata)
+
+
+def write_parquet(oc, fname, row_group_size=100000, compression='snappy'):
+    """write an ObsCollection to a single parquet file.
+
+    Parameters
+    ----------
+    oc : ObsCollection
+        collection of observations with a DatetimeIndex.
+    fname : str
+        name of the parquet file.
+    row_group_size : int, optional
+        maximum number of measurements in a row group. Smaller row groups
+        make reading a selection faster and reading everything slower. The
+        default is 100000.
+    compression : str, optional
+        compression of the parquet file. The default is 'snappy'.
+    """
+    import pyarrow.parquet as pq
+
+    # sort by name so row groups contain neighbouring observations
+    order = np.argsort(oc.index.astype(str).values, kind='stable')
+
+    records = []
+    frames = []
+    for obs_id, pos in enumerate(order):
+        o = oc.obs.values[pos]
+        if 'obs_id' in o.columns or 'time' in o.columns:
+            raise ValueError(f"{o.name} has a column named 'obs_id' or "
+                             "'time', these names are reserved")
+        if not (o.empty or isinstance(o.index, pd.DatetimeIndex)):
+            raise ValueError(f'{o.name} has no DatetimeIndex')
+
+        record = _obs_to_dict(o)
+        record.update({
+            'position': int(pos),
+            'index_name': o.index.name,
+            'dtypes': {str(col): str(dtype) for col, dtype in
+                       o.dtypes.items()},
+            'columns': [str(col) for col in o.columns]})
+        records.append(record)
+
+        df = pd.DataFrame(o.rename_axis('time').reset_index())
+        df.columns = [str(col) for col in df.columns]
+        df.insert(0, 'obs_id', obs_id)
+        frames.append(df)
+
+    data = pd.concat(frames, ignore_index=True, sort=False)
+    if data.empty:
+        data = pd.DataFrame({'obs_id': pd.Series(dtype=np.int64),
+                             'time': pd.Series(dtype='datetime64[ns]')})
+    data['obs_id'] = data['obs_id'].astype(np.int64)
+
+    info = _collection_to_dict(oc)
+    info['observations'] = records
+
+    table = _to_arrow_table(data, info)
+    pq.write_table(table, fname, row_group_size=row_group_size,
+                   compression=compression)
+
+
+def read_parquet_metadata(fname):
+    """read the collection table and the attributes of the observations
+    from a parquet file written with write_parquet, without reading the
+    measurements.
+
+    Parameters
+    ----------
+    fname : str
+        name of the parquet file.
+
+    Returns
+    -------
+    dict
+        with the name, meta, collection table and observation records
+    """
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(fname).metadata
+    if metadata is None or _METADATA_KEY not in metadata:
+        raise ValueError(f'{fname} is not written by hydropandas')
+
+    return _loads(metadata[_METADATA_KEY])
+
+
+def read_parquet(fname, names=None, extent=None, tmin=None, tmax=None,
+                 columns=None):
+    """read (a selection of) an ObsCollection from a parquet file written
+    with write_parquet.
+
+    Parameters
+    ----------
+    fname : str
+        name of the parquet file.
+    names : list of str, optional
+        only read the observations with these names. The default is None.
+    extent : list, tuple or numpy-array, optional
+        only read the observations within this extent
+        [xmin, xmax, ymin, ymax]. The default is None.
+    tmin : str or datetime, optional
+        only read the measurements at or after tmin. The default is None.
+    tmax : str or datetime, optional
+        only read the measurements at or before tmax. The default is None.
+    columns : list of str, optional
+        only read these columns of the observations. The default is None.
+
+    Returns
+    -------
+    obs_df : pandas.DataFrame
+        collection table with an obs column.
+    name : str
+        name of the collection
+    meta : dict
+        meta dictionary of the collection
+    """
+    import pyarrow.parquet as pq
+
+    info = read_parquet_metadata(fname)
+    records = info['observations']
+    obs_df, meta = _collection_from_dict(info)
+
+    # select observations using the metadata
+    positions = np.array([r['position'] for r in records], dtype=int)
+    obs_ids = np.arange(len(records))
+    selected = np.ones(len(records), dtype=bool)
+    if names is not None:
+        selected &= obs_df.index.isin(names)[positions]
+    if extent is not None:
+        x = np.array([r['attrs'].get('x', np.nan) for r in records],
+                     dtype=float)
+        y = np.array([r['attrs'].get('y', np.nan) for r in records],
+                     dtype=float)
+        selected &= ((x > extent[0]) & (x < extent[1]) &
+                     (y > extent[2]) & (y < extent[3]))
+    obs_ids = obs_ids[selected]
+
+    # read measurements, only the row groups with a selection are read
+    filters = [('obs_id', 'in', obs_ids.tolist())]
+    if tmin is not None:
+        filters.append(('time', '>=',
+                        pd.Timestamp(_to_datetime64(tmin, 'left'))))
+    if tmax is not None:
+        filters.append(('time', '<=',
+                        pd.Timestamp(_to_datetime64(tmax, 'right'))))
+    if columns is not None:
+        columns = ['obs_id', 'time'] + list(columns)
+    if len(obs_ids) > 0:
+        data = pq.read_table(fname, columns=columns,
+                             filters=filters).to_pandas()
+    else:
+        data = pd.DataFrame({'obs_id': pd.Series(dtype=np.int64),
+                             'time': pd.Series(dtype='datetime64[ns]')})
+
+    # the data is sorted by obs_id
+    obs_id_data = data['obs_id'].values
+    starts = np.searchsorted(obs_id_data, obs_ids, 'left')
+    ends = np.searchsorted(obs_id_data, obs_ids, 'right')
+    data = data.drop(columns='obs_id').set_index('time')
+
+    obs_list = []
+    for obs_id, start, end in zip(obs_ids, starts, ends):
+        r = records[obs_id]
+        ObsClass = _get_obs_class(r['obs_class'])
+        if not r['columns']:
+            # observation without data
+            obs_list.append(ObsClass(meta=r['meta'], **r['attrs']))
+            continue
+        cols = [col for col in r['columns'] if col in data.columns]
+        df = data.iloc[start:end][cols]
+        dtypes = {col: r['dtypes'][col] for col in cols}
+        try:
+            df = df.astype(dtypes)
+        except (TypeError, ValueError):
+            pass
+        df.index.name = r['index_name']
+        obs_list.append(ObsClass(df, meta=r['meta'], **r['attrs']))
+
+    obs_arr = np.empty(len(obs_list), dtype=object)
+    for i, o in enumerate(obs_list):
+        obs_arr[i] = o
+    obs_df = obs_df.iloc[positions[selected]]
+    obs_df.insert(info['collection']['obs_loc'], 'obs', obs_arr)
+    obs_df = obs_df.iloc[np.argsort(positions[selected], kind='stable')]
+
+    return obs_df, info['name'], meta
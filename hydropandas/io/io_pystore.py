@@ -26,11 +26,13 @@ A pystore with an ObsCollection has 3 layers:
 """
 
 import os
+from functools import partial
 
 import pandas as pd
 import pystore
 from tqdm import tqdm
 
+from ..lazy import LazyObs, ObsMemoryCache
 from ..obs_collection import ObsCollection
 from ..observation import GroundwaterObs
 
@@ -174,6 +176,89 @@ def store_to_obslist(store, ObsClass=GroundwaterObs, collection_names=None,
     return obs_list
 
 
+def _read_item(pystore_path, storename, collection, item, ObsClass,
+               nameby="item"):
+    """read a single item from a pystore as an ObsClass object"""
+    set_pystore_path(pystore_path)
+    store = pystore.store(storename)
+    item = store.collection(collection).item(item)
+    return item_to_obs(item, ObsClass, nameby=nameby)
+
+
+def store_to_lazy_obslist(storename, pystore_path, ObsClass=GroundwaterObs,
+                          collection_names=None, item_names=None,
+                          nameby="item", cache=None, verbose=True):
+    """read the metadata of the items in a pystore, return a list of LazyObs
+    objects. The data of an item is read the first time it is accessed.
+
+    Parameters
+    ----------
+    storename : str
+        name of the store
+    pystore_path : str
+        path in which stores are stored
+    ObsClass : type of Obs
+        type of observation DataFrames, by default GroundwaterObs
+    collection_names : list of str, optional
+        collection names that are read, if None all collections are read.
+    item_names : list of str, optional
+        item (Observation) names that will be extracted from the store
+        the other items (Observations) will be ignored. if None all items
+        are read.
+    nameby : str
+        pick whether obs are named by collection or item name
+    cache : lazy.ObsMemoryCache, optional
+        memory cache that is shared by the observations. If None the data is
+        never removed from memory. The default is None.
+
+    Returns
+    -------
+    list : list of LazyObs
+        list of observations of which only the metadata is read
+    """
+    set_pystore_path(pystore_path)
+    store = pystore.store(storename)
+    if collection_names is None:
+        collection_names = store.collections
+
+    obs_list = []
+    for coll in collection_names:
+        if coll not in store.collections:
+            if verbose:
+                print("Not in store -> {0}".format(coll))
+            continue
+        c = store.collection(coll)
+        if item_names is None:
+            items = c.items
+        else:
+            items = set(item_names) & set(c.items)
+        for i in items:
+            metadata = pystore.utils.read_metadata(c._item_path(i))
+            if metadata is None:
+                if verbose:
+                    print("Skipped -> {0}: {1}".format(coll, i))
+                continue
+            if nameby == "item":
+                name = i
+            elif nameby == "collection":
+                name = coll
+            elif nameby == "both":
+                name = coll + "__" + i
+            else:
+                raise ValueError(
+                    "'{}' is not a valid option for 'nameby'".format(nameby))
+            metadata["name"] = name
+
+            obs_attr_dic = {attr: metadata[attr] for attr in
+                            ObsClass._metadata if attr in metadata.keys()}
+            obs_meta = ObsClass(**obs_attr_dic, meta=metadata)
+            loader = partial(_read_item, pystore_path, storename, coll, i,
+                             ObsClass, nameby=nameby)
+            obs_list.append(LazyObs(obs_meta, loader, cache))
+
+    return obs_list
+
+
 def read_store_metadata(store, items='all', verbose=False):
     """read only metadata from pystore
 
@@ -246,7 +331,8 @@ def pystore_obslist_to_obscollection(obs_list, name="obs_coll"):
 def read_pystore(storename, pystore_path,
                  ObsClass, extent=None, collection_names=None,
                  item_names=None, nameby="item",
-                 read_series=True, verbose=True, progressbar=False):
+                 read_series=True, verbose=True, progressbar=False,
+                 lazy=False, max_memory=None):
     # set path
     set_pystore_path(pystore_path)
 
@@ -264,7 +350,15 @@ def read_pystore(storename, pystore_path,
         item_names = obs_df[(obs_df.x > extent[0]) & (obs_df.x < extent[1]) & (
             obs_df.y > extent[2]) & (obs_df.y < extent[3])].index
 
-    if read_series:
+    if lazy:
+        return store_to_lazy_obslist(storename, pystore_path,
+                                     ObsClass=ObsClass,
+                                     collection_names=collection_names,
+                                     item_names=item_names,
+                                     nameby=nameby,
+                                     cache=ObsMemoryCache(max_memory),
+                                     verbose=verbose)
+    elif read_series:
         obs_list = store_to_obslist(
             storename,
             ObsClass=ObsClass,
@@ -1,12 +1,13 @@
 
 import os
-import zipfile
 
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
 from pyproj import Proj, transform
 
+from ..util import list_zip_files, open_file
+
 
 def read_waterinfo_file(path_to_file, return_metadata=False):
     """
@@ -30,23 +31,23 @@ def read_waterinfo_file(path_to_file, return_metadata=False):
     name = os.path.splitext(os.path.basename(path_to_file))[0]
 
     if path_to_file.endswith(".csv"):
-        f = path_to_file
+        fname = path_to_file
     elif path_to_file.endswith(".zip"):
-        zf = zipfile.ZipFile(path_to_file)
-        f = zf.open('{}.csv'.format(name))
+        fname = os.path.join(path_to_file, '{}.csv'.format(name))
     else:
         raise NotImplementedError("File type '{}' not supported!".format(
             os.path.splitext(path_to_file)[-1]))
 
     # read data
-    df = pd.read_csv(f,
-                     sep=';',
-                     decimal=',',
-                     encoding="ISO-8859-1",
-                     parse_dates=[['WAARNEMINGDATUM', 'WAARNEMINGTIJD']],
-                     dayfirst=True,
-                     infer_datetime_format=True,
-                     index_col='WAARNEMINGDATUM_WAARNEMINGTIJD')
+    with open_file(fname, 'rb') as f:
+        df = pd.read_csv(f,
+                         sep=';',
+                         decimal=',',
+                         encoding="ISO-8859-1",
+                         parse_dates=[['WAARNEMINGDATUM', 'WAARNEMINGTIJD']],
+                         dayfirst=True,
+                         infer_datetime_format=True,
+                         index_col='WAARNEMINGDATUM_WAARNEMINGTIJD')
 
     # do some conversions
     df.loc[df['NUMERIEKEWAARDE'] ==
@@ -94,13 +95,21 @@ def read_waterinfo_obs(file_or_dir, ObsClass, progressbar=False):
 
     """
 
+    # zip file with one or more waterinfo files (csvs or zips)
+    if file_or_dir.endswith(".zip"):
+        files = list_zip_files(file_or_dir, ext='.csv')
     # Waterinfo file
-    if os.path.isfile(file_or_dir):
+    elif os.path.isfile(file_or_dir):
         files = [file_or_dir]
     # directory with waterinfo files (zips or csvs)
     elif os.path.isdir(file_or_dir):
-        files = [os.path.join(file_or_dir, f)
-                 for f in sorted(os.listdir(file_or_dir))]
+        files = []
+        for f in sorted(os.listdir(file_or_dir)):
+            if f.endswith(".zip"):
+                files.extend(list_zip_files(os.path.join(file_or_dir, f),
+                                            ext='.csv'))
+            else:
+                files.append(os.path.join(file_or_dir, f))
     else:
         raise NotImplementedError("Provide path to file or directory!")
 
@@ -1,9 +1,12 @@
 import os
+from functools import partial
 
 import numpy as np
 import pandas as pd
 
-from ..util import get_files
+from ..lazy import LazyObs, ObsMemoryCache
+from ..parse_cache import ParseCache
+from ..util import get_files, open_file
 
 
 def _read_wiski_header(f, header_sep=":", header_identifier='#',
@@ -41,7 +44,7 @@ def read_wiski_file(fname, sep=";", header_sep=None, header_identifier='#',
         end_header_str = None
 
     # read header
-    with open(fname, "r") as f:
+    with open_file(fname, "r") as f:
         if header_sep is None:
             line, header = _read_wiski_header(f, end_header_str=end_header_str,
                                               header_identifier=header_identifier)
@@ -109,10 +112,12 @@ def read_wiski_file(fname, sep=";", header_sep=None, header_identifier='#',
 
 def read_wiski_dir(dirname, ObsClass=None, suffix=".csv",
                    unpackdir=None, force_unpack=False, preserve_datetime=False,
-                   keep_all_obs=True, verbose=True, **kwargs):
+                   keep_all_obs=True, verbose=True, lazy=False,
+                   max_memory=None, parse_cache=None, **kwargs):
 
     # get files
     dirname, unzip_fnames = get_files(dirname, ext=suffix,
+                                      unpackdir=unpackdir,
                                       force_unpack=force_unpack,
                                       preserve_datetime=preserve_datetime)
 
@@ -120,13 +125,30 @@ def read_wiski_dir(dirname, ObsClass=None, suffix=".csv",
         raise FileNotFoundError("no files were found in '{}' that end with '{}'".format(
             os.path.join(dirname), suffix))
 
+    if lazy:
+        cache = ObsMemoryCache(max_memory)
+    if parse_cache is not None and not isinstance(parse_cache, ParseCache):
+        parse_cache = ParseCache(parse_cache)
+
+    def read_file(fname, **kw):
+        if parse_cache is None:
+            return ObsClass.from_wiski(fname, verbose=False, **kw, **kwargs)
+        return parse_cache.read(ObsClass.from_wiski, fname, verbose=False,
+                                **kw, **kwargs)
+
     # gather all obs in list
     obs_list = []
     for i, csv in enumerate(unzip_fnames):
         if verbose:
             print("reading {0}/{1} -> {2}".format(i+1, len(unzip_fnames), csv))
-        obs = ObsClass.from_wiski(os.path.join(
-            dirname, csv), verbose=False, **kwargs)
+        if lazy:
+            fname = os.path.join(dirname, csv)
+            obs_meta = read_file(fname, read_series=False)
+            loader = partial(ObsClass.from_wiski, fname, verbose=False,
+                             **kwargs)
+            obs = LazyObs(obs_meta, loader, cache)
+        else:
+            obs = read_file(os.path.join(dirname, csv))
 
         if obs.metadata_available:
             obs_list.append(obs)
@@ -1,8 +1,15 @@
+import gzip
 import os
+import re
+from contextlib import nullcontext
+from functools import partial
+
 import numpy as np
 import pandas as pd
-import xml.etree.ElementTree as etree
-from lxml.etree import iterparse
+from lxml.etree import XMLParser, fromstring, iterparse
+
+from ..lazy import LazyObs, ObsMemoryCache
+from ..util import _read_files, _split_zip_path, open_file
 
 
 def read_xml(fname, ObsClass, translate_dic={'locationId': 'locatie'},
@@ -29,58 +36,643 @@ def read_xml(fname, ObsClass, translate_dic={'locationId': 'locatie'},
         list of timeseries stored in ObsClass objects
 
     """
-    tree = etree.parse(fname)
-    root = tree.getroot()
+    return list(iter_xml(fname, ObsClass, translate_dic=translate_dic,
+                         to_mnap=to_mnap, remove_nan=remove_nan,
+                         verbose=verbose))
+
+
+def iter_xml(fname, ObsClass, translate_dic={'locationId': 'locatie'},
+             locations=None, to_mnap=False, remove_nan=False, verbose=False):
+    """read a FEWS XML-file with measurements, yield an ObsClass object per
+    series.
+
+    The file is parsed while it is read, without building a document tree.
+    The events of a series are collected in typed arrays and converted to an
+    observation at the end of the series, so at most one series is in memory
+    at a time, whatever the size of the file.
+
+    If there is a binary file with the same name and the extension .bin, the
+    file is read as a PI binary file: the XML-file contains only the headers
+    and the values of the series are read from the binary file, see
+    get_bin_fname.
+
+    Parameters
+    ----------
+    fname : str
+        full path to file
+    ObsClass : type
+        class of the observations, e.g. GroundwaterObs or WaterlvlObs
+    translate_dic : dict
+        translate name of attribute by passing key: value pairs in
+        dictionary
+    locations : list of str, optional
+        list of locationId's to read from XML file, others are skipped.
+        If None (default) all locations are read.
+    to_mnap : boolean, optional
+        if True a column with 'stand_m_tov_nap' is added to the dataframe
+    remove_nan : boolean, optional
+        remove nan values from measurements, flag information about the
+        nan values is also lost
+    verbose : boolean, optional
+        print additional information to the screen (default is False).
+
+    Yields
+    ------
+    ObsClass object
+        the timeseries of a series in the file
+    """
+    fname_bin = get_bin_fname(fname)
+    target = _SeriesTarget(ObsClass, translate_dic=translate_dic,
+                           locations=locations, to_mnap=to_mnap,
+                           remove_nan=remove_nan, verbose=verbose,
+                           binary=(None if fname_bin is None else
+                                   _read_binary_values(fname_bin)))
+    parser = XMLParser(target=target)
+    with _open_xml(fname) as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            parser.feed(block)
+            while target.obs_list:
+                yield target.obs_list.pop(0)
+    parser.close()
+    while target.obs_list:
+        yield target.obs_list.pop(0)
+
+
+def iter_xml_filelist(fnames, ObsClass, directory=None, locations=None,
+                      translate_dic={'locationId': 'locatie'},
+                      to_mnap=False, remove_nan=False, verbose=False):
+    """read FEWS XML-files with measurements, yield an ObsClass object per
+    series. See iter_xml.
+
+    Yields
+    ------
+    ObsClass object
+        the timeseries of a series in one of the files
+    """
+    nfiles = len(fnames)
+    for j, ixml in enumerate(fnames):
+        if verbose:
+            print("{0}/{1} read {2}".format(j + 1, nfiles, ixml))
+        if directory is None:
+            fullpath = ixml
+        else:
+            fullpath = os.path.join(directory, ixml)
+        for o in iter_xml(fullpath, ObsClass, translate_dic=translate_dic,
+                          locations=locations, to_mnap=to_mnap,
+                          remove_nan=remove_nan):
+            yield o
+
+
+def _open_xml(fname):
+    """open a (gzip-compressed) XML-file for reading bytes"""
+    if not fname.endswith('.gz'):
+        return open_file(fname, 'rb')
+    if _split_zip_path(fname)[1] is None:
+        return gzip.open(fname, 'rb')
+    # the file in the zip file is read from the zip file that is kept open
+    return gzip.GzipFile(fileobj=open_file(fname, 'rb'), mode='rb')
+
+
+def get_bin_fname(fname):
+    """get the binary file with the values of a PI-XML file.
+
+    Delft-FEWS can export the series of a PI-XML file in a binary file with
+    the same name and the extension .bin. The XML-file then contains only
+    the headers of the series. The binary file contains the values of the
+    series one after another as little-endian 32-bit floats, one value for
+    every time step between the startDate and the endDate of the header.
+
+    Parameters
+    ----------
+    fname : str
+        path of the XML-file, can be a file in a zip file.
+
+    Returns
+    -------
+    str or None
+        path of the binary file, None if there is no binary file.
+    """
+    if fname.endswith('.gz'):
+        fname = fname[:-len('.gz')]
+    fname_bin = os.path.splitext(fname)[0] + '.bin'
+    try:
+        with open_file(fname_bin, 'rb'):
+            return fname_bin
+    except (OSError, KeyError):
+        return None
+
+
+def _read_binary_values(fname_bin):
+    """get the values in a PI binary file as a float32 array. A file on disk
+    is memory-mapped, so only the values that are used are read."""
+    if _split_zip_path(fname_bin)[1] is None:
+        if os.path.getsize(fname_bin) == 0:
+            return np.zeros(0, dtype='<f4')
+        return np.memmap(fname_bin, dtype='<f4', mode='r')
+    with open_file(fname_bin, 'rb') as f:
+        return np.frombuffer(f.read(), dtype='<f4')
+
+
+# the units of the timeStep element and the units of pandas.to_timedelta
+_TIME_STEP_UNITS = {'second': 's', 'minute': 'min', 'hour': 'h', 'day': 'D',
+                    'week': 'W'}
+
+
+def _get_binary_index(attrib):
+    """get the time steps of a series in a PI binary file from the
+    attributes of the timeStep, startDate and endDate in the header"""
+    time_step = attrib.get('timeStep', {})
+    unit = time_step.get('unit')
+    if unit not in _TIME_STEP_UNITS:
+        raise ValueError('the series in a binary file should have an '
+                         'equidistant time step, not {}'.format(unit))
+    freq = pd.to_timedelta(float(time_step.get('multiplier', 1)) /
+                           float(time_step.get('divider', 1)),
+                           unit=_TIME_STEP_UNITS[unit])
+    start, end = [pd.Timestamp('{} {}'.format(attrib[key]['date'],
+                                              attrib[key].get('time',
+                                                              '00:00:00')))
+                  for key in ('startDate', 'endDate')]
+    return pd.date_range(start, end, freq=freq)
+
+
+def _binary_to_frame(values, index, missval=None):
+    """get a DataFrame with the values of a series in a PI binary file, the
+    values start at the first value of the series"""
+    if len(values) < len(index):
+        raise ValueError('the binary file contains less values than the '
+                         'series in the XML-file')
+    # the float32 values are converted to float once, without parsing
+    values = values[:len(index)].astype(float)
+    try:
+        missval = float(missval)
+    except (TypeError, ValueError):
+        missval = np.nan
+    if not np.isnan(missval):
+        values[values == missval] = np.nan
+    return pd.DataFrame(values.reshape(-1, 1), index=index, columns=['value'])
+
+
+def _set_header_prop(series, prop, val):
+    """set a property of a series header. The qualifierId can occur multiple
+    times, it is stored as a list when it does."""
+    if prop == 'qualifierId' and prop in series:
+        qualifiers = series[prop]
+        if not isinstance(qualifiers, list):
+            qualifiers = [qualifiers]
+        series[prop] = qualifiers + [val]
+    else:
+        series[prop] = val
+
+
+def _parse_header(header, verbose=False):
+    """get a dictionary with the properties of a series-header element"""
+    series = {}
+    for child in header:
+        prop = child.tag.split('}')[-1]
+        val = child.text
+        if prop == 'x' or prop == 'y' or prop == 'lat' or prop == 'lon':
+            val = float(val)
+        _set_header_prop(series, prop, val)
+        if verbose:
+            if prop == 'locationId':
+                print('read {}'.format(val))
+    return series
+
+
+def _header_to_attributes(series, translate_dic):
+    """get the x, y and name of an observation from the header properties,
+    the keys in translate_dic are renamed in series."""
+    if "x" in series.keys():
+        x = series["x"]
+    else:
+        x = np.nan
+    if "y" in series.keys():
+        y = series["y"]
+    else:
+        y = np.nan
+
+    for key, item in translate_dic.items():
+        series[item] = series.pop(key)
+
+    return {'name': series['locatie'], 'locatie': series['locatie'],
+            'x': x, 'y': y, 'meta': series}
+
+
+def _parse_event_times(dates, times):
+    """convert the date and time attributes of events to datetime64[ns]. The
+    fixed PI-XML format (YYYY-MM-DD and HH:MM:SS) is parsed with numpy, other
+    formats with pandas."""
+    dates = np.asarray(dates, dtype=str)
+    times = np.asarray(times, dtype=str)
+    try:
+        if times.dtype != np.dtype('U8'):
+            raise ValueError('times are not formatted as HH:MM:SS')
+        days = dates.astype('M8[D]')
+        # the characters of the times as numbers, ':' is 10
+        c = times.view(np.uint32).reshape(-1, 8) - 48
+        if ((c[:, [2, 5]] != 10).any() or
+                (c[:, [0, 1, 3, 4, 6, 7]] > 9).any()):
+            raise ValueError('times are not formatted as HH:MM:SS')
+        hours = c[:, 0] * 10 + c[:, 1]
+        minutes = c[:, 3] * 10 + c[:, 4]
+        seconds = c[:, 6] * 10 + c[:, 7]
+        if (hours > 23).any() or (minutes > 59).any() or (seconds > 59).any():
+            raise ValueError('invalid times')
+        seconds = hours * 3600 + minutes * 60 + seconds
+        return days.astype('M8[ns]') + seconds.astype('m8[s]')
+    except ValueError:
+        return pd.to_datetime(np.char.add(np.char.add(dates, ' '), times),
+                              errors="coerce").values
+
+
+class _EventArrays:
+    """collect the attributes of event elements in typed arrays.
+
+    The attributes of chunksize events are buffered as strings and then
+    converted at once: the date and time to one datetime64 array and the
+    other attributes to float arrays (or object arrays if they are not
+    numeric). The arrays are allocated for the expected number of events and
+    grow if there are more events.
+
+    Parameters
+    ----------
+    size : int, optional
+        expected number of events. The default is 1024.
+    numeric : bool or list of str, optional
+        the attributes that are converted to float if possible, True for all
+        attributes. The default is True.
+    chunksize : int, optional
+        number of events that is buffered. The default is 65536.
+    """
+
+    def __init__(self, size=1024, numeric=True, chunksize=65536):
+        self.size = max(size, 1)
+        self.numeric = numeric
+        self.chunksize = chunksize
+        self.n = 0
+        self.times = np.empty(self.size, dtype='M8[ns]')
+        self.columns = {}
+        self._keys = None
+        self._buffer = []
+
+    def __len__(self):
+        return self.n + len(self._buffer)
+
+    def append(self, keys, values):
+        """add the attributes of an event, keys and values are sequences
+        with the names and the values of the attributes"""
+        if keys != self._keys:
+            self._flush()
+            self._keys = keys
+        self._buffer.append(values)
+        if len(self._buffer) == self.chunksize:
+            self._flush()
+
+    def _is_numeric(self, name):
+        return self.numeric is True or name in self.numeric
+
+    def _flush(self):
+        """convert the buffered attributes and store them in the arrays"""
+        m = len(self._buffer)
+        if m == 0:
+            return
+        if self.n + m > self.size:
+            self._grow(max(2 * self.size, self.n + m))
+        start, end = self.n, self.n + m
+
+        values = dict(zip(self._keys, zip(*self._buffer)))
+        self._buffer = []
+        self.times[start:end] = _parse_event_times(values.pop('date'),
+                                                   values.pop('time'))
+        for name, vals in values.items():
+            arr = self.columns.get(name)
+            if arr is None:
+                # events without this attribute get nan
+                arr = np.full(self.size, np.nan)
+                if not self._is_numeric(name):
+                    arr = arr.astype(object)
+                self.columns[name] = arr
+            if arr.dtype != object:
+                try:
+                    vals = np.array(vals).astype(float)
+                except ValueError:
+                    arr = arr.astype(object)
+                    self.columns[name] = arr
+            if arr.dtype == object:
+                vals = np.array(vals, dtype=object)
+            arr[start:end] = vals
+        self.n = end
+
+    def _grow(self, size):
+        """increase the size of the arrays"""
+        times = np.empty(size, dtype='M8[ns]')
+        times[:self.n] = self.times[:self.n]
+        self.times = times
+        for name, arr in self.columns.items():
+            new = np.full(size, np.nan, dtype=arr.dtype)
+            new[:self.n] = arr[:self.n]
+            self.columns[name] = new
+        self.size = size
+
+    def to_frame(self):
+        """get a DataFrame with the attributes of the events (except date and
+        time), indexed by time"""
+        self._flush()
+        data = {name: arr[:self.n] for name, arr in self.columns.items()}
+        return pd.DataFrame(data, index=pd.DatetimeIndex(self.times[:self.n]),
+                            columns=list(data))
+
+
+def _parse_series(element, ObsClass, translate_dic={'locationId': 'locatie'},
+                  to_mnap=False, remove_nan=False, verbose=False):
+    """create an ObsClass object from a series element"""
+    series = {}
+    events = _EventArrays(len(element))
+    for child in element:
+        if child.tag.endswith('header'):
+            series = _parse_header(child, verbose=verbose)
+        elif child.tag.endswith('event'):
+            events.append(child.keys(), child.values())
+    return _series_to_obs(series, events.to_frame(), ObsClass,
+                          translate_dic=translate_dic, to_mnap=to_mnap,
+                          remove_nan=remove_nan)
+
+
+class _SeriesTarget:
+    """parser target that converts the series of a FEWS XML-file to ObsClass
+    objects, see iter_xml. The observations are added to obs_list. If binary
+    is not None the values of the series are taken from this array with the
+    values of a PI binary file."""
+
+    def __init__(self, ObsClass, translate_dic={'locationId': 'locatie'},
+                 locations=None, to_mnap=False, remove_nan=False,
+                 verbose=False, binary=None):
+        self.ObsClass = ObsClass
+        self.kwargs = {'translate_dic': translate_dic, 'to_mnap': to_mnap,
+                       'remove_nan': remove_nan}
+        self.locations = locations
+        self.verbose = verbose
+        self.binary = binary
+        self.obs_list = []
+        self._event_tag = None
+        self._series = None
+        self._attrib = None
+        self._events = None
+        self._ts = None
+        self._offset = 0
+        self._in_header = False
+        self._text = None
+
+    def start(self, tag, attrib):
+        # most elements are events, check these first
+        if tag == self._event_tag:
+            if self._events is not None:
+                self._events.append(tuple(attrib), tuple(attrib.values()))
+        elif self._in_header:
+            # a property in the header
+            self._text = []
+            if len(attrib):
+                self._attrib[tag.split('}')[-1]] = dict(attrib)
+        elif tag.endswith('series'):
+            # the tag of the events, with the namespace of the series
+            self._event_tag = tag[:-len('series')] + 'event'
+            self._series = {}
+            self._attrib = {}
+        elif tag.endswith('header'):
+            self._in_header = True
+
+    def data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def end(self, tag):
+        if tag == self._event_tag:
+            return
+        if self._text is not None:
+            # the same properties as in _parse_header
+            text = ''.join(self._text) if self._text else None
+            self._text = None
+            prop = tag.split('}')[-1]
+            if prop in ('x', 'y', 'lat', 'lon'):
+                text = float(text)
+            _set_header_prop(self._series, prop, text)
+            if self.verbose and prop == 'locationId':
+                print('read {}'.format(text))
+        elif tag.endswith('header'):
+            self._in_header = False
+            read = (self.locations is None or
+                    self._series.get('locationId') in self.locations)
+            if self.binary is not None:
+                # the values of all series are in the binary file, also the
+                # values of the series that are skipped
+                index = _get_binary_index(self._attrib)
+                if read:
+                    self._ts = _binary_to_frame(
+                        self.binary[self._offset:], index,
+                        self._series.get('missVal'))
+                self._offset += len(index)
+            elif read:
+                self._events = _EventArrays()
+        elif tag.endswith('series'):
+            if self._events is not None:
+                self._ts = self._events.to_frame()
+            if self._ts is not None:
+                self.obs_list.append(_series_to_obs(
+                    self._series, self._ts, self.ObsClass, **self.kwargs))
+            self._series = None
+            self._attrib = None
+            self._events = None
+            self._ts = None
+
+    def close(self):
+        pass
+
+
+def _series_to_obs(series, ts, ObsClass,
+                   translate_dic={'locationId': 'locatie'}, to_mnap=False,
+                   remove_nan=False):
+    """create an ObsClass object from the header properties and a DataFrame
+    with the events of a series"""
+    if remove_nan:
+        ts.dropna(subset=['value'], inplace=True)
+    if to_mnap:
+        ts['stand_m_tov_nap'] = ts['value']
+
+    return ObsClass(ts, **_header_to_attributes(series, translate_dic))
+
+
+def read_xml_lazy(fname, ObsClass, translate_dic={'locationId': 'locatie'},
+                  locations=None, to_mnap=False, remove_nan=False, cache=None,
+                  verbose=False):
+    """read the headers of a FEWS XML-file, return a list of LazyObs objects.
+    The measurements of a series are read the first time they are accessed.
+
+    Parameters
+    ----------
+    fname : str
+        full path to file
+    ObsClass : type
+        class of the observations, e.g. GroundwaterObs or WaterlvlObs
+    translate_dic : dict
+        translate name of attribute by passing key: value pairs in
+        dictionary
+    locations : list of str, optional
+        list of locationId's to read from XML file, others are skipped.
+        If None (default) all locations are read.
+    to_mnap : boolean, optional
+        if True a column with 'stand_m_tov_nap' is added to the dataframe
+    remove_nan : boolean, optional
+        remove nan values from measurements, flag information about the
+        nan values is also lost
+    cache : lazy.ObsMemoryCache, optional
+        memory cache that is shared by the observations. If None the
+        measurements are never removed from memory. The default is None.
+    verbose : boolean, optional
+        print additional information to the screen (default is False).
+
+    Returns
+    -------
+    list of LazyObs objects
+        list of observations of which only the metadata is read
+    """
+    tags = ['{http://www.wldelft.nl/fews/PI}header',
+            '{http://www.wldelft.nl/fews/PI}event']
+    fname_bin = get_bin_fname(fname)
+    spans = None
+    if fname_bin is None:
+        # the position of the series in the file, so a series can be read
+        # without parsing the series before it
+        spans = _get_series_spans(fname)
     obs_list = []
-    for i in range(len(root)):
-        if root[i].tag.endswith('series'):
-            series = {}
-            date = []
-            time = []
-            events = []
-            for j in range(len(root[i])):
-                if root[i][j].tag.endswith('header'):
-                    for k in range(len(root[i][j])):
-                        prop = root[i][j][k].tag.split('}')[-1]
-                        val = root[i][j][k].text
-                        if prop == 'x' or prop == 'y' or prop == 'lat' or prop == 'lon':
-                            val = float(val)
-                        series[prop] = val
-                        if verbose:
-                            if prop == 'locationId':
-                                print('read {}'.format(val))
-                elif root[i][j].tag.endswith('event'):
-                    date.append(root[i][j].attrib.pop('date'))
-                    time.append(root[i][j].attrib.pop('time'))
-                    events.append({**root[i][j].attrib})
-            # combine events in a dataframe
-            index = pd.to_datetime(
-                [d + ' ' + t for d, t in zip(date, time)],
-                errors="coerce")
-            ts = pd.DataFrame(events, index=index, dtype=float)
-            if remove_nan:
-                ts.dropna(subset=['value'], inplace=True)
-            if to_mnap:
-                ts['stand_m_tov_nap'] = ts['value']
-
-            if "x" in series.keys():
-                x = series["x"]
-            else:
-                x = np.nan
-            if "y" in series.keys():
-                y = series["y"]
-            else:
-                y = np.nan
+    iseries = 0
+    offset = 0
+    with _open_xml(fname) as f:
+        for _, element in iterparse(f, tag=tags):
+            if element.tag.endswith('header'):
+                series = _parse_header(element, verbose=verbose)
+                if fname_bin is not None:
+                    attrib = {child.tag.split('}')[-1]: dict(child.attrib)
+                              for child in element if len(child.attrib)}
+                    nvalues = len(_get_binary_index(attrib))
+                if (locations is None) or (series.get('locationId') in
+                                           locations):
+                    kwargs = {'translate_dic': translate_dic,
+                              'to_mnap': to_mnap, 'remove_nan': remove_nan}
+                    if fname_bin is None:
+                        loader = partial(_read_xml_series, fname, iseries,
+                                         ObsClass, spans=spans, **kwargs)
+                    else:
+                        loader = partial(_read_binary_series, fname_bin,
+                                         offset, dict(series), attrib,
+                                         ObsClass, **kwargs)
+                    obs_meta = ObsClass(
+                        **_header_to_attributes(series, translate_dic))
+                    obs_list.append(LazyObs(obs_meta, loader, cache))
+                iseries += 1
+                if fname_bin is not None:
+                    offset += nvalues
+            # free memory, the events are read when the series is accessed
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
 
-            for key, item in translate_dic.items():
-                series[item] = series.pop(key)
+    if spans is not None and len(spans[1]) != iseries:
+        # the series are not found correctly in the bytes of the file (e.g.
+        # a series tag in a comment), the loaders parse the whole file
+        spans[1].clear()
 
-            obs_list.append(ObsClass(ts, name=series['locatie'],
-                                     locatie=series['locatie'],
-                                     x=x, y=y, meta=series))
     return obs_list
 
 
+def _read_binary_series(fname_bin, offset, series, attrib, ObsClass,
+                        **kwargs):
+    """read the series of which the values start at offset from a PI binary
+    file, series and attrib are the properties and the attributes of the
+    header of the series"""
+    ts = _binary_to_frame(_read_binary_values(fname_bin)[offset:],
+                          _get_binary_index(attrib), series.get('missVal'))
+    return _series_to_obs(series, ts, ObsClass, **kwargs)
+
+
+# the start tag of the root element and the start and end tags of a series
+_ROOT_TAG = re.compile(rb'<((?:[\w.-]+:)?TimeSeries)[\s>][^>]*>')
+_SERIES_TAG = re.compile(rb'<(/?)(?:[\w.-]+:)?series[\s>]')
+
+
+def _get_series_spans(fname, blocksize=1 << 20):
+    """get the tags of the root element and the byte offsets of the start
+    and the end of every series in a FEWS XML-file. The file is searched in
+    blocks of blocksize bytes, without parsing it. None if there is no root
+    element."""
+    # tags that start this number of bytes before the end of a block are
+    # searched again in the next block
+    margin = 64
+    root = None
+    spans = []
+    start = None
+    pos = 0
+    buf = b''
+    with _open_xml(fname) as f:
+        while True:
+            block = f.read(blocksize)
+            buf += block
+            if root is None:
+                match = _ROOT_TAG.search(buf)
+                if match is None:
+                    if not block:
+                        return None
+                    continue
+                root = (match.group(0),
+                        b'</' + match.group(1) + b'>')
+                buf = buf[match.end():]
+                pos += match.end()
+            keep = len(buf) - margin if block else len(buf)
+            for match in _SERIES_TAG.finditer(buf):
+                if match.start() >= keep:
+                    break
+                if match.group(1):
+                    if start is not None:
+                        # the end of the end tag
+                        end = buf.index(b'>', match.start()) + 1
+                        spans.append((start, pos + end))
+                        start = None
+                else:
+                    start = pos + match.start()
+            if not block:
+                return root, spans
+            keep = max(keep, 0)
+            buf = buf[keep:]
+            pos += keep
+
+
+def _read_xml_series(fname, iseries, ObsClass, spans=None, **kwargs):
+    """read the series with number iseries from a FEWS XML-file. If spans
+    (see _get_series_spans) contains the series, only the bytes of the
+    series are read."""
+    if spans is not None and len(spans[1]) > iseries:
+        (root_start, root_end), series_spans = spans
+        start, end = series_spans[iseries]
+        with _open_xml(fname) as f:
+            f.seek(start)
+            data = f.read(end - start)
+        # the root element is added for the namespaces
+        root = fromstring(root_start + data + root_end)
+        return _parse_series(root[0], ObsClass, **kwargs)
+
+    with _open_xml(fname) as f:
+        context = iterparse(f, tag='{http://www.wldelft.nl/fews/PI}series')
+        for i, (_, element) in enumerate(context):
+            if i == iseries:
+                return _parse_series(element, ObsClass, **kwargs)
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    raise ValueError('{} contains less than {} series'.format(fname,
+                                                              iseries + 1))
+
+
 def iterparse_pi_xml(fname, ObsClass, translate_dic={'locationId': 'locatie'},
                      locationIds=None, return_events=True,
                      keep_flags=(0, 1), return_df=False,
@@ -127,12 +719,13 @@ def iterparse_pi_xml(fname, ObsClass, translate_dic={'locationId': 'locatie'},
 
     tags = ['{{http://www.wldelft.nl/fews/PI}}{}'.format(tag) for tag in tags]
 
-    context = iterparse(fname, tag=tags)
+    f = _open_xml(fname)
+    context = iterparse(f, tag=tags)
 
     header_list = []
     series_list = []
 
-    keep_flags = [str(flag) for flag in keep_flags]
+    keep_flags = [float(flag) for flag in keep_flags]
 
     try:
         for _, element in context:
@@ -147,43 +740,35 @@ def iterparse_pi_xml(fname, ObsClass, translate_dic={'locationId': 'locatie'},
                         if loc not in locationIds:
                             continue
                     if h_attr.text is not None:
-                        header[tag] = h_attr.text
+                        _set_header_prop(header, tag, h_attr.text)
                     elif len(h_attr.attrib) != 0:
                         header[tag] = {**h_attr.attrib}
                     else:
                         header[tag] = None
                     if verbose and tag.startswith("locationId"):
                         print("reading {}".format(header[tag]))
-                events = []
+                events = _EventArrays(numeric=['value'])
             elif element.tag.endswith("event"):
                 # if specific locations are provided only read those
-                if locationIds is not None:
-                    if loc not in locationIds:
-                        continue
-                events.append({**element.attrib})
-            elif element.tag.endswith('series'):
-                # if specific locations are provided only read those
-                if locationIds is not None:
-                    if loc not in locationIds:
-                        continue
+                if locationIds is None or loc in locationIds:
+                    events.append(element.keys(), element.values())
+            elif element.tag.endswith('series') and (
+                    locationIds is None or loc in locationIds):
                 if len(events) == 0:
                     if return_events:
                         s = pd.DataFrame()
                     else:
                         s = pd.Series()
                 else:
-                    df = pd.DataFrame(events)
-                    df.index = pd.to_datetime(
-                        [d + " " + t for d, t in zip(df['date'], df['time'])],
-                        errors="coerce")
-                    df.drop(columns=["date", "time"], inplace=True)
+                    df = events.to_frame()
                     if return_events:
                         df['value'] = pd.to_numeric(
                             df['value'], errors="coerce")
                         df['flag'] = pd.to_numeric(df['flag'])
                         s = df
                     else:
-                        mask = df['flag'].isin(keep_flags)
+                        flags = pd.to_numeric(df['flag'], errors="coerce")
+                        mask = flags.isin(keep_flags)
                         s = pd.to_numeric(
                             df.loc[mask, 'value'], errors="coerce")
 
@@ -196,16 +781,19 @@ def iterparse_pi_xml(fname, ObsClass, translate_dic={'locationId': 'locatie'},
                 header_list.append(header)
                 series_list.append(o)
 
-            # Free memory.
+            # Free memory, the header and the events that are read are
+            # removed from the tree
             element.clear()
-            # while element.getprevious() is not None:
-            #    del element.getparent()[0]
+            while element.getprevious() is not None:
+                del element.getparent()[0]
 
     except Exception as e:
         if skip_errors:
             print("ERROR! Skipped {}".format(fname))
         else:
             raise(e)
+    finally:
+        f.close()
 
     if return_df:
         for h, s in zip(header_list, series_list):
@@ -215,18 +803,136 @@ def iterparse_pi_xml(fname, ObsClass, translate_dic={'locationId': 'locatie'},
         return header_list, series_list
 
 
-def write_pi_xml(obs_coll, fname, timezone=1.0, version="1.24"):
+def _get_time_step(index):
+    """get the time step in seconds of a DatetimeIndex with equidistant time
+    steps, missing time steps are allowed"""
+    steps = np.unique(np.diff(index.values)) // np.timedelta64(1, 's')
+    if len(steps) == 0:
+        return 1
+    if steps[0] <= 0 or (steps % steps[0]).any():
+        raise ValueError('only observations with equidistant time steps can '
+                         'be written to a binary file')
+    return int(steps[0])
+
+
+def _format_event_times(index):
+    """get the dates (YYYY-MM-DD) and times (HH:MM:SS) of a DatetimeIndex as
+    arrays of strings. Every date and time of day is formatted only once."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    seconds = index.values.astype('M8[s]').astype(np.int64)
+    days, seconds = np.divmod(seconds, 86400)
+    days, idays = np.unique(days, return_inverse=True)
+    seconds, iseconds = np.unique(seconds, return_inverse=True)
+    dates = days.astype('M8[D]').astype('U10')
+    times = np.array(['{:02d}:{:02d}:{:02d}'.format(s // 3600, s // 60 % 60,
+                                                     s % 60)
+                      for s in seconds.tolist()], dtype='U8')
+    return dates[idays], times[iseconds]
+
+
+def _write_pi_header(f, o, binary=False):
+    """write the header of the series of an observation"""
+    paramline = "<{tag}>{param}</{tag}>\n"
+    header = dict(o.meta)
+    # the location is needed to read the file again
+    header.setdefault('locationId', o.name)
+    if binary:
+        # the time axis of the values in the binary file
+        header['timeStep'] = _get_time_step(o.index)
+        header['startDate'] = None
+        header['endDate'] = None
+        header['missVal'] = 'NaN'
+
+    hlines = [2 * "\t" + "<header>\n"]
+    for htag, hval in header.items():
+        if binary and htag == "timeStep":
+            hline = ('<{tag} unit="second" multiplier="{step}"/>\n'
+                     .format(tag=htag, step=hval))
+        elif htag.endswith("Date"):
+            try:
+                hdate = hval.strftime("%Y-%m-%d")
+                htime = hval.strftime("%H:%M:%S")
+            except AttributeError as e:
+                if htag.startswith("start"):
+                    hdate = o.index[0].strftime("%Y-%m-%d")
+                    htime = o.index[0].strftime("%H:%M:%S")
+                elif htag.startswith("end"):
+                    hdate = o.index[-1].strftime("%Y-%m-%d")
+                    htime = o.index[-1].strftime("%H:%M:%S")
+                else:
+                    raise(e)
+            hline = '<{tag} date="{date}" time="{time}"/>\n'.format(
+                tag=htag, date=hdate, time=htime
+            )
+        elif htag.endswith("timeStep"):
+            hline = '<{tag} unit="{unit}"/>\n'.format(
+                tag=htag, unit=hval)
+        elif isinstance(hval, list):
+            # e.g. multiple qualifierIds
+            hline = (3 * "\t").join(paramline.format(tag=htag, param=val)
+                                    for val in hval)
+        else:
+            hline = paramline.format(tag=htag, param=hval)
+        hlines.append(3 * "\t" + hline)
+    hlines.append(2 * "\t" + "</header>\n")
+    f.writelines(hlines)
+    return header
+
+
+def _write_pi_events(f, o, chunksize=100000):
+    """write the events of an observation, chunksize events at a time"""
+    # one attribute per column, '%' is escaped in the names of the columns
+    template = ('\t\t<event date="%s" time="%s"' +
+                ''.join(' {}="%s"'.format(str(col).replace('%', '%%'))
+                        for col in o.columns) + '/>\n')
+    for start in range(0, len(o), chunksize):
+        chunk = pd.DataFrame(o.iloc[start:start + chunksize])
+        dates, times = _format_event_times(chunk.index)
+        columns = [chunk.iloc[:, i].astype(str).tolist()
+                   for i in range(chunk.shape[1])]
+        f.write(''.join([template % row for row in
+                         zip(dates.tolist(), times.tolist(), *columns)]))
+
+
+def write_pi_xml(obs_coll, fname, timezone=1.0, version="1.24",
+                 binary=False, value_column='value', compression='infer',
+                 chunksize=100000):
     """
     Write PiTimeSeries object to PI-XML file.
 
+    The events are written in chunks, so the memory that is used does not
+    depend on the length of the series.
+
     Parameters
     ----------
     fname: path
-        path to XML file to be written
+        path to XML file to be written, with the extension .xml or .xml.gz
+    binary : bool, optional
+        if True the values are written to a PI binary file with the same name
+        and the extension .bin, the XML-file contains only the headers. The
+        observations should have equidistant time steps, except for missing
+        time steps. The default is False.
+    value_column : str, optional
+        only used if binary is True. The column with the values that are
+        written to the binary file, as 32-bit floats. Missing time steps are
+        written as missing values. The default is 'value'.
+    compression : str or None, optional
+        'gzip' to write a gzip-compressed XML-file, None to write an
+        uncompressed file. If 'infer' the file is compressed if fname ends
+        with '.gz'. A binary file is not compressed. The default is 'infer'.
+    chunksize : int, optional
+        the number of events that is formatted and written at a time. The
+        default is 100000.
 
     """
-
-    assert fname.endswith(
+    if compression == 'infer':
+        compression = 'gzip' if fname.endswith('.gz') else None
+    if compression not in (None, 'gzip'):
+        raise ValueError("compression should be 'infer', 'gzip' or None, "
+                         "not '{}'".format(compression))
+    basename = fname[:-len('.gz')] if fname.endswith('.gz') else fname
+    assert basename.endswith(
         ".xml"), "Output file should have '.xml' extension!"
 
     # first line of XML file
@@ -247,8 +953,14 @@ def write_pi_xml(obs_coll, fname, timezone=1.0, version="1.24"):
     # line templates
     paramline = "<{tag}>{param}</{tag}>\n"
 
+    if compression == 'gzip':
+        f = gzip.open(fname, "wt", encoding="utf-8")
+    else:
+        f = open(fname, "w", encoding="utf-8")
+    fname_bin = os.path.splitext(basename)[0] + '.bin'
+
     # write file
-    with open(fname, "w") as f:
+    with f, (open(fname_bin, 'wb') if binary else nullcontext()) as fbin:
         f.write(line0)
         f.write(
             timeseriesline.format(
@@ -261,100 +973,163 @@ def write_pi_xml(obs_coll, fname, timezone=1.0, version="1.24"):
 
         for o in obs_coll.obs:
             # start series
-            start = "\t" + "<series>\n"
-            f.write(start)
-            # write header
-            hlines = []
-            hstart = 2 * "\t" + "<header>\n"
-            hlines.append(hstart)
-            for htag, hval in o.meta.items():
-                if htag.endswith("Date"):
-                    try:
-                        hdate = hval.strftime("%Y-%m-%d")
-                        htime = hval.strftime("%H:%M:%S")
-                    except AttributeError as e:
-                        if htag.startswith("start"):
-                            hdate = o.index[0].strftime("%Y-%m-%d")
-                            htime = o.index[0].strftime("%H:%M:%S")
-                        elif htag.startswith("end"):
-                            hdate = o.index[-1].strftime("%Y-%m-%d")
-                            htime = o.index[-1].strftime("%H:%M:%S")
-                        else:
-                            raise(e)
-                    hline = '<{tag} date="{date}" time="{time}"/>\n'.format(
-                        tag=htag, date=hdate, time=htime
-                    )
-                elif htag.endswith("timeStep"):
-                    hline = '<{tag} unit="{unit}"/>\n'.format(
-                        tag=htag, unit=hval)
-                else:
-                    hline = paramline.format(tag=htag, param=hval)
-                hlines.append(3 * "\t" + hline)
-            hlines.append(2 * "\t" + "</header>\n")
-            f.writelines(hlines)
-
-            # write timeseries
-            dates = o.reset_index()["index"].apply(
-                lambda s: pd.datetime.strftime(s, "%Y-%m-%d")
-            )
-            times = o.reset_index()["index"].apply(
-                lambda s: pd.datetime.strftime(s, "%H:%M:%S")
-            )
-            # set date and time attributes
-            events = (
-                2 * "\t"
-                + '<event date="'
-                + dates.values
-                + '" time="'
-                + times.values
-            )
-            # loop through columns and add to event
-            for icol in o.columns:
-                val = o[icol].astype(str)
-                events += (
-                    '" {}="'.format(icol)
-                    + val.values
-                )
-            # close event
-            events += '"/>\n'
-            # write to file
-            f.writelines(events)
+            f.write("\t" + "<series>\n")
+            header = _write_pi_header(f, o, binary=binary)
+
+            if binary:
+                # missing time steps are written as missing values
+                index = pd.date_range(o.index[0], o.index[-1],
+                                      freq=pd.Timedelta(
+                                          seconds=header['timeStep']))
+                for start in range(0, len(index), chunksize):
+                    values = o[value_column].reindex(
+                        index[start:start + chunksize]).values
+                    values.astype('<f4').tofile(fbin)
+            else:
+                _write_pi_events(f, o, chunksize=chunksize)
             # end series
             f.write("\t" + "</series>\n")
         # end Timeseries
         f.write("</TimeSeries>\n")
 
 
+def _read_xml_file(fname, ObsClass, translate_dic={'locationId': 'locatie'},
+                   locations=None, to_mnap=False, remove_nan=False,
+                   low_memory=True, verbose=False):
+    """read the observations in one FEWS XML-file, module level function so
+    the files can be read in worker processes"""
+    if verbose:
+        print("read {}".format(fname))
+    if low_memory or get_bin_fname(fname) is not None:
+        return list(iter_xml(fname,
+                             ObsClass=ObsClass,
+                             translate_dic=translate_dic,
+                             locations=locations,
+                             to_mnap=to_mnap,
+                             remove_nan=remove_nan))
+    _, olist = iterparse_pi_xml(fname, ObsClass,
+                                translate_dic=translate_dic,
+                                locationIds=locations,
+                                verbose=verbose)
+    return olist
+
+
+# the properties of the header that identify a series in PI-XML, 'type' is
+# the timeSeriesType
+_SERIES_IDENTITY = ('locationId', 'parameterId', 'qualifierId',
+                    'ensembleMemberIndex', 'type', 'moduleInstanceId')
+
+
+def _get_series_identity(o, translate_dic):
+    """get the class of an observation and the properties of the header that
+    identify a series"""
+    key = [type(o)]
+    for prop in _SERIES_IDENTITY:
+        val = o.meta.get(translate_dic.get(prop, prop))
+        if isinstance(val, list):
+            val = tuple(val)
+        key.append(val)
+    return tuple(key)
+
+
+def _merge_series(olists, translate_dic={'locationId': 'locatie'}):
+    """combine the observations of the same series in different files, e.g.
+    a series that is split across files by time. olists contains a list of
+    observations per file. The series are identified by the location,
+    parameter, qualifiers, ensemble member, time series type and module
+    instance. The series within one file are never combined. The
+    measurements are sorted by time, for measurements at the same time the
+    last observation is used. The attributes are taken from the first
+    observation."""
+    groups = {}
+    for olist in olists:
+        counts = {}
+        for o in olist:
+            key = _get_series_identity(o, translate_dic)
+            # the n-th series with the same identity in a file is combined
+            # with the n-th series in the other files
+            n = counts.get(key, 0)
+            counts[key] = n + 1
+            groups.setdefault((key, n), []).append(o)
+
+    merged = []
+    for olist in groups.values():
+        o = olist[0]
+        if len(olist) > 1:
+            data = pd.concat([pd.DataFrame(oi) for oi in olist])
+            data = data.sort_index(kind='mergesort')
+            data = data[~data.index.duplicated(keep='last')]
+            attrs = {att: getattr(o, att) for att in o._metadata}
+            o = o.__class__(data, **attrs)
+        merged.append(o)
+    return merged
+
+
 def parse_xml_filelist(fnames, ObsClass, directory=None, locations=None,
                        translate_dic={'locationId': 'locatie'},
                        to_mnap=False, remove_nan=False, verbose=False,
-                       low_memory=True):
-    obs_list = []
-    nfiles = len(fnames)
-    for j, ixml in enumerate(fnames):
+                       low_memory=True, lazy=False, max_memory=None,
+                       n_workers=None, executor=None, merge_series=True):
+    """read FEWS XML-files with measurements, return a list of ObsClass
+    objects.
 
-        # print message
-        if verbose:
-            print("{0}/{1} read {2}".format(j + 1, nfiles, ixml))
+    Parameters
+    ----------
+    fnames : list of str
+        the XML-files
+    ObsClass : type
+        class of the observations, e.g. GroundwaterObs or WaterlvlObs
+    directory : str, optional
+        directory (or zip file) of the files. The default is None.
+    locations : list of str, optional
+        list of locationId's to read from the XML files, others are skipped.
+        If None (default) all locations are read.
+    n_workers : int, optional
+        number of worker processes used to read the files. If None (and
+        executor is None) the files are read one by one. Not used if lazy is
+        True. The default is None.
+    executor : concurrent.futures.Executor, optional
+        executor used to read the files, e.g. a ProcessPoolExecutor that is
+        shared by multiple calls. Not used if lazy is True. The default is
+        None.
+    merge_series : bool, optional
+        if True the same series (location, parameter, qualifiers, ensemble
+        member, time series type and module instance) in different files
+        are combined to one observation, sorted by time. Not used if lazy is
+        True. The default is True.
 
-        # join directory to filename if provided
-        if directory is None:
-            fullpath = ixml
-        else:
-            fullpath = os.path.join(directory, ixml)
+    See ObsCollection.from_fews for the other parameters.
 
-        # selection of xml parse method
-        if low_memory:
-            olist = read_xml(fullpath,
-                             ObsClass=ObsClass,
-                             translate_dic=translate_dic,
-                             to_mnap=to_mnap,
-                             remove_nan=remove_nan,
-                             verbose=False)
-        else:
-            _, olist = iterparse_pi_xml(fullpath, ObsClass,
-                                        translate_dic=translate_dic,
-                                        locationIds=locations,
-                                        verbose=verbose)
-        obs_list += olist
-    return obs_list
+    Returns
+    -------
+    list of ObsClass objects
+        list of timeseries stored in ObsClass objects
+    """
+    if directory is not None:
+        fnames = [os.path.join(directory, ixml) for ixml in fnames]
+
+    if lazy:
+        obs_list = []
+        cache = ObsMemoryCache(max_memory)
+        nfiles = len(fnames)
+        for j, fullpath in enumerate(fnames):
+            if verbose:
+                print("{0}/{1} read {2}".format(j + 1, nfiles, fullpath))
+            obs_list += read_xml_lazy(fullpath,
+                                      ObsClass=ObsClass,
+                                      translate_dic=translate_dic,
+                                      locations=locations,
+                                      to_mnap=to_mnap,
+                                      remove_nan=remove_nan,
+                                      cache=cache)
+        return obs_list
+
+    olists, _ = _read_files(_read_xml_file, fnames, n_workers=n_workers,
+                            executor=executor, ObsClass=ObsClass,
+                            translate_dic=translate_dic,
+                            locations=locations, to_mnap=to_mnap,
+                            remove_nan=remove_nan, low_memory=low_memory,
+                            verbose=verbose)
+    if merge_series:
+        return _merge_series(olists, translate_dic=translate_dic)
+    return [o for olist in olists for o in olist]
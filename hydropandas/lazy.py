@@ -0,0 +1,216 @@
+"""
+module with classes to read the measurements of observations on demand.
+
+A LazyObs is a proxy for an observation that contains only the metadata
+(name, x, y, meta, ...) of the observation. The measurements are read the
+first time they are needed, e.g. when a column or the index is accessed. An
+ObsMemoryCache keeps track of the memory used by the loaded observations and
+removes the measurements of the least recently used observations when the
+memory budget is exceeded. The measurements are read again when they are
+accessed after they were removed.
+
+"""
+from collections import OrderedDict
+
+
+class ObsMemoryCache:
+    """Least recently used cache for the measurements of lazy observations.
+
+    Parameters
+    ----------
+    max_memory : int or None, optional
+        maximum memory in bytes used by the loaded observations. If None the
+        memory is not limited. The default is None.
+    """
+
+    def __init__(self, max_memory=None):
+        self.max_memory = max_memory
+        self.memory_usage = 0
+        self._loaded = OrderedDict()
+
+    def __len__(self):
+        return len(self._loaded)
+
+    def __repr__(self):
+        return '{}(max_memory={}, memory_usage={}, loaded={})'.format(
+            self.__class__.__name__, self.max_memory, self.memory_usage,
+            len(self))
+
+    def add(self, lazy_obs, nbytes):
+        """add a loaded observation to the cache and evict the least recently
+        used observations if the memory budget is exceeded.
+
+        Parameters
+        ----------
+        lazy_obs : LazyObs
+            observation with loaded measurements
+        nbytes : int
+            memory used by the measurements in bytes
+        """
+        self._loaded[id(lazy_obs)] = (lazy_obs, nbytes)
+        self.memory_usage += nbytes
+        if self.max_memory is None:
+            return
+        while self.memory_usage > self.max_memory and len(self._loaded) > 1:
+            key = next(iter(self._loaded))
+            if key == id(lazy_obs):
+                break
+            self.evict(self._loaded[key][0])
+
+    def touch(self, lazy_obs):
+        """mark an observation as most recently used"""
+        if id(lazy_obs) in self._loaded:
+            self._loaded.move_to_end(id(lazy_obs))
+
+    def evict(self, lazy_obs):
+        """remove the measurements of an observation from memory"""
+        _, nbytes = self._loaded.pop(id(lazy_obs), (None, 0))
+        self.memory_usage -= nbytes
+        lazy_obs._obs = None
+
+    def clear(self):
+        """remove the measurements of all observations from memory"""
+        for lazy_obs, _ in list(self._loaded.values()):
+            self.evict(lazy_obs)
+
+
+class LazyObs:
+    """Proxy for an observation of which the measurements are read the first
+    time they are accessed.
+
+    The attributes in the _metadata of the observation (e.g. name, x, y,
+    meta) are available without reading the measurements. All other
+    attributes and methods are passed on to the observation, which is read
+    using the loader if it is not in memory.
+
+    Parameters
+    ----------
+    obs_meta : observation.Obs
+        observation without measurements, only the attributes are used.
+    loader : callable
+        function without arguments that returns the observation with
+        measurements.
+    cache : ObsMemoryCache, optional
+        memory cache that is shared by multiple lazy observations. If None
+        the measurements are never removed from memory. The default is None.
+    """
+
+    def __init__(self, obs_meta, loader, cache=None):
+        object.__setattr__(self, '_obs_meta', obs_meta)
+        object.__setattr__(self, '_loader', loader)
+        object.__setattr__(self, '_cache', cache)
+        object.__setattr__(self, '_obs', None)
+        # the ChangeSets that are notified when the data of the loaded
+        # observation changes, see util._watch
+        object.__setattr__(self, '_watchers', [])
+
+    @property
+    def _metadata(self):
+        return self._obs_meta._metadata
+
+    @property
+    def obs_class(self):
+        """the type of the observation"""
+        return type(self._obs_meta)
+
+    @property
+    def is_loaded(self):
+        """True if the measurements are in memory"""
+        return self._obs is not None
+
+    def load(self):
+        """get the observation with measurements, read the measurements if
+        they are not in memory.
+
+        Returns
+        -------
+        observation.Obs
+            observation with measurements
+        """
+        if self._obs is None:
+            o = self._loader()
+            # attributes may have been changed after the proxy was created
+            for att in self._metadata:
+                setattr(o, att, getattr(self._obs_meta, att))
+            o._watchers = self._watchers
+            object.__setattr__(self, '_obs', o)
+            if self._cache is not None:
+                self._cache.add(self, o.memory_usage(deep=True).sum())
+        elif self._cache is not None:
+            self._cache.touch(self)
+
+        return self._obs
+
+    def unload(self):
+        """remove the measurements from memory"""
+        if self._cache is not None:
+            self._cache.evict(self)
+        else:
+            object.__setattr__(self, '_obs', None)
+
+    def to_collection_dict(self, include_meta=False):
+        """get dictionary with registered attributes and their values
+        of the observation, without reading the measurements.
+
+        Parameters
+        ----------
+        include_meta : boolean, optional
+            include the meta dictionary in the collection dictionary,
+            default is false
+
+        Returns
+        -------
+        d : dictionary
+            dictionary with Obs information
+        """
+        d = self._obs_meta.to_collection_dict(include_meta=include_meta)
+        d['obs'] = self
+
+        return d
+
+    def __getattr__(self, name):
+        if name in self._obs_meta._metadata:
+            return getattr(self._obs_meta, name)
+        if name.startswith('_'):
+            # pandas checks private attributes (e.g. _typ) to infer the type
+            # of an object, this should not read the measurements
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            object.__setattr__(self, name, value)
+        elif name in self._obs_meta._metadata:
+            setattr(self._obs_meta, name, value)
+            if self._obs is not None:
+                setattr(self._obs, name, value)
+        else:
+            setattr(self.load(), name, value)
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __setitem__(self, key, value):
+        self.load()[key] = value
+
+    def __len__(self):
+        return len(self.load())
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __contains__(self, key):
+        return key in self.load()
+
+    def __getstate__(self):
+        return self.__dict__
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def __repr__(self):
+        if self._obs is None:
+            return '{}({}, name={}, not loaded)'.format(
+                self.__class__.__name__, self.obs_class.__name__,
+                self._obs_meta.name)
+        return repr(self._obs)
@@ -31,16 +31,26 @@ class ObsCollection(pd.DataFrame):
         name of the observation collection
     meta : dic
         metadata of the observatino collection
+
+    Notes
+    -----
+    The measurements of the observations can be stored in a columnar store
+    (see the to_columnar method). The store is kept in the '_store'
+    attribute.
     """
     # temporary properties
-    _internal_names = pd.DataFrame._internal_names + ['none']
+    _internal_names = pd.DataFrame._internal_names + ['none', '_watchers']
     _internal_names_set = set(_internal_names)
 
     # normal properties
     _metadata = ['name',
                  'meta',
+                 '_store',
                  ]
 
+    # the ChangeSets that are notified when the data changes, see util._watch
+    _watchers = None
+
     def __init__(self, *args, **kwargs):
         """ constructor of the ObsCollection
 
@@ -50,6 +60,7 @@ class ObsCollection(pd.DataFrame):
         """
         self.name = kwargs.pop('name', '')
         self.meta = kwargs.pop('meta', {})
+        self._store = kwargs.pop('_store', None)
         # self.plots = CollectionPlots(self)
 
         super(ObsCollection, self).__init__(*args, **kwargs)
@@ -58,6 +69,15 @@ class ObsCollection(pd.DataFrame):
     def _constructor(self):
         return ObsCollection
 
+    def _clear_item_cache(self):
+        # pandas clears the item cache when the data or the index changes
+        util._notify_watchers(self)
+        super(ObsCollection, self)._clear_item_cache()
+
+    def __delitem__(self, key):
+        super(ObsCollection, self).__delitem__(key)
+        self._clear_item_cache()
+
     def _infer_otype(self, verbose=False):
         """Infer observation type from the obs column
 
@@ -84,6 +104,21 @@ class ObsCollection(pd.DataFrame):
         else:
             raise TypeError('could not infer observation type')
 
+    def _get_store_positions(self):
+        """get the position of the observations in the columnar store.
+
+        Returns
+        -------
+        numpy.ndarray or None
+            positions of the observations in self._store. None if there is no
+            columnar store or if one of the observations is not a view on the
+            store (e.g. because it was replaced).
+
+        """
+        if self._store is None or 'obs' not in self.columns:
+            return None
+        return self._store.get_positions(self.obs.values)
+
     def _set_metadata_value(self, iname, att_name, value, add_to_meta=False,
                             verbose=False):
         """ Set a value on three different levels at once:
@@ -134,6 +169,79 @@ class ObsCollection(pd.DataFrame):
                 print(f'set attribute {att_name} of {iname} to {value}')
             o.meta.update({att_name: value})
 
+    def _set_metadata_values(self, att_name, values, add_to_meta=False,
+                             verbose=False):
+        """ Set the values of multiple observations on three different levels
+        at once:
+            1. the column in the ObsCollection DataFrame
+            2. the attribute of the observations
+            3. the value in the meta dictionary of the observations
+
+        Parameters
+        ----------
+        att_name : str
+            name of the column in self.columns and attribute of the
+            observations. e.g. 'x'
+        values : pandas.Series or array-like
+            if a Series, the values are set for the observations in the index
+            of the Series. Otherwise the length of values should be equal to
+            the number of observations in the collection.
+        add_to_meta : bool, optional
+            if True the att_name, value pairs are added to the meta dictionary
+            of the observations. The default is False.
+        verbose : boolean, optional
+            Print additional information to the screen (default is False).
+
+        Raises
+        ------
+        ValueError
+            if an index of values is not in self.index or if the length of
+            values is not equal to the length of the ObsCollection.
+
+        Returns
+        -------
+        None.
+
+        """
+        if isinstance(values, pd.Series):
+            not_in_index = ~values.index.isin(self.index)
+            if not_in_index.any():
+                raise ValueError(
+                    f"{list(values.index[not_in_index])} not in index")
+            if not self.index.is_unique:
+                raise ValueError('cannot set values by name if the index '
+                                 'contains duplicates, use an array instead')
+            positions = self.index.get_indexer(values.index)
+            values = values.values
+        else:
+            values = np.asarray(values)
+            if len(values) != len(self):
+                raise ValueError(f'length of values ({len(values)}) does not '
+                                 f'match the length of the ObsCollection '
+                                 f'({len(self)})')
+            positions = np.arange(len(self))
+
+        if len(positions) == 0:
+            return
+
+        # 1. the column in the ObsCollection DataFrame
+        if (len(positions) == len(self) and
+                (positions == np.arange(len(self))).all()):
+            self[att_name] = values
+        else:
+            if att_name not in self.columns:
+                self[att_name] = np.nan
+            self.iloc[positions, self.columns.get_loc(att_name)] = values
+        if verbose:
+            print(f'set {att_name} of {len(positions)} observations')
+
+        # 2. and 3. the attributes and meta dictionaries of the observations
+        for o, value in zip(self['obs'].values[positions], values):
+            if att_name in o._metadata:
+                setattr(o, att_name, value)
+            if add_to_meta:
+                o.meta.update({att_name: value})
+
     @classmethod
     def from_arctic(cls, connstr, libname, ObsClass=obs.GroundwaterObs,
                     verbose=False):
@@ -177,6 +285,12 @@ class ObsCollection(pd.DataFrame):
                   keep_all_obs=True,
                   name=None,
                   verbose=False,
+                  lazy=False,
+                  max_memory=None,
+                  n_workers=None,
+                  executor=None,
+                  errors='raise',
+                  parse_cache=None,
                   **kwargs):
         """ Read dino data within an extent from the server or from a 
         directory with downloaded files.
@@ -197,7 +311,8 @@ class ObsCollection(pd.DataFrame):
         suffix : str
             suffix of files in subdir that will be read
         unpackdir : str
-            destination directory of the unzipped file
+            destination directory of the unzipped file. If None (default) the
+            files are read from the zip file without extracting it
         force_unpack : boolean, optional
             force unpack if dst already exists
         preserve_datetime : boolean, optional
@@ -209,6 +324,31 @@ class ObsCollection(pd.DataFrame):
             the name of the observation collection
         verbose : boolean, optional
             Print additional information to the screen (default is False).
+        lazy : boolean, optional
+            only used if dirname is not None. If True only the metadata is
+            read, the measurements of an observation are read the first time
+            they are accessed. The default is False.
+        max_memory : int, optional
+            only used if lazy is True. The maximum memory in bytes used by
+            the measurements of the observations, the least recently used
+            observations are removed from memory when this is exceeded. The
+            default is None (no limit).
+        n_workers : int, optional
+            only used if dirname is not None. The number of worker processes
+            used to read the files. If None (and executor is None) the files
+            are read one by one. The default is None.
+        executor : concurrent.futures.Executor, optional
+            only used if dirname is not None. The executor used to read the
+            files. The default is None.
+        errors : str, optional
+            only used if dirname is not None. If 'raise' an error while
+            reading a file is raised. If 'report' the file is skipped and
+            added to meta['failed_files'] of the collection. The default is
+            'raise'.
+        parse_cache : str or ParseCache, optional
+            only used if dirname is not None. A cache (or the directory of a
+            cache) with the parsed files, only the new or changed files are
+            parsed. The default is None.
         kwargs:
             kwargs are passed to the io_dino.download_dino_within_extent() or
             the io_dino.read_dino_dir() function
@@ -232,7 +372,8 @@ class ObsCollection(pd.DataFrame):
                     'force_unpack': force_unpack,
                     'preserve_datetime': preserve_datetime,
                     'verbose': verbose,
-                    'keep_all_obs': keep_all_obs
+                    'keep_all_obs': keep_all_obs,
+                    'lazy': lazy
                     }
 
             obs_list = read_dino_dir(dirname,
@@ -244,7 +385,15 @@ class ObsCollection(pd.DataFrame):
                                      preserve_datetime,
                                      verbose,
                                      keep_all_obs,
+                                     lazy=lazy,
+                                     max_memory=max_memory,
+                                     n_workers=n_workers,
+                                     executor=executor,
+                                     errors=errors,
+                                     parse_cache=parse_cache,
                                      **kwargs)
+            if errors == 'report':
+                obs_list, meta['failed_files'] = obs_list
 
         elif extent is not None or bbox is not None:
             # read dino data within extent
@@ -363,7 +512,8 @@ class ObsCollection(pd.DataFrame):
         suffix : str
             suffix of files in subdir that will be read
         unpackdir : str
-            destination directory of the unzipped file
+            destination directory of the unzipped file. If None (default) the
+            files are read from the zip file without extracting it
         force_unpack : boolean, optional
             force unpack if dst already exists
         preserve_datetime : boolean, optional
@@ -431,6 +581,10 @@ class ObsCollection(pd.DataFrame):
             keep_all_obs=True,
             name=None,
             verbose=False,
+            n_workers=None,
+            executor=None,
+            errors='raise',
+            parse_cache=None,
             **kwargs):
         """ Read a dino directory
 
@@ -447,7 +601,8 @@ class ObsCollection(pd.DataFrame):
         suffix : str
             suffix of files in subdir that will be read
         unpackdir : str
-            destination directory of the unzipped file
+            destination directory of the unzipped file. If None (default) the
+            files are read from the zip file without extracting it
         force_unpack : boolean, optional
             force unpack if dst already exists
         preserve_datetime : boolean, optional
@@ -459,6 +614,19 @@ class ObsCollection(pd.DataFrame):
             the name of the observation collection
         verbose : boolean, optional
             Print additional information to the screen (default is False).
+        n_workers : int, optional
+            number of worker processes used to read the files. If None (and
+            executor is None) the files are read one by one. The default is
+            None.
+        executor : concurrent.futures.Executor, optional
+            executor used to read the files. The default is None.
+        errors : str, optional
+            if 'raise' an error while reading a file is raised. If 'report'
+            the file is skipped and added to meta['failed_files'] of the
+            collection. The default is 'raise'.
+        parse_cache : str or ParseCache, optional
+            cache (or the directory of a cache) with the parsed files, only
+            the new or changed files are parsed. The default is None.
         kwargs:
             kwargs are passed to the io_dino.read_dino_dir() function
 
@@ -493,7 +661,13 @@ class ObsCollection(pd.DataFrame):
             preserve_datetime,
             verbose,
             keep_all_obs,
+            n_workers=n_workers,
+            executor=executor,
+            errors=errors,
+            parse_cache=parse_cache,
             **kwargs)
+        if errors == 'report':
+            obs_list, meta['failed_files'] = obs_list
 
         obs_df = util._obslist_to_frame(obs_list)
 
@@ -504,7 +678,9 @@ class ObsCollection(pd.DataFrame):
                   translate_dic={'locationId': 'locatie'}, locations=None,
                   to_mnap=True, remove_nan=True, low_memory=True,
                   unpackdir=None, force_unpack=False,
-                  preserve_datetime=False, verbose=False):
+                  preserve_datetime=False, verbose=False, lazy=False,
+                  max_memory=None, chunksize=None, n_workers=None,
+                  executor=None):
         """Read one or several XML-files with measurements from FEWS.
 
         Parameters
@@ -531,24 +707,64 @@ class ObsCollection(pd.DataFrame):
             whether to use xml-parsing method with lower memory footprint,
             default is True
         unpackdir : str
-            destination directory to unzip file if fname is a .zip
+            destination directory to unzip file if fname is a .zip. If None
+            (default) the files are read from the zip file without
+            extracting it
         force_unpack : boolean, optional
             force unpack if dst already exists
         preserve_datetime : boolean, optional
             whether to preserve datetime from zip archive
         verbose : boolean, optional
             Print additional information to the screen (default is False).
+        lazy : boolean, optional
+            if True only the headers are read, the measurements of a series
+            are read the first time they are accessed. The default is False.
+        max_memory : int, optional
+            only used if lazy is True. The maximum memory in bytes used by
+            the measurements of the observations, the least recently used
+            observations are removed from memory when this is exceeded. The
+            default is None (no limit).
+        chunksize : int, optional
+            if not None an iterator is returned that yields ObsCollections
+            with at most chunksize observations. The files are streamed, so
+            only the observations of one chunk are in memory at a time. The
+            chunks can for instance be written to a store one by one. Not
+            supported with lazy=True. The default is None.
+        n_workers : int, optional
+            the number of worker processes used to read the files. If None
+            (and executor is None) the files are read one by one. Not used
+            with lazy=True or chunksize. The default is None.
+        executor : concurrent.futures.Executor, optional
+            the executor used to read the files. The default is None.
 
         Returns
         -------
-        cls(obs_df) : ObsCollection
-            collection of multiple point observations
+        cls(obs_df) : ObsCollection or iterator of ObsCollection
+            collection of multiple point observations, an iterator of
+            collections if chunksize is not None
+
+        Notes
+        -----
+        The same series (location, parameter, qualifiers, ensemble member,
+        time series type and module instance) in different files are
+        combined to one observation, sorted by time. The series within one
+        file are not combined. The series are not combined with lazy=True or
+        chunksize.
+
+        Examples
+        --------
+        Write every 1000 series of a large export to a parquet file:
+
+        >>> chunks = ObsCollection.from_fews('export.xml', chunksize=1000)
+        >>> for i, oc in enumerate(chunks):
+        ...     oc.to_parquet(f'export_{i}.parquet')
 
         """
-        from .io.io_xml import parse_xml_filelist
+        from .io.io_xml import iter_xml_filelist, parse_xml_filelist
 
         # get files
         dirname, unzip_fnames = util.get_files(file_or_dir, ext=".xml",
+                                               unpackdir=unpackdir,
                                                force_unpack=force_unpack,
                                                preserve_datetime=preserve_datetime)
         meta = {'filename': dirname,
@@ -556,6 +772,20 @@ class ObsCollection(pd.DataFrame):
                 'verbose': verbose
                 }
 
+        if chunksize is not None:
+            if lazy:
+                raise ValueError('chunksize is not supported with lazy=True')
+            obs_iter = iter_xml_filelist(unzip_fnames,
+                                         ObsClass,
+                                         directory=dirname,
+                                         translate_dic=translate_dic,
+                                         locations=locations,
+                                         to_mnap=to_mnap,
+                                         remove_nan=remove_nan,
+                                         verbose=verbose)
+            return cls._iter_chunks(obs_iter, chunksize, name=name,
+                                    meta=meta)
+
         obs_list = parse_xml_filelist(unzip_fnames,
                                       ObsClass,
                                       directory=dirname,
@@ -564,10 +794,29 @@ class ObsCollection(pd.DataFrame):
                                       to_mnap=to_mnap,
                                       remove_nan=remove_nan,
                                       low_memory=low_memory,
+                                      lazy=lazy,
+                                      max_memory=max_memory,
+                                      n_workers=n_workers,
+                                      executor=executor,
                                       verbose=verbose)
         obs_df = util._obslist_to_frame(obs_list)
         return cls(obs_df, name=name, meta=meta)
 
+    @classmethod
+    def _iter_chunks(cls, obs_iter, chunksize, name='', meta=None):
+        """yield ObsCollections with at most chunksize observations from an
+        iterator of observations"""
+        obs_list = []
+        for o in obs_iter:
+            obs_list.append(o)
+            if len(obs_list) == chunksize:
+                yield cls(util._obslist_to_frame(obs_list), name=name,
+                          meta=dict(meta or {}))
+                obs_list = []
+        if obs_list:
+            yield cls(util._obslist_to_frame(obs_list), name=name,
+                      meta=dict(meta or {}))
+
     @classmethod
     def from_fieldlogger(cls, fname, name='', ObsClass=obs.GroundwaterObs):
         """Read a fieldlogger file into a list of observation objects
@@ -655,19 +904,32 @@ class ObsCollection(pd.DataFrame):
         name : str, optional
             name of the obscollection. The default is ''.
         start : list of str, datetime or None]
-            start date of observations per meteo variable. The default is 
-            [None, None]
+            start date of observations per meteo variable. A single value is
+            used for every meteo variable. The default is [None, None]
         end : list of str, datetime or None]
-            end date of observations per meteo variable. The default is 
-            [None, None]
+            end date of observations per meteo variable. A single value is
+            used for every meteo variable. The default is [None, None]
         ObsClass : type or None
             class of the observations, only KnmiObs is supported for now. The 
             default is None
         **kwargs : 
             kwargs are passed to the io_knmi.get_knmi_obslist function
+
+        Notes
+        -----
+        If xmid and ymid are given, meta['station_grid'] of the collection
+        contains per meteo variable a dictionary with the station numbers
+        ('stations') and an integer array with shape (nrow, ncol) with the
+        position in 'stations' of the nearest station of every cell
+        ('grid'), see io_knmi.get_station_grid. Use the to_grid_forcing
+        method to get the measurements on the grid.
         """
 
-        from .io.io_knmi import get_knmi_obslist
+        from .io.io_knmi import get_knmi_obslist, get_station_grid
+
+        # a start and end date per meteo variable
+        start = util._broadcast(start, len(meteo_vars), 'start')
+        end = util._broadcast(end, len(meteo_vars), 'end')
 
         meta = {}
         meta['start'] = start
@@ -676,12 +938,29 @@ class ObsCollection(pd.DataFrame):
         meta['ObsClass'] = ObsClass
         meta['meteo_vars'] = meteo_vars
 
-        obs_list = get_knmi_obslist(locations, stns,
-                                    xmid, ymid,
-                                    meteo_vars,
-                                    ObsClass=ObsClass,
-                                    start=start,
-                                    end=end, **kwargs)
+        if locations is None and stns is None and xmid is not None:
+            # download every station that is nearest to a cell once
+            meta['station_grid'] = {}
+            obs_list = []
+            for i, meteo_var in enumerate(meteo_vars):
+                stns_var, grid = get_station_grid(xmid, ymid,
+                                                  meteo_var=meteo_var)
+                meta['station_grid'][meteo_var] = {'stations': stns_var,
+                                                   'grid': grid,
+                                                   'xmid': xmid,
+                                                   'ymid': ymid}
+                obs_list.extend(get_knmi_obslist(stns=stns_var,
+                                                 meteo_vars=[meteo_var],
+                                                 ObsClass=ObsClass,
+                                                 start=[start[i]],
+                                                 end=[end[i]], **kwargs))
+        else:
+            obs_list = get_knmi_obslist(locations, stns,
+                                        xmid, ymid,
+                                        meteo_vars,
+                                        ObsClass=ObsClass,
+                                        start=start,
+                                        end=end, **kwargs)
 
         obs_df = util._obslist_to_frame(obs_list)
 
@@ -776,7 +1055,8 @@ class ObsCollection(pd.DataFrame):
                      ObsClass=obs.GroundwaterObs,
                      extent=None, collection_names=None,
                      item_names=None, nameby="item",
-                     read_series=True, verbose=True, progressbar=False):
+                     read_series=True, verbose=True, progressbar=False,
+                     lazy=False, max_memory=None):
         """Create ObsCollection from pystore store
 
         Parameters
@@ -806,6 +1086,15 @@ class ObsCollection(pd.DataFrame):
         progressbar : bool, optional
             whether to show progress bar, default is False, for
             best result set verbose to False!
+        lazy : bool, optional
+            if True only the metadata of the items is read, the data of an
+            item is read the first time it is accessed. Overrules
+            read_series. The default is False.
+        max_memory : int, optional
+            only used if lazy is True. The maximum memory in bytes used by
+            the data of the observations, the least recently used
+            observations are removed from memory when this is exceeded. The
+            default is None (no limit).
 
         Returns
         -------
@@ -825,7 +1114,8 @@ class ObsCollection(pd.DataFrame):
                                 collection_names=collection_names,
                                 item_names=item_names, nameby=nameby,
                                 read_series=read_series, verbose=verbose,
-                                progressbar=progressbar)
+                                progressbar=progressbar, lazy=lazy,
+                                max_memory=max_memory)
         # if read series is False, returns dataframe with only metadata
         if isinstance(obs_list, list):
             obs_df = util._obslist_to_frame(obs_list)
@@ -836,6 +1126,77 @@ class ObsCollection(pd.DataFrame):
 
         return cls(obs_df, name=storename, meta=meta)
 
+    @classmethod
+    def from_memmap(cls, dirname, mmap_mode='r'):
+        """Read an ObsCollection from a directory written with to_memmap.
+
+        The arrays with measurements are memory-mapped and the observations
+        are views on the mapped files, the measurements are only read from
+        disk when they are used. Processes that read the same directory
+        share the memory through the page cache.
+
+        Parameters
+        ----------
+        dirname : str
+            directory written with to_memmap.
+        mmap_mode : str or None, optional
+            the mode to memory-map the arrays, see numpy.load. With 'r' the
+            measurements are read-only, with 'c' changes are kept in memory
+            and not written to disk. If None the arrays are read into memory.
+            The default is 'r'.
+
+        Returns
+        -------
+        ObsCollection
+            Collection of observations backed by a columnar store
+
+        """
+        from .io.io_memmap import read_memmap
+
+        obs_df, name, meta, store = read_memmap(dirname, mmap_mode=mmap_mode)
+
+        return cls(obs_df, name=name, meta=meta, _store=store)
+
+    @classmethod
+    def from_parquet(cls, fname, names=None, extent=None, tmin=None,
+                     tmax=None, columns=None):
+        """Read (a selection of) an ObsCollection from a parquet file written
+        with to_parquet.
+
+        The selection on names and extent is done on the metadata, the
+        selection on time is passed on to the parquet reader. Only the row
+        groups with selected measurements are read.
+
+        Parameters
+        ----------
+        fname : str
+            name of the parquet file.
+        names : list of str, optional
+            only read the observations with these names. The default is None.
+        extent : list, tuple or numpy-array, optional
+            only read the observations within this extent
+            [xmin, xmax, ymin, ymax]. The default is None.
+        tmin : str or datetime, optional
+            only read the measurements at or after tmin. The default is None.
+        tmax : str or datetime, optional
+            only read the measurements at or before tmax. The default is None.
+        columns : list of str, optional
+            only read these columns of the observations. The default is None.
+
+        Returns
+        -------
+        ObsCollection
+            Collection of observations
+
+        """
+        from .io.io_parquet import read_parquet
+
+        obs_df, name, meta = read_parquet(fname, names=names, extent=extent,
+                                          tmin=tmin, tmax=tmax,
+                                          columns=columns)
+
+        return cls(obs_df, name=name, meta=meta)
+
     @classmethod
     def from_waterinfo(cls, file_or_dir, name="", ObsClass=obs.WaterlvlObs,
                        progressbar=True):
@@ -875,7 +1236,50 @@ class ObsCollection(pd.DataFrame):
     @classmethod
     def from_wiski(cls, dirname, ObsClass=obs.GroundwaterObs, suffix='.csv',
                    unpackdir=None, force_unpack=False, preserve_datetime=False,
-                   verbose=False, keep_all_obs=True, **kwargs):
+                   verbose=False, keep_all_obs=True, lazy=False,
+                   max_memory=None, parse_cache=None, **kwargs):
+        """Read a directory or zip-file with wiski csv files.
+
+        Parameters
+        ----------
+        dirname : str
+            directory or .zip file with wiski csv files
+        ObsClass : type, optional
+            class of the observations, by default GroundwaterObs
+        suffix : str, optional
+            suffix of the files that are read, by default '.csv'
+        unpackdir : str, optional
+            destination directory of the unzipped file. If None (default)
+            the files are read from the zip file without extracting it
+        force_unpack : boolean, optional
+            force unpack if dst already exists
+        preserve_datetime : boolean, optional
+            use date of the zipfile for the destination file
+        verbose : boolean, optional
+            Print additional information to the screen (default is False).
+        keep_all_obs : boolean, optional
+            add all observation points to the collection, even without
+            metadata
+        lazy : boolean, optional
+            if True only the headers are read, the measurements of an
+            observation are read the first time they are accessed. The
+            default is False.
+        max_memory : int, optional
+            only used if lazy is True. The maximum memory in bytes used by
+            the measurements of the observations, the least recently used
+            observations are removed from memory when this is exceeded. The
+            default is None (no limit).
+        parse_cache : str or ParseCache, optional
+            cache (or the directory of a cache) with the parsed files, only
+            the new or changed files are parsed. The default is None.
+        kwargs:
+            kwargs are passed to the io_wiski.read_wiski_dir() function
+
+        Returns
+        -------
+        ObsCollection
+            collection of multiple point observations
+        """
 
         from .io.io_wiski import read_wiski_dir
 
@@ -898,6 +1302,9 @@ class ObsCollection(pd.DataFrame):
                                   preserve_datetime=preserve_datetime,
                                   verbose=verbose,
                                   keep_all_obs=keep_all_obs,
+                                  lazy=lazy,
+                                  max_memory=max_memory,
+                                  parse_cache=parse_cache,
                                   **kwargs)
         obs_df = util._obslist_to_frame(obs_list)
 
@@ -969,9 +1376,38 @@ class ObsCollection(pd.DataFrame):
 
         return f_df
 
-    def to_pi_xml(self, fname, timezone="", version="1.24"):
+    def to_pi_xml(self, fname, timezone="", version="1.24", binary=False,
+                  value_column='value', compression='infer',
+                  chunksize=100000):
+        """write the observations to a FEWS PI-XML file.
+
+        Parameters
+        ----------
+        fname : str
+            path of the XML-file, with the extension .xml or .xml.gz.
+        timezone : str or float, optional
+            the time zone of the XML-file. The default is "".
+        version : str, optional
+            the version of the PI-XML format. The default is "1.24".
+        binary : bool, optional
+            if True the values are written to a PI binary file next to the
+            XML-file, see io_xml.write_pi_xml. The default is False.
+        value_column : str, optional
+            only used if binary is True. The column with the values that are
+            written to the binary file. The default is 'value'.
+        compression : str or None, optional
+            'gzip' to compress the XML-file, None to write an uncompressed
+            file. If 'infer' the file is compressed if fname ends with '.gz'.
+            The default is 'infer'.
+        chunksize : int, optional
+            the number of events that is written at a time, so the memory
+            that is used does not depend on the length of the series. The
+            default is 100000.
+        """
         from .io import io_xml
-        io_xml.write_pi_xml(self, fname, timezone=timezone, version=version)
+        io_xml.write_pi_xml(self, fname, timezone=timezone, version=version,
+                            binary=binary, value_column=value_column,
+                            compression=compression, chunksize=chunksize)
 
     def to_pystore(self, store_name, pystore_path, groupby, item_name=None,
                    overwrite=False):
@@ -1021,6 +1457,46 @@ class ObsCollection(pd.DataFrame):
                 collection.write(name, o, metadata=imeta,
                                  overwrite=overwrite)
 
+    def to_parquet(self, fname, row_group_size=100000,
+                   compression='snappy'):
+        """Write the ObsCollection to a single parquet file. The measurements
+        of all observations are stored in long format, sorted by name and
+        time. The collection table and the attributes of the observations
+        are stored in the metadata of the file.
+
+        Parameters
+        ----------
+        fname : str
+            name of the parquet file.
+        row_group_size : int, optional
+            maximum number of measurements in a row group, by default 100000
+        compression : str, optional
+            compression of the parquet file, by default 'snappy'
+        """
+        from .io.io_parquet import write_parquet
+
+        write_parquet(self, fname, row_group_size=row_group_size,
+                      compression=compression)
+
+    def to_memmap(self, dirname, columns=None):
+        """Write the ObsCollection to a directory with arrays that can be
+        memory-mapped when reading with from_memmap. The measurements are
+        stored as in a columnar store (see to_columnar), the collection table
+        and the attributes of the observations in a json file.
+
+        Parameters
+        ----------
+        dirname : str
+            directory, created if it does not exist.
+        columns : list of str, optional
+            the columns that are stored. If None all numeric columns of the
+            observations are stored. Other columns are not written. The
+            default is None.
+        """
+        from .io.io_memmap import write_memmap
+
+        write_memmap(self, dirname, columns=columns)
+
     def to_arctic(self, connstr, libname, verbose=False):
         """Write ObsCollection to MongoDB using Arctic
 
@@ -1052,6 +1528,49 @@ class ObsCollection(pd.DataFrame):
             metadata = o.meta
             lib.write(o.name, o, metadata=metadata)
 
+    def to_columnar(self, columns=None, inplace=False):
+        """Store the measurements of all observations in a columnar store.
+
+        All measurements are stored in one contiguous array per column, with
+        one shared array of timestamps and an array with offsets per
+        observation. The observations in the obs column are replaced by views
+        on these arrays. Collection-wide statistics (e.g. in the stats
+        accessor) are then computed in a single pass over these arrays.
+
+        Parameters
+        ----------
+        columns : list of str, optional
+            the columns that are stored. If None all numeric columns of the
+            observations are stored. Other columns are not available in the
+            new observations. The default is None.
+        inplace : bool, optional
+            Modify the ObsCollection in place (do not create a new object).
+            The default is False.
+
+        Returns
+        -------
+        ObsCollection or None
+            ObsCollection backed by a columnar store, None if inplace is True.
+            The measurements of lazy observations are read and stored, the
+            observations in the new collection are not lazy.
+
+        """
+        from .columnar import ColumnarStore
+
+        store = ColumnarStore.from_obs_list(list(self.obs.values), columns)
+        obs_arr = np.empty(len(store), dtype=object)
+        for i, o in enumerate(store.obs_list):
+            obs_arr[i] = o
+
+        if inplace:
+            self['obs'] = obs_arr
+            self._store = store
+        else:
+            oc = self.copy()
+            oc['obs'] = obs_arr
+            oc._store = store
+            return oc
+
     def to_gdf(self, xcol='x', ycol='y'):
         """convert ObsCollection to GeoDataFrame
 
@@ -1069,6 +1588,27 @@ class ObsCollection(pd.DataFrame):
         """
         return util.df2gdf(self, xcol, ycol)
 
+    def to_grid_forcing(self, meteo_var):
+        """get the measurements of a meteo variable on the grid of a
+        collection created with from_knmi with xmid and ymid.
+
+        The measurements are stored once per station, the values of the
+        cells (time, row, col) are created when they are requested, see
+        GridForcing.get_values and GridForcing.iter_chunks.
+
+        Parameters
+        ----------
+        meteo_var : str
+            meteo variable, e.g. 'RD' or 'EV24'.
+
+        Returns
+        -------
+        GridForcing
+        """
+        from .grid_forcing import GridForcing
+
+        return GridForcing.from_obscollection(self, meteo_var)
+
     def to_report_table(self, columns=['locatie', 'filternr',
                                        'Van', 'Tot', '# metingen']):
 
@@ -1201,9 +1741,79 @@ class ObsCollection(pd.DataFrame):
 
         self[key] = [o.meta[key] for o in self.obs.values]
 
+    def update_knmi(self, end=None, fill_missing_obs=True, batch_size=50,
+                    inplace=False, verbose=False):
+        """append the measurements after the last measurement to the knmi
+        observations in the collection.
+
+        Only the period after the last measurement of each station is
+        downloaded, with one request per batch_size stations.
+
+        Parameters
+        ----------
+        end : str, datetime or None, optional
+            end date of the update. If None the update ends yesterday. The
+            default is None.
+        fill_missing_obs : bool, optional
+            if True nan values in the new measurements are filled with
+            nearby stations. The default is True.
+        batch_size : int, optional
+            number of stations that is downloaded per request. The default
+            is 50.
+        inplace : bool, optional
+            Modify the ObsCollection in place (do not create a new object).
+            The default is False.
+        verbose : boolean, optional
+            Print additional information to the screen (default is False).
+
+        Returns
+        -------
+        ObsCollection or None
+            the updated ObsCollection, None if inplace is True.
+
+        See Also
+        --------
+        hydropandas.io.io_knmi.update_knmi_obslist
+        """
+        from .io.io_knmi import update_knmi_obslist
+
+        obs_list = update_knmi_obslist(list(self.obs.values), end=end,
+                                       fill_missing_obs=fill_missing_obs,
+                                       batch_size=batch_size,
+                                       verbose=verbose)
+        obs_arr = np.empty(len(obs_list), dtype=object)
+        for i, o in enumerate(obs_list):
+            obs_arr[i] = o
+
+        if inplace:
+            self['obs'] = obs_arr
+        else:
+            oc = self.copy()
+            oc['obs'] = obs_arr
+            return oc
+
     def get_series(self, tmin=None, tmax=None, col="stand_m_tov_nap"):
         if tmin is None:
-            tmin = self.dates_first_obs.min()
+            tmin = self.stats.dates_first_obs.min()
         if tmax is None:
-            tmax = self.dates_last_obs.max()
+            tmax = self.stats.dates_last_obs.max()
+
+        positions = self._get_store_positions()
+        if positions is not None and col in self._store.columns:
+            pos, times, values = self._store.get_series(col, tmin, tmax)
+            series = pd.Series(values,
+                               index=pd.MultiIndex.from_arrays([pos, times]))
+            df = series.unstack().reindex(positions)
+            df.index = self.index
+            return df
+
+        # only slice the observations with measurements in the period
+        active = self.stats.coverage.active(tmin, tmax)
+        if active.any() and not active.all():
+            obs_pos = pd.Series(self.obs.values, index=np.arange(len(self)))
+            df = obs_pos[active].apply(lambda o: o.loc[tmin:tmax, col])
+            df = df.reindex(np.arange(len(self)))
+            df.index = self.index
+            return df
+
         return self.obs.apply(lambda o: o.loc[tmin:tmax, col])
@@ -20,6 +20,8 @@ import warnings
 import numpy as np
 from pandas import DataFrame
 
+from . import util
+
 
 class Obs(DataFrame):
     """class for point observations.
@@ -44,12 +46,15 @@ class Obs(DataFrame):
 
     """
     # temporary properties
-    _internal_names = DataFrame._internal_names + ['none']
+    _internal_names = DataFrame._internal_names + ['none', '_watchers']
     _internal_names_set = set(_internal_names)
 
     # normal properties
     _metadata = ['x', 'y', 'name', 'meta', 'filename']
 
+    # the ChangeSets that are notified when the data changes, see util._watch
+    _watchers = None
+
     def __init__(self, *args, **kwargs):
         """ constructor of Obs class
 
@@ -69,6 +74,15 @@ class Obs(DataFrame):
     def _constructor(self):
         return Obs
 
+    def _clear_item_cache(self):
+        # pandas clears the item cache when the data or the index changes
+        util._notify_watchers(self)
+        super(Obs, self)._clear_item_cache()
+
+    def __delitem__(self, key):
+        super(Obs, self).__delitem__(key)
+        self._clear_item_cache()
+
     def to_collection_dict(self, include_meta=False):
         """get dictionary with registered attributes and their values
         of an Obs object.
@@ -483,33 +497,42 @@ class KnmiObs(Obs):
 
     @classmethod
     def from_knmi(cls, stn, variable, startdate=None, enddate=None,
-                  fill_missing_obs=True, verbose=False):
+                  fill_missing_obs=True, verbose=False, batch_size=None,
+                  interval='daily', aggregate=None):
         from .io import io_knmi
 
         ts, meta = io_knmi.get_knmi_timeseries_stn(stn, variable,
                                                    startdate, enddate,
                                                    fill_missing_obs,
-                                                   verbose=verbose)
+                                                   interval=interval,
+                                                   verbose=verbose,
+                                                   batch_size=batch_size,
+                                                   aggregate=aggregate)
         
         return cls(ts, meta=meta, station=meta['station'], x=meta['x'],
                    y=meta['y'], name=meta['name'])
 
     @classmethod
     def from_nearest_xy(cls, x, y, variable, startdate=None, enddate=None,
-                        fill_missing_obs=True, verbose=False):
+                        fill_missing_obs=True, verbose=False,
+                        batch_size=None, interval='daily', aggregate=None):
         from .io import io_knmi
 
         ts, meta = io_knmi.get_knmi_timeseries_xy(x, y, variable,
                                                   startdate, enddate,
                                                   fill_missing_obs,
-                                                  verbose=verbose)
+                                                  interval=interval,
+                                                  verbose=verbose,
+                                                  batch_size=batch_size,
+                                                  aggregate=aggregate)
 
         return cls(ts, meta=meta, station=meta['station'], x=meta['x'],
                    y=meta['y'], name=meta['name'])
 
     @classmethod
     def from_obs(cls, obs, variable, startdate=None, enddate=None,
-                 fill_missing_obs=True, verbose=False):
+                 fill_missing_obs=True, verbose=False, batch_size=None,
+                 interval='daily', aggregate=None):
 
         from .io import io_knmi
 
@@ -524,7 +547,59 @@ class KnmiObs(Obs):
         ts, meta = io_knmi.get_knmi_timeseries_xy(x, y, variable,
                                                   startdate, enddate,
                                                   fill_missing_obs,
-                                                  verbose=verbose)
+                                                  interval=interval,
+                                                  verbose=verbose,
+                                                  batch_size=batch_size,
+                                                  aggregate=aggregate)
 
         return cls(ts, meta=meta, station=meta['station'], x=meta['x'],
                    y=meta['y'], name=meta['name'])
+
+    def update_knmi(self, meteo_var=None, end=None, fill_missing_obs=True,
+                    inplace=False, verbose=False):
+        """append the measurements after the last measurement.
+
+        Parameters
+        ----------
+        meteo_var : str, optional
+            meteo variable of the observation. If None it is determined from
+            the columns and the meta dictionary. The default is None.
+        end : str, datetime or None, optional
+            end date of the update. If None the update ends yesterday. The
+            default is None.
+        fill_missing_obs : bool, optional
+            if True nan values in the new measurements are filled with
+            nearby stations. The default is True.
+        inplace : bool, optional
+            if True the measurements are appended to this observation. The
+            default is False.
+        verbose : boolean, optional
+            Print additional information to the screen (default is False).
+
+        Returns
+        -------
+        KnmiObs or None
+            the updated observation, None if inplace is True.
+
+        See Also
+        --------
+        hydropandas.io.io_knmi.update_knmi_obslist
+        """
+        from .io import io_knmi
+
+        o = io_knmi.update_knmi_obslist([self], meteo_var=meteo_var,
+                                        end=end,
+                                        fill_missing_obs=fill_missing_obs,
+                                        verbose=verbose)[0]
+        if not inplace:
+            return o.copy() if o is self else o
+        if o is self:
+            return
+        self.drop(index=self.index.difference(o.index), inplace=True)
+        for col in o.columns.difference(self.columns):
+            self[col] = o[col]
+        common = o.index.intersection(self.index)
+        self.loc[common, o.columns] = o.loc[common, o.columns]
+        for t in o.index.difference(self.index):
+            self.loc[t] = o.loc[t, self.columns]
+        self.__finalize__(o)
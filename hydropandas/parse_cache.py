@@ -0,0 +1,205 @@
+"""
+module with the ParseCache class, a persistent cache of parsed files.
+
+The directory readers (e.g. read_dino_dir and read_wiski_dir) parse every
+file again each time a directory is read. With a ParseCache every parsed
+observation is stored in a cache directory, together with the size and the
+modification time of the file it was read from. When the directory is read
+again, only the files that are new or changed since they were cached are
+parsed, the other observations are read from the cache.
+
+Optionally a hash of the content of a file is stored as well. A file with
+another modification time but the same content (e.g. a file that is
+downloaded again every night) is then also read from the cache.
+
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+from . import util
+
+
+def _get_file_stamp(fname):
+    """get the size and modification time of a file on disk or of a file in a
+    zip file."""
+    zipname, member = util._split_zip_path(fname)
+    if member is None:
+        stat = os.stat(fname)
+        return stat.st_size, stat.st_mtime
+
+    # same comparison as in util.unzip_changed_files
+    mtime = os.path.getmtime(zipname)
+    zipname, member = util._split_zip_member(zipname, member)
+    info = util._open_zip(zipname, mtime).getinfo(member)
+    return info.file_size, time.mktime(info.date_time + (0, 0, -1))
+
+
+def _get_file_hash(fname):
+    """get the sha1 hash of the content of a file"""
+    sha1 = hashlib.sha1()
+    with util.open_file(fname, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+class ParseCache:
+    """Persistent cache of observations parsed from files.
+
+    Parameters
+    ----------
+    path : str
+        directory with the cached observations, created if it does not
+        exist.
+    use_hash : bool, optional
+        if True a hash of the content of the files is stored as well. A file
+        of which the size or modification time changed is then only parsed
+        again if the content changed. The default is False.
+
+    Notes
+    -----
+    The observations are stored with pickle. Only use a cache directory that
+    is written by yourself.
+    """
+
+    def __init__(self, path, use_hash=False):
+        self.path = path
+        self.use_hash = use_hash
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def __repr__(self):
+        return '{}(path={}, use_hash={})'.format(
+            self.__class__.__name__, self.path, self.use_hash)
+
+    @staticmethod
+    def get_key(func, kwargs):
+        """get the part of the key of the cache that depends on the reader,
+        the same file read with other arguments is cached separately.
+
+        Parameters
+        ----------
+        func : callable
+            function that reads the file
+        kwargs : dict
+            the keyword arguments of func
+
+        Returns
+        -------
+        str
+        """
+        owner = getattr(func, '__self__', None)
+        name = '{}.{}'.format(getattr(owner, '__name__', ''),
+                              getattr(func, '__qualname__', repr(func)))
+        # verbose does not change the result
+        return '{}({})'.format(name, ', '.join(
+            '{}={!r}'.format(k, kwargs[k]) for k in sorted(kwargs)
+            if k != 'verbose'))
+
+    def _get_entry_fname(self, fname, key):
+        fname = os.path.abspath(fname)
+        digest = hashlib.sha1('{}\0{}'.format(fname, key).encode()).hexdigest()
+        return os.path.join(self.path, digest + '.pickle')
+
+    def get(self, fname, key=''):
+        """get a cached observation.
+
+        Parameters
+        ----------
+        fname : str
+            path of the file.
+        key : str, optional
+            key of the reader, see get_key. The default is ''.
+
+        Returns
+        -------
+        observation.Obs or None
+            the cached observation, None if the file is not in the cache or
+            if it changed since it was cached.
+        """
+        entry_fname = self._get_entry_fname(fname, key)
+        if not os.path.isfile(entry_fname):
+            return None
+        try:
+            with open(entry_fname, 'rb') as f:
+                entry = pickle.load(f)
+        except Exception:
+            # incomplete or incompatible entry, parse the file again
+            return None
+
+        size, mtime = _get_file_stamp(fname)
+        if (entry['size'], entry['mtime']) == (size, mtime):
+            return entry['obs']
+        if self.use_hash and entry['hash'] is not None:
+            if entry['hash'] == _get_file_hash(fname):
+                # store the new stamp, so the hash is not computed again
+                self.put(fname, entry['obs'], key, file_hash=entry['hash'])
+                return entry['obs']
+
+        return None
+
+    def put(self, fname, obs, key='', file_hash=None):
+        """store an observation in the cache.
+
+        Parameters
+        ----------
+        fname : str
+            path of the file the observation is read from.
+        obs : observation.Obs
+            the observation.
+        key : str, optional
+            key of the reader, see get_key. The default is ''.
+        file_hash : str, optional
+            hash of the content of the file, computed if None and use_hash is
+            True. The default is None.
+        """
+        size, mtime = _get_file_stamp(fname)
+        if self.use_hash and file_hash is None:
+            file_hash = _get_file_hash(fname)
+        entry = {'fname': os.path.abspath(fname), 'key': key, 'size': size,
+                 'mtime': mtime, 'hash': file_hash, 'obs': obs}
+
+        # write to a temporary file first, so an interrupted write does not
+        # leave an incomplete entry behind
+        fd, tmp_fname = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_fname, self._get_entry_fname(fname, key))
+        except BaseException:
+            os.remove(tmp_fname)
+            raise
+
+    def read(self, func, fname, **kwargs):
+        """read a file with func, or get the observation from the cache if
+        the file did not change since it was cached.
+
+        Parameters
+        ----------
+        func : callable
+            function that reads the file, called as func(fname=fname,
+            **kwargs).
+        fname : str
+            path of the file.
+        **kwargs :
+            passed to func.
+
+        Returns
+        -------
+        observation.Obs
+        """
+        key = self.get_key(func, kwargs)
+        obs = self.get(fname, key)
+        if obs is None:
+            obs = func(fname=fname, **kwargs)
+            self.put(fname, obs, key)
+        return obs
+
+    def clear(self):
+        """remove all cached observations"""
+        for fname in os.listdir(self.path):
+            if fname.endswith('.pickle'):
+                os.remove(os.path.join(self.path, fname))
@@ -0,0 +1,336 @@
+"""
+module with the RemoteCache class, an on-disk cache of observations that are
+downloaded from a server (e.g. DINO or KNMI).
+
+Every entry of the cache contains the measurements of one location and
+variable (e.g. a DINO filter or a KNMI station and meteo variable) and the
+periods that have been downloaded. When a period is requested, only the
+parts of the period that are not in the cache are downloaded and merged
+with the cached measurements.
+
+The measurements of the last days before a download can still change (e.g.
+validated later). The part of a downloaded period within `recent` of the
+download time expires after `ttl` and is downloaded again when it is
+requested. The size of the cache is limited, the least recently used entries
+are removed when the cache becomes larger than `max_size`.
+
+The entries are parquet files with the attributes of the observation and the
+downloaded periods as json in the metadata, so no pickles are used and the
+cache can be read by other versions of hydropandas and pandas.
+
+"""
+import os
+import re
+import tempfile
+
+import pandas as pd
+
+from .io.io_parquet import (_METADATA_KEY, _get_obs_class, _loads,
+                            _obs_to_dict, _to_arrow_table)
+from .util import FileLock
+
+
+def _get_valid_periods(periods, now, ttl, recent):
+    """get the periods of which the cached measurements did not expire"""
+    valid = []
+    for start, end, downloaded in periods:
+        if ttl is not None and now - downloaded > ttl:
+            # only the measurements that were old enough are still valid
+            end = min(end, downloaded - recent)
+        if start <= end:
+            valid.append((start, end))
+    return sorted(valid)
+
+
+def _get_missing_periods(tmin, tmax, valid):
+    """get the parts of the period tmin-tmax that are not in valid"""
+    missing = []
+    t = tmin
+    for start, end in valid:
+        if t >= tmax:
+            break
+        if start > t:
+            missing.append((t, min(start, tmax)))
+        t = max(t, end)
+    if t < tmax:
+        missing.append((t, tmax))
+    return missing
+
+
+def _is_missing(val):
+    """check if an attribute of an observation has no value"""
+    return val is None or (pd.api.types.is_scalar(val) and (
+        val == '' or pd.isna(val)))
+
+
+def _merge_attrs(o, o_new):
+    """get the attributes and meta dictionary of a cached observation, only
+    the values that are missing in the cached observation are taken from a
+    newly downloaded observation"""
+    attrs = _obs_to_dict(o)['attrs']
+    for att, val in _obs_to_dict(o_new)['attrs'].items():
+        if _is_missing(attrs.get(att)):
+            attrs[att] = val
+    meta = {**o_new.meta, **o.meta}
+    return attrs, meta
+
+
+def _get_remote_cache(cache):
+    """get a RemoteCache from the cache argument of a download function,
+    which can be a boolean, a directory or a RemoteCache"""
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return RemoteCache()
+    if isinstance(cache, RemoteCache):
+        return cache
+    return RemoteCache(cache)
+
+
+class RemoteCache:
+    """On-disk cache of observations downloaded from a server.
+
+    Parameters
+    ----------
+    path : str, optional
+        directory of the cache, created if it does not exist. If None a
+        directory 'hydropandas' in the temporary directory is used. The
+        default is None.
+    max_size : int, optional
+        maximum size of the cache in bytes. The least recently used entries
+        are removed when the cache becomes larger. If None the size is not
+        limited. The default is 1 GB.
+    ttl : pandas.Timedelta or str, optional
+        time to live of recent measurements, after this time the recent
+        measurements are downloaded again. If None recent measurements do not
+        expire. The default is 1 day.
+    recent : pandas.Timedelta or str, optional
+        measurements within this period before the time of the download are
+        recent. The default is 30 days.
+    lock_timeout : float, optional
+        maximum time in seconds to wait while another process or thread
+        downloads the same entry. If None there is no maximum. The default is
+        None.
+
+    Notes
+    -----
+    The index of the cached observations is converted to a DatetimeIndex.
+
+    Multiple processes can share a cache directory. The entries are written
+    to a temporary file first and then renamed, so an entry is never read
+    while it is written. A lock file per entry makes sure that the same
+    entry is downloaded only once when it is requested by multiple
+    processes at the same time. The lock file is removed with the entry.
+    """
+
+    def __init__(self, path=None, max_size=2**30, ttl='1D', recent='30D',
+                 lock_timeout=None):
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(), 'hydropandas')
+        self.path = path
+        self.max_size = max_size
+        self.ttl = None if ttl is None else pd.Timedelta(ttl)
+        self.recent = pd.Timedelta(recent)
+        self.lock_timeout = lock_timeout
+        if not os.path.isdir(path):
+            os.makedirs(path, exist_ok=True)
+
+    def __repr__(self):
+        return '{}(path={}, max_size={}, ttl={}, recent={})'.format(
+            self.__class__.__name__, self.path, self.max_size, self.ttl,
+            self.recent)
+
+    def _get_entry_fname(self, key):
+        name = '-'.join(str(k) for k in key)
+        return os.path.join(self.path,
+                            re.sub(r'[^\w\-.]', '_', name) + '.parquet')
+
+    def get_entry(self, key):
+        """get a cached observation and the downloaded periods.
+
+        Parameters
+        ----------
+        key : tuple
+            key of the entry, e.g. ('knmi', 260, 'RD', 'daily').
+
+        Returns
+        -------
+        o : observation.Obs or None
+            cached observation, None if the key is not in the cache.
+        periods : list of tuples
+            the start, end and time of download of the downloaded periods.
+        """
+        import pyarrow.parquet as pq
+
+        fname = self._get_entry_fname(key)
+        try:
+            table = pq.read_table(fname)
+        except (FileNotFoundError, OSError):
+            return None, []
+        info = _loads(table.schema.metadata[_METADATA_KEY])
+        # mark the entry as recently used
+        os.utime(fname)
+
+        data = table.to_pandas()
+        data = data.set_index('time').rename_axis(info['index_name'])
+        ObsClass = _get_obs_class(info['obs_class'])
+        o = ObsClass(data, meta=info['meta'], **info['attrs'])
+        periods = [tuple(pd.Timestamp(t) for t in period)
+                   for period in info['periods']]
+        return o, periods
+
+    def put_entry(self, key, o, periods):
+        """store an observation and the downloaded periods in the cache.
+
+        Parameters
+        ----------
+        key : tuple
+            key of the entry, e.g. ('knmi', 260, 'RD', 'daily').
+        o : observation.Obs
+            the observation
+        periods : list of tuples
+            the start, end and time of download of the downloaded periods.
+        """
+        info = _obs_to_dict(o)
+        info['index_name'] = o.index.name
+        info['periods'] = [[t.isoformat() for t in period]
+                           for period in periods]
+        data = pd.DataFrame(o).rename_axis('time').reset_index()
+        data.columns = [str(col) for col in data.columns]
+        table = _to_arrow_table(data, info)
+
+        # write to a temporary file first, so an interrupted write does not
+        # leave an incomplete entry behind
+        import pyarrow.parquet as pq
+        fd, tmp_fname = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp_fname)
+            os.replace(tmp_fname, self._get_entry_fname(key))
+        except BaseException:
+            os.remove(tmp_fname)
+            raise
+
+        self._evict()
+
+    def read(self, key, fetch, tmin, tmax):
+        """get an observation for the period tmin-tmax, only the parts of
+        the period that are not in the cache are downloaded.
+
+        Parameters
+        ----------
+        key : tuple
+            key of the entry, e.g. ('knmi', 260, 'RD', 'daily'). Should
+            contain everything that changes the downloaded measurements,
+            except the period.
+        fetch : callable
+            function that downloads an observation, called as
+            fetch(tmin, tmax).
+        tmin : str or datetime
+            start of the period.
+        tmax : str or datetime
+            end of the period.
+
+        Returns
+        -------
+        observation.Obs
+            observation with the measurements between tmin and tmax.
+        """
+        tmin = pd.Timestamp(tmin)
+        tmax = pd.Timestamp(tmax)
+        o, periods, missing = self._get_missing(key, tmin, tmax)
+
+        if missing:
+            # only one process or thread downloads the missing periods of an
+            # entry, the others wait for the lock and read the entry after
+            lock = FileLock(self._get_entry_fname(key) + '.lock',
+                            timeout=self.lock_timeout)
+            with lock:
+                o, periods, missing = self._get_missing(key, tmin, tmax)
+                if missing:
+                    o = self._fetch_missing(key, fetch, o, periods, missing)
+
+        if o.empty:
+            return o
+        return o.loc[tmin:tmax]
+
+    def _get_missing(self, key, tmin, tmax):
+        """get the cached observation, the downloaded periods and the
+        periods between tmin and tmax that are not (or no longer) cached"""
+        o, periods = self.get_entry(key)
+        valid = _get_valid_periods(periods, pd.Timestamp.now(), self.ttl,
+                                   self.recent)
+        return o, periods, _get_missing_periods(tmin, tmax, valid)
+
+    def _fetch_missing(self, key, fetch, o, periods, missing):
+        """download the missing periods and store the merged observation"""
+        now = pd.Timestamp.now()
+        for start, end in missing:
+            o_new = fetch(start, end)
+            if not o_new.empty:
+                o_new.index = pd.DatetimeIndex(o_new.index)
+            if o is not None:
+                # the new measurements replace the cached measurements, the
+                # attributes of the cached observation are kept
+                data = pd.concat([o, o_new])
+                data = data[~data.index.duplicated(keep='last')]
+                attrs, meta = _merge_attrs(o, o_new)
+                o_new = o.__class__(data.sort_index(), meta=meta, **attrs)
+            o = o_new
+            periods.append((start, end, now))
+        # remove the periods that are downloaded again
+        periods = [p for p in periods if not any(
+            q[0] <= p[0] and p[1] <= q[1] and q[2] > p[2] for q in periods)]
+        self.put_entry(key, o, periods)
+        return o
+
+    def _evict(self):
+        """remove the least recently used entries when the cache is larger
+        than max_size"""
+        if self.max_size is None:
+            return
+        entries = []
+        for fname in os.listdir(self.path):
+            if fname.endswith('.parquet'):
+                try:
+                    stat = os.stat(os.path.join(self.path, fname))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, fname))
+
+        size = sum(entry[1] for entry in entries)
+        for mtime, entry_size, fname in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.path, fname))
+            except FileNotFoundError:
+                pass
+            self._remove_lock(os.path.join(self.path, fname))
+            size -= entry_size
+
+    def _remove_lock(self, fname):
+        """remove the lock file of an entry, unless another process or
+        thread holds the lock"""
+        lock = FileLock(fname + '.lock', timeout=0)
+        if not os.path.isfile(lock.fname):
+            return
+        try:
+            lock.acquire()
+        except (TimeoutError, OSError):
+            return
+        try:
+            os.remove(lock.fname)
+        except OSError:
+            # on Windows a file that is open cannot be removed
+            pass
+        finally:
+            lock.release()
+
+    def clear(self):
+        """remove all cached observations"""
+        for fname in os.listdir(self.path):
+            if fname.endswith('.parquet'):
+                os.remove(os.path.join(self.path, fname))
+            elif fname.endswith('.parquet.lock'):
+                self._remove_lock(os.path.join(self.path, fname[:-5]))
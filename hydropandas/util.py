@@ -5,14 +5,21 @@ Created on Wed Sep 12 12:15:42 2018
 @author: Artesia
 """
 
+import io
 import os
+import posixpath
+import re
 import tempfile
+import threading
 import time
+import weakref
 import zipfile
+from collections import OrderedDict
 
 import numpy as np
 import pandas as pd
 import scipy.spatial.qhull as qhull
+from scipy.spatial import cKDTree
 from pandas import Timedelta, Timestamp
 
 
@@ -26,6 +33,307 @@ def _obslist_to_frame(obs_list):
     return obs_df
 
 
+def _broadcast(val, n, name):
+    """get a list with a value for each of n items (e.g. meteo variables)
+    from a single value or a list with one value or the same value for
+    every item"""
+    if not isinstance(val, (list, tuple)):
+        return [val] * n
+    if len(val) == n:
+        return list(val)
+    if len(val) > 0 and all(v == val[0] for v in val):
+        return [val[0]] * n
+    raise ValueError(f'{name} should contain a value for each of the {n} '
+                     f'items, got {len(val)}')
+
+
+class ChangeSet(set):
+    """set with the keys of the observations that changed, see _watch. A
+    subclass of set, so the observations can refer to it with a weak
+    reference."""
+
+
+def _watch(obj, changed, key):
+    """add key to the ChangeSet changed when the data or the index of obj
+    (an observation or a collection) changes, see _notify_watchers."""
+    watchers = obj._watchers
+    if watchers is None:
+        watchers = []
+        obj._watchers = watchers
+    elif watchers:
+        # remove the sets that no longer exist and the same set and key
+        watchers[:] = [(ref, k) for ref, k in watchers
+                       if ref() is not None and
+                       (ref() is not changed or k != key)]
+    watchers.append((weakref.ref(changed), key))
+
+
+def _notify_watchers(obj):
+    """add the keys of obj to the ChangeSets that watch obj"""
+    for ref, key in obj._watchers or ():
+        changed = ref()
+        if changed is not None:
+            changed.add(key)
+
+
+def _read_file(func, fname, kwargs):
+    """read a single file, module level function so it can be pickled and
+    sent to a worker process"""
+    return func(fname=fname, **kwargs)
+
+
+def _read_files(func, fnames, n_workers=None, executor=None, errors='raise',
+                parse_cache=None, **kwargs):
+    """read multiple files with the same function, optionally in parallel.
+
+    Parameters
+    ----------
+    func : callable
+        function that reads one file, called as func(fname=fname, **kwargs).
+        Should be picklable (e.g. a module level function or a classmethod)
+        if the files are read in other processes.
+    fnames : list of str
+        the files that are read.
+    n_workers : int, optional
+        number of worker processes. If None and executor is None the files
+        are read one by one in the current process. The default is None.
+    executor : concurrent.futures.Executor, optional
+        executor used to read the files, e.g. a ProcessPoolExecutor that is
+        shared by multiple calls. If None and n_workers is not None a
+        ProcessPoolExecutor with n_workers processes is used. The default is
+        None.
+    errors : str, optional
+        if 'raise' an error while reading a file is raised. If 'report' the
+        file is skipped and added to the failures. The default is 'raise'.
+    parse_cache : str or ParseCache, optional
+        cache (or the directory of a cache) with parsed files. Only the files
+        that are not in the cache or that changed since they were cached are
+        read with func. The default is None.
+    **kwargs :
+        passed to func.
+
+    Returns
+    -------
+    results : list
+        the result of func for every file, in the order of fnames. None for
+        files that could not be read.
+    failures : dict
+        filename and error message of the files that could not be read.
+    """
+    if errors not in ('raise', 'report'):
+        raise ValueError(f"errors should be 'raise' or 'report', "
+                         f"not '{errors}'")
+
+    results = [None] * len(fnames)
+    failures = {}
+
+    # get the files that did not change from the cache
+    todo = list(range(len(fnames)))
+    if parse_cache is not None:
+        from .parse_cache import ParseCache
+        if not isinstance(parse_cache, ParseCache):
+            parse_cache = ParseCache(parse_cache)
+        key = parse_cache.get_key(func, kwargs)
+        for i, fname in enumerate(fnames):
+            results[i] = parse_cache.get(fname, key)
+        todo = [i for i in todo if results[i] is None]
+
+    def handle_result(i, result):
+        results[i] = result
+        if parse_cache is not None:
+            parse_cache.put(fnames[i], result, key)
+
+    def handle_error(fname, e):
+        if errors == 'raise':
+            raise e
+        failures[fname] = '{}: {}'.format(type(e).__name__, e)
+
+    if n_workers is None and executor is None:
+        for i in todo:
+            try:
+                handle_result(i, func(fname=fnames[i], **kwargs))
+            except Exception as e:
+                handle_error(fnames[i], e)
+        return results, failures
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    pool = executor
+    if pool is None:
+        pool = ProcessPoolExecutor(n_workers)
+    futures = {}
+    try:
+        for i in todo:
+            futures[pool.submit(_read_file, func, fnames[i], kwargs)] = i
+        # store the results as they arrive, at the position of the file
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                handle_result(i, future.result())
+            except Exception as e:
+                handle_error(fnames[i], e)
+    finally:
+        for future in futures:
+            future.cancel()
+        if executor is None:
+            pool.shutdown()
+
+    return results, failures
+
+
+class FileLock:
+    """Exclusive lock on a file, that can be used by multiple processes and
+    threads. The lock is released when the process that holds it stops.
+
+    Parameters
+    ----------
+    fname : str
+        name of the lock file, created if it does not exist.
+    timeout : float, optional
+        maximum time in seconds to wait for the lock, a TimeoutError is
+        raised when it takes longer. If None there is no maximum. The default
+        is None.
+    poll_interval : float, optional
+        time in seconds between attempts to get the lock. The default is
+        0.05.
+
+    Notes
+    -----
+    The lock file can be removed while the lock is held. A process that was
+    waiting for the removed file opens the file again, so two processes
+    never hold the lock at the same time.
+    """
+
+    def __init__(self, fname, timeout=None, poll_interval=0.05):
+        self.fname = fname
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._f = None
+
+    def __repr__(self):
+        return '{}(fname={})'.format(self.__class__.__name__, self.fname)
+
+    @staticmethod
+    def _try_lock(f):
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def _is_current(self, f):
+        """check if the locked file was not removed by another process"""
+        try:
+            return os.path.samestat(os.fstat(f.fileno()), os.stat(self.fname))
+        except FileNotFoundError:
+            return False
+
+    def acquire(self):
+        """wait until the lock is acquired"""
+        start = time.monotonic()
+        while True:
+            f = open(self.fname, 'a+b')
+            if self._try_lock(f):
+                if self._is_current(f):
+                    break
+                # the file was removed while we waited, lock the new file
+                f.close()
+                continue
+            f.close()
+            if (self.timeout is not None and
+                    time.monotonic() - start >= self.timeout):
+                raise TimeoutError(f'could not lock {self.fname} within '
+                                   f'{self.timeout} seconds')
+            time.sleep(self.poll_interval)
+        self._f = f
+
+    def release(self):
+        """release the lock"""
+        f, self._f = self._f, None
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        # closing the file releases the lock with fcntl
+        f.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class RateLimiter:
+    """Limit the number of calls per second, also when the calls are made
+    from multiple threads.
+
+    Parameters
+    ----------
+    rate : float or None
+        maximum number of calls per second. If None the number of calls is
+        not limited.
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next_time = 0.
+
+    def __repr__(self):
+        return '{}(rate={})'.format(self.__class__.__name__, self.rate)
+
+    def wait(self):
+        """wait until the next call is allowed"""
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next_time, now)
+            self._next_time = start + 1. / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+def _call_with_retry(func, *args, max_retries=0, backoff_factor=1.,
+                     retry_if=None, rate_limiter=None, **kwargs):
+    """call func(*args, **kwargs) and call it again when it fails, waiting
+    backoff_factor * 2 ** n seconds before the n-th retry.
+
+    Parameters
+    ----------
+    func : callable
+        the function that is called.
+    max_retries : int, optional
+        maximum number of retries. The default is 0.
+    backoff_factor : float, optional
+        the waiting time in seconds before the first retry, doubled for every
+        next retry. The default is 1.
+    retry_if : callable, optional
+        called with the exception, only retry if it returns True. If None
+        every exception is retried. The default is None.
+    rate_limiter : RateLimiter, optional
+        used to limit the number of calls per second, retries included. The
+        default is None.
+    """
+    for n in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if n == max_retries or (retry_if is not None and
+                                    not retry_if(e)):
+                raise
+        time.sleep(backoff_factor * 2 ** n)
+
+
 def unzip_file(src, dst, force=False, preserve_datetime=False):
     """Unzip file
 
@@ -97,6 +405,166 @@ def unzip_changed_files(zipname, pathname, check_time=True, check_size=False,
                 os.utime(os.path.join(pathname, info.filename), (tz, tz))
 
 
+def _split_zip_path(fname):
+    """split a path into the path of a zip file on disk and the path of a
+    member in this zip file. The member is None if fname is not in a zip
+    file.
+    """
+    if os.path.exists(fname):
+        return fname, None
+    for match in re.finditer(r'\.zip(?=[\\/])', fname, re.IGNORECASE):
+        zipname = fname[:match.end()]
+        if os.path.isfile(zipname):
+            return zipname, fname[match.end() + 1:].replace('\\', '/')
+    return fname, None
+
+
+def _split_zip_member(zipname, member):
+    """get the path of the (nested) zip file that contains the member and
+    the path of the member in this zip file"""
+    i = member.lower().rfind('.zip/')
+    if i < 0:
+        return zipname, member
+    return os.path.join(zipname, member[:i + 4]), member[i + 5:]
+
+
+# the opened zip files, the least recently used are closed when there are more
+# than _ZIP_CACHE_SIZE
+_ZIP_CACHE_SIZE = 8
+_zip_cache = OrderedDict()
+_zip_cache_lock = threading.RLock()
+
+
+def _open_zip(zipname, mtime=None):
+    """open a zip file on disk, zipname can also be a zip file in another
+    zip file. The opened zip files are cached, so the table of contents of a
+    large archive is only read once. A zip file is opened again when the
+    modification time of the zip file on disk changed, the old handle is
+    closed. The handles of the least recently used zip files are closed
+    when more than _ZIP_CACHE_SIZE zip files are open.
+    """
+    with _zip_cache_lock:
+        if zipname in _zip_cache:
+            zf_mtime, zf = _zip_cache.pop(zipname)
+            if zf_mtime == mtime:
+                _zip_cache[zipname] = (zf_mtime, zf)
+                return zf
+            zf.close()
+
+        zipname_disk, member = _split_zip_path(zipname)
+        if member is None:
+            zf = zipfile.ZipFile(zipname)
+        else:
+            # nested zip file, read it in memory
+            parent, member = _split_zip_member(zipname_disk, member)
+            zf = zipfile.ZipFile(
+                io.BytesIO(_open_zip(parent, mtime).read(member)))
+        _zip_cache[zipname] = (mtime, zf)
+        while len(_zip_cache) > _ZIP_CACHE_SIZE:
+            _, (_, old) = _zip_cache.popitem(last=False)
+            old.close()
+        return zf
+
+
+def _clear_zip_cache():
+    """close all cached zip files"""
+    with _zip_cache_lock:
+        while _zip_cache:
+            _, (_, zf) = _zip_cache.popitem()
+            zf.close()
+
+
+def _clear_zip_cache_after_fork():
+    # a forked process should not share the file handles of the parent, the
+    # lock can be held by another thread of the parent
+    global _zip_cache_lock
+    _zip_cache_lock = threading.RLock()
+    _clear_zip_cache()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_clear_zip_cache_after_fork)
+
+
+def open_file(fname, mode='r', encoding=None):
+    """open a file on disk or a file in a (nested) zip file.
+
+    Files in a zip file are specified by the path of the zip file followed by
+    the path of the file in the zip file, e.g. 'dino.zip/subdir/file.csv' or
+    'fews.zip/nested.zip/file.xml'. The file is decompressed while it is
+    read, without extracting it to disk. Only a nested zip file is read in
+    memory.
+
+    Parameters
+    ----------
+    fname : str
+        path of the file.
+    mode : str, optional
+        'r' to read text and 'rb' to read bytes. The default is 'r'.
+    encoding : str, optional
+        encoding of a text file, the same default as the built-in open
+        function is used if None. The default is None.
+
+    Returns
+    -------
+    file object
+    """
+    zipname, member = _split_zip_path(fname)
+    if member is None:
+        return open(fname, mode, encoding=encoding)
+    if mode not in ('r', 'rb'):
+        raise ValueError('files in a zip file can only be opened for reading')
+
+    mtime = os.path.getmtime(zipname)
+    zipname, member = _split_zip_member(zipname, member)
+    try:
+        # a zip file is not closed by another thread before it is opened
+        with _zip_cache_lock:
+            f = _open_zip(zipname, mtime).open(member)
+    except KeyError:
+        raise FileNotFoundError(f'{fname} does not exist')
+    if mode == 'rb':
+        return f
+    return io.TextIOWrapper(f, encoding=encoding)
+
+
+def list_zip_files(zipname, ext='', subdir=''):
+    """list the files in a zip file and in the zip files that it contains,
+    without extracting them. The files can be opened with open_file.
+
+    Parameters
+    ----------
+    zipname : str
+        path of the zip file, can be a zip file in another zip file.
+    ext : str, optional
+        only list the files that end with ext. The default is ''.
+    subdir : str, optional
+        only list the files in this directory of the zip file. Zip files in
+        this directory are searched as well, at their root directory. The
+        default is '', the root directory of the zip file.
+
+    Returns
+    -------
+    list of str
+        paths of the files, the path of the zip file followed by the path of
+        the file in the zip file.
+    """
+    subdir = subdir.replace('\\', '/').strip('/')
+    zipname_disk, _ = _split_zip_path(zipname)
+    zf = _open_zip(zipname, os.path.getmtime(zipname_disk))
+
+    fnames = []
+    for member in zf.namelist():
+        if member.endswith('/') or posixpath.dirname(member) != subdir:
+            continue
+        if member.lower().endswith('.zip'):
+            fnames.extend(list_zip_files(os.path.join(zipname, member), ext))
+        elif member.endswith(ext):
+            fnames.append(os.path.join(zipname, member))
+
+    return fnames
+
+
 def matlab2datetime(tindex):
     """ Transform a matlab time to a datetime, rounded to seconds
 
@@ -111,12 +579,18 @@ def get_files(file_or_dir, ext, unpackdir=None, force_unpack=False,
     """internal method to get list of files with specific
     extension from dirname.
 
+    If unpackdir is None, zip files are not extracted. The files in a zip
+    file are returned as the path of the zip file followed by the path in
+    the zip file and can be read with open_file.
+
     Parameters
     ----------
     file_or_dir : str
         file or path to data
     ext : str
         extension of filenames to store in list
+    unpackdir : str, optional
+        extract zip files to this directory, by default None
     force_unpack : bool, optional
         force unzip, by default False
     preserve_datetime : bool, optional
@@ -124,6 +598,9 @@ def get_files(file_or_dir, ext, unpackdir=None, force_unpack=False,
         (useful for checking whether data has changed)
 
     """
+    if unpackdir is None:
+        return _get_files_in_zip(file_or_dir, ext)
+
     # check if unpackdir is same as file_or_dir, if same, this can cause
     # problems when the unpackdir still contains zips that will be unpacked
     # again.
@@ -180,6 +657,38 @@ def get_files(file_or_dir, ext, unpackdir=None, force_unpack=False,
     return dirname, unzip_fnames
 
 
+def _get_files_in_zip(file_or_dir, ext):
+    """get list of files with a specific extension from a file, directory or
+    zip file, without extracting zip files. Like get_files only the files in
+    the zip files of a directory are returned if there are any.
+    """
+    if file_or_dir.lower().endswith('.zip'):
+        dirname = file_or_dir
+        fnames = list_zip_files(file_or_dir, ext)
+    elif os.path.isdir(file_or_dir):
+        dirname = file_or_dir
+        zip_fnames = [i for i in os.listdir(file_or_dir) if
+                      i.endswith(".zip")]
+        if len(zip_fnames) > 0:
+            fnames = []
+            for zipf in zip_fnames:
+                fnames.extend(list_zip_files(os.path.join(dirname, zipf),
+                                             ext))
+        else:
+            fnames = [i for i in os.listdir(dirname) if i.endswith(ext)]
+            return dirname, fnames
+    elif os.path.isfile(file_or_dir) or \
+            _split_zip_path(file_or_dir)[1] is not None:
+        return os.path.dirname(file_or_dir), [os.path.basename(file_or_dir)]
+    else:
+        raise NotImplementedError("Cannot parse 'file_or_dir'!")
+
+    # the names in the zip files relative to dirname
+    fnames = [fname[len(dirname):].lstrip('\\/') for fname in fnames]
+
+    return dirname, fnames
+
+
 def interp_weights(xy, uv, d=2):
     """Calculate interpolation weights
 
@@ -245,6 +754,140 @@ def interpolate(values, vtx, wts):
     return np.einsum('nj,nj->n', np.take(values, vtx), wts)
 
 
+class SpatialIndex:
+    """Spatial index (KD-tree) on point coordinates for fast proximity
+    queries. Points with a nan coordinate are not part of the index.
+
+    Parameters
+    ----------
+    x : array-like
+        x coordinates of the points
+    y : array-like
+        y coordinates of the points
+
+    Notes
+    -----
+    All queries return positions of points, i.e. integers between 0 and the
+    number of points (including the points with nan coordinates).
+    """
+
+    def __init__(self, x, y):
+        self.x = np.array(x, dtype=float)
+        self.y = np.array(y, dtype=float)
+        valid = ~(np.isnan(self.x) | np.isnan(self.y))
+        self._positions = np.nonzero(valid)[0]
+        self._tree = cKDTree(np.column_stack([self.x[valid], self.y[valid]]))
+
+    def __len__(self):
+        return len(self.x)
+
+    def __repr__(self):
+        return '{}(npoints={})'.format(self.__class__.__name__, len(self))
+
+    def equals(self, x, y):
+        """check if the index is built from the coordinates x and y"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        return (np.array_equal(self.x, x, equal_nan=True) and
+                np.array_equal(self.y, y, equal_nan=True))
+
+    def nearest(self, x, y, k=1):
+        """get the k nearest points of one or more query points.
+
+        Parameters
+        ----------
+        x : float or array-like
+            x coordinate(s) of the query point(s)
+        y : float or array-like
+            y coordinate(s) of the query point(s)
+        k : int, optional
+            number of nearest points. The default is 1.
+
+        Returns
+        -------
+        distances : numpy.ndarray
+            distance to the nearest points, shape (n,) if k is 1 otherwise
+            (n, k). np.inf if there is no point.
+        positions : numpy.ndarray
+            positions of the nearest points, same shape as distances. -1 if
+            there is no point.
+        """
+        xq = np.atleast_1d(np.asarray(x, dtype=float))
+        yq = np.atleast_1d(np.asarray(y, dtype=float))
+        valid = ~(np.isnan(xq) | np.isnan(yq))
+
+        shape = (len(xq),) if k == 1 else (len(xq), k)
+        distances = np.full(shape, np.inf)
+        positions = np.full(shape, -1, dtype=int)
+        if valid.any() and len(self._positions) > 0:
+            d, i = self._tree.query(np.column_stack([xq[valid], yq[valid]]),
+                                    k=k)
+            found = i < len(self._positions)
+            i[~found] = 0
+            distances[valid] = np.where(found, d, np.inf)
+            positions[valid] = np.where(found, self._positions[i], -1)
+
+        return distances, positions
+
+    def within_radius(self, x, y, r):
+        """get the points within a distance r of one or more query points.
+
+        Parameters
+        ----------
+        x : float or array-like
+            x coordinate(s) of the query point(s)
+        y : float or array-like
+            y coordinate(s) of the query point(s)
+        r : float
+            the distance, points at exactly r are included.
+
+        Returns
+        -------
+        numpy.ndarray or list of numpy.ndarray
+            sorted positions of the points within r of the query point, a
+            list with an array per query point if x and y are arrays.
+        """
+        scalar = np.ndim(x) == 0
+        xq = np.atleast_1d(np.asarray(x, dtype=float))
+        yq = np.atleast_1d(np.asarray(y, dtype=float))
+        valid = ~(np.isnan(xq) | np.isnan(yq))
+
+        result = [np.array([], dtype=int)] * len(xq)
+        if valid.any() and len(self._positions) > 0:
+            neighbours = self._tree.query_ball_point(
+                np.column_stack([xq[valid], yq[valid]]), r)
+            for i, nb in zip(np.nonzero(valid)[0], neighbours):
+                result[i] = np.sort(self._positions[nb])
+
+        if scalar:
+            return result[0]
+        return result
+
+    def within_bbox(self, xmin, xmax, ymin, ymax):
+        """get the points within a bounding box (boundaries included).
+
+        Returns
+        -------
+        numpy.ndarray
+            sorted positions of the points within the bounding box
+        """
+        if len(self._positions) == 0:
+            return np.array([], dtype=int)
+
+        # query the square (chebyshev distance, p=inf) around the center of
+        # the box that contains the box, then remove the points outside it
+        xc, yc = (xmin + xmax) / 2., (ymin + ymax) / 2.
+        r = max(xmax - xmin, ymax - ymin) / 2.
+        candidates = self._positions[self._tree.query_ball_point(
+            [xc, yc], r, p=np.inf)]
+        inside = ((self.x[candidates] >= xmin) &
+                  (self.x[candidates] <= xmax) &
+                  (self.y[candidates] >= ymin) &
+                  (self.y[candidates] <= ymax))
+
+        return np.sort(candidates[inside])
+
+
 def df2gdf(df, xcol='x', ycol='y'):
     """Make a GeoDataFrame from a DataFrame, assuming the geometry
     are points.
@@ -1,7 +1,9 @@
 # import os
 from hydropandas import observation as obs
 from hydropandas import obs_collection as oc
+import os
 import numpy as np
+import pandas as pd
 import pytest
 
 # import sys
@@ -113,6 +115,125 @@ def test_obscollection_dinozip_gw_keep_all_obs():
     return dino_gw
 
 
+def test_obscollection_dinozip_gw_lazy():
+    # only read the measurements when they are accessed
+    dino_gw = oc.ObsCollection.from_dino(
+        dirname=dinozip,
+        ObsClass=obs.GroundwaterObs,
+        subdir='Grondwaterstanden_Put',
+        suffix='1.csv',
+        lazy=True,
+        max_memory=100000,
+        verbose=False)
+    o = dino_gw.loc['B42B0003-001', 'obs']
+    assert not o.is_loaded
+    assert o['stand_m_tov_nap'].notna().any()
+    assert dino_gw.stats.n_observations.sum() > 0
+    assert o._cache.memory_usage <= 100000 or len(o._cache) == 1
+    return dino_gw
+
+
+def test_obscollection_dinozip_gw_parallel():
+    # read the files with two worker processes
+    dino_gw = oc.ObsCollection.from_dino(
+        dirname=dinozip,
+        ObsClass=obs.GroundwaterObs,
+        subdir='Grondwaterstanden_Put',
+        suffix='1.csv',
+        keep_all_obs=False,
+        n_workers=2,
+        errors='report',
+        verbose=False)
+    assert dino_gw.meta['failed_files'] == {}
+    dino_gw_seq = test_obscollection_dinozip_gw()
+    assert (dino_gw.index == dino_gw_seq.index).all()
+    return dino_gw
+
+
+def test_obscollection_dinozip_gw_unpackdir(tmp_path):
+    # the files are read from the zip file unless unpackdir is specified
+    dino_gw = test_obscollection_dinozip_gw()
+    assert dino_gw.obs.iloc[0].meta['filename'].startswith(dinozip)
+    unpackdir = str(tmp_path / 'unpackdir')
+    dino_gw_unpacked = oc.ObsCollection.from_dino(
+        dirname=dinozip,
+        ObsClass=obs.GroundwaterObs,
+        subdir='Grondwaterstanden_Put',
+        suffix='1.csv',
+        unpackdir=unpackdir,
+        force_unpack=True,
+        keep_all_obs=False)
+    assert os.path.isdir(os.path.join(unpackdir, 'Grondwaterstanden_Put'))
+    assert set(dino_gw.index) == set(dino_gw_unpacked.index)
+    return dino_gw_unpacked
+
+
+def test_obscollection_dinozip_gw_parse_cache(tmp_path):
+    # the second time the observations are read from the cache
+    from hydropandas.parse_cache import ParseCache
+    cache = ParseCache(str(tmp_path / 'parse_cache'))
+    dino_gw = [oc.ObsCollection.from_dino(
+        dirname=dinozip,
+        ObsClass=obs.GroundwaterObs,
+        subdir='Grondwaterstanden_Put',
+        suffix='1.csv',
+        keep_all_obs=False,
+        parse_cache=cache) for i in range(2)]
+    assert len(os.listdir(cache.path)) > 0
+    assert dino_gw[0].drop(columns='obs').equals(
+        dino_gw[1].drop(columns='obs'))
+    for o1, o2 in zip(dino_gw[0].obs, dino_gw[1].obs):
+        assert o1.equals(o2)
+    return dino_gw[1]
+
+
+def test_open_zip_closes_handles(tmp_path, monkeypatch):
+    # the handle of a rewritten zip file and the handles of the least
+    # recently used zip files are closed
+    import zipfile
+    from hydropandas import util
+    monkeypatch.setattr(util, '_ZIP_CACHE_SIZE', 2)
+    util._clear_zip_cache()
+
+    def write_zip(fname, text):
+        with zipfile.ZipFile(str(tmp_path / 'tmp.zip'), 'w') as zf:
+            zf.writestr('a.txt', text)
+        os.replace(str(tmp_path / 'tmp.zip'), fname)
+
+    fname = str(tmp_path / 'a.zip')
+    write_zip(fname, 'old')
+    f_old = util.open_file(os.path.join(fname, 'a.txt'))
+    zf_old = util._open_zip(fname, os.path.getmtime(fname))
+    fp_old = zf_old.fp
+
+    write_zip(fname, 'new')
+    mtime = os.path.getmtime(fname) + 10
+    os.utime(fname, (mtime, mtime))
+    with util.open_file(os.path.join(fname, 'a.txt')) as f:
+        assert f.read() == 'new'
+    assert zf_old.fp is None
+    # a file that is being read is closed after it is read
+    assert not fp_old.closed
+    assert f_old.read() == 'old'
+    f_old.close()
+    assert fp_old.closed
+    assert list(util._zip_cache) == [fname]
+
+    # a nested zip file and its parent are cached, the least recently used
+    # zip file is closed
+    zf = util._open_zip(fname, mtime)
+    nested = str(tmp_path / 'nested.zip')
+    with zipfile.ZipFile(nested, 'w') as zf:
+        zf.writestr('inner.zip', open(fname, 'rb').read())
+    with util.open_file(os.path.join(nested, 'inner.zip', 'a.txt')) as f:
+        assert f.read() == 'new'
+    assert list(util._zip_cache) == [nested,
+                                     os.path.join(nested, 'inner.zip')]
+    assert zf.fp is None
+    assert util._open_zip(fname, mtime).fp is not None
+    util._clear_zip_cache()
+
+
 def test_obscollection_dinozip_wl():
     # surface water
     dino_ps = oc.ObsCollection.from_dino(
@@ -216,6 +337,18 @@ def test_obscollection_fews_lowmemory():
     return fews_gw_prod
 
 
+def test_obscollection_fews_dir(tmp_path):
+    # the xml files in a plain directory are read
+    import zipfile
+    fews_zip = r'./tests/data/2019-FEWS-test/WaalenBurg_201810-20190215_prod.zip'
+    with zipfile.ZipFile(fews_zip) as zf:
+        zf.extractall(tmp_path)
+    fews_gw_prod = oc.ObsCollection.from_fews(str(tmp_path))
+    assert set(fews_gw_prod.index) == set(
+        oc.ObsCollection.from_fews(fews_zip).index)
+    return fews_gw_prod
+
+
 def test_obscollection_fews_selection():
     fews_gw_prod = oc.ObsCollection.from_fews(
         r'./tests/data/2019-FEWS-test/WaalenBurg_201810-20190215_prod.zip',
@@ -225,6 +358,164 @@ def test_obscollection_fews_selection():
     return fews_gw_prod
 
 
+def test_obscollection_fews_chunks():
+    # the series are streamed and returned in collections of one series
+    chunks = oc.ObsCollection.from_fews(
+        r'./tests/data/2019-FEWS-test/WaalenBurg_201810-20190215_prod.zip',
+        chunksize=1)
+    fews_gw_prod = [chunk for chunk in chunks]
+    assert all(len(chunk) == 1 for chunk in fews_gw_prod)
+    return fews_gw_prod
+
+
+def test_obscollection_fews_parallel(tmp_path):
+    # the files are read in worker processes and a series that is split
+    # across files by time is combined
+    fews_gw_prod = test_obscollection_fews_lowmemory()
+    o = fews_gw_prod.loc['MPN-N-1', 'obs']
+    n = len(o) // 2
+    for i, o_part in enumerate([o.iloc[:n], o.iloc[n:]]):
+        oc.ObsCollection.from_list([o_part]).to_pi_xml(
+            str(tmp_path / f'part{i}.xml'))
+    fews_gw_parallel = oc.ObsCollection.from_fews(str(tmp_path), n_workers=2)
+    assert list(fews_gw_parallel.index) == ['MPN-N-1']
+    o_merged = fews_gw_parallel.loc['MPN-N-1', 'obs']
+    assert o_merged.index.equals(o.index)
+    assert np.allclose(o_merged['value'], o['value'], equal_nan=True)
+    return fews_gw_parallel
+
+
+def _write_fews_qualifiers(fname, series):
+    """write a PI-XML file with a series per (qualifierId, date, value)"""
+    with open(fname, 'w') as f:
+        f.write('<TimeSeries xmlns="http://www.wldelft.nl/fews/PI">\n')
+        for qualifier, date, value in series:
+            f.write('<series><header><type>instantaneous</type>'
+                    '<locationId>A</locationId><parameterId>H</parameterId>'
+                    f'<qualifierId>{qualifier}</qualifierId></header>'
+                    f'<event date="{date}" time="00:00:00" value="{value}" '
+                    'flag="0"/></series>\n')
+        f.write('</TimeSeries>\n')
+
+
+def test_obscollection_fews_qualifiers(tmp_path):
+    # the series of different qualifiers are not combined, the same series
+    # in different files are
+    _write_fews_qualifiers(tmp_path / 'a.xml', [('min', '2020-01-01', 1.),
+                                                ('max', '2020-01-01', 2.)])
+    _write_fews_qualifiers(tmp_path / 'b.xml', [('min', '2020-01-02', 3.)])
+    for low_memory in [True, False]:
+        fews = oc.ObsCollection.from_fews(str(tmp_path / 'a.xml'),
+                                          low_memory=low_memory)
+        assert len(fews) == 2
+        values = {o.meta['qualifierId']: o['value'].tolist()
+                  for o in fews.obs}
+        assert values == {'min': [1.], 'max': [2.]}
+
+    fews = oc.ObsCollection.from_fews(str(tmp_path))
+    values = {o.meta['qualifierId']: o['value'].tolist() for o in fews.obs}
+    assert values == {'min': [1., 3.], 'max': [2.]}
+
+    # multiple qualifiers of a series are kept when writing
+    o = fews.obs.iloc[0]
+    o.meta['qualifierId'] = ['min', 'day']
+    fname = str(tmp_path / 'c.xml')
+    oc.ObsCollection.from_list([o]).to_pi_xml(fname)
+    fews_c = oc.ObsCollection.from_fews(fname)
+    assert fews_c.obs.iloc[0].meta['qualifierId'] == ['min', 'day']
+    return fews
+
+
+def test_obscollection_fews_binary(tmp_path):
+    # the values are written to and read from a PI binary file
+    fews_gw_prod = test_obscollection_fews_lowmemory()
+    fname = str(tmp_path / 'test_fews_binary.xml')
+    fews_gw_prod.to_pi_xml(fname, binary=True)
+    assert (tmp_path / 'test_fews_binary.bin').is_file()
+    fews_gw_binary = oc.ObsCollection.from_fews(fname)
+    o = fews_gw_prod.loc['MPN-N-1', 'obs']
+    o_binary = fews_gw_binary.loc['MPN-N-1', 'obs']
+    assert np.allclose(o['value'], o_binary.loc[o.index, 'value'],
+                       atol=1e-6)
+    return fews_gw_binary
+
+
+def test_obscollection_to_pi_xml_gzip(tmp_path):
+    # the events are written in chunks to a gzip-compressed file
+    fews_gw_prod = test_obscollection_fews_lowmemory()
+    fname = str(tmp_path / 'test_fews.xml.gz')
+    fews_gw_prod.to_pi_xml(fname, chunksize=1000)
+    fews_gw_gzip = oc.ObsCollection.from_fews(fname)
+    assert fews_gw_gzip.loc['MPN-N-1', 'obs'].index.equals(
+        fews_gw_prod.loc['MPN-N-1', 'obs'].index)
+    return fews_gw_gzip
+
+
+def test_fews_event_times():
+    # the fixed format is parsed with numpy, other formats with pandas
+    from hydropandas.io.io_xml import _parse_event_times
+    dates = ['2019-01-01', '2019-01-02']
+    times = ['00:00:00', '13:15:01']
+    expected = pd.to_datetime(['2019-01-01 00:00:00', '2019-01-02 13:15:01'])
+    assert (_parse_event_times(dates, times) == expected.values).all()
+    assert (_parse_event_times(dates, ['00:00', '13:15']) ==
+            expected.floor('min').values).all()
+
+
+def test_obscollection_fews_chunks_memory(tmp_path):
+    # a zipped file is streamed, only one series is in memory at a time
+    import tracemalloc
+    import zipfile
+    n = 5000
+    obs_list = [obs.GroundwaterObs(
+        pd.DataFrame({'value': np.random.rand(n), 'flag': np.zeros(n)},
+                     index=pd.date_range('2000', periods=n, freq='H')),
+        name=f'loc{i}', meta={'locationId': f'loc{i}'}) for i in range(20)]
+    fname = str(tmp_path / 'fews.xml')
+    oc.ObsCollection.from_list(obs_list).to_pi_xml(fname)
+    with zipfile.ZipFile(str(tmp_path / 'fews.zip'), 'w',
+                         zipfile.ZIP_DEFLATED) as zf:
+        zf.write(fname, 'fews.xml')
+    del obs_list
+
+    tracemalloc.start()
+    try:
+        chunks = oc.ObsCollection.from_fews(str(tmp_path / 'fews.zip'),
+                                            chunksize=1)
+        nchunks = sum(1 for chunk in chunks)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert nchunks == 20
+    # the whole file would be larger
+    assert peak < os.path.getsize(fname) / 2
+    return peak
+
+
+def test_obscollection_fews_lazy():
+    fews_gw_prod = oc.ObsCollection.from_fews(
+        r'./tests/data/2019-FEWS-test/WaalenBurg_201810-20190215_prod.zip',
+        locations=("MPN-N-2",),
+        lazy=True)
+    assert not fews_gw_prod.obs.iloc[0].is_loaded
+    assert fews_gw_prod.obs.iloc[0].shape[0] > 0
+    return fews_gw_prod
+
+
+def test_obscollection_fews_lazy_columnar():
+    # a lazy series is read from its position in the file, to_columnar
+    # reads all lazy series
+    fews_zip = r'./tests/data/2019-FEWS-test/WaalenBurg_201810-20190215_prod.zip'
+    fews_gw_lazy = oc.ObsCollection.from_fews(fews_zip, lazy=True,
+                                              max_memory=1)
+    fews_gw_prod = oc.ObsCollection.from_fews(fews_zip)
+    for o_lazy, o in zip(fews_gw_lazy.obs, fews_gw_prod.obs):
+        assert o_lazy.load().equals(o)
+    fews_gw_col = fews_gw_lazy.to_columnar()
+    assert fews_gw_col._get_store_positions() is not None
+    return fews_gw_col
+
+
 # %% WISKI
 @pytest.mark.slow
 def test_observation_wiskicsv_gw():
@@ -288,6 +579,73 @@ def test_from_pastas_project():
     return pr_oc
 
 
+# %% PARQUET
+
+def test_obscollection_to_from_parquet(tmp_path):
+    obsc = test_obscollection_dinozip_gw_keep_all_obs()
+    fname = str(tmp_path / 'test_dino.parquet')
+    obsc.to_parquet(fname, row_group_size=1000)
+    obsc2 = oc.ObsCollection.from_parquet(fname)
+    assert obsc2.shape == obsc.shape
+    assert obsc2.obs.iloc[0].equals(obsc.obs.iloc[0])
+
+    # read a selection
+    extent = [210350, 213300, 473300, 474000]
+    obsc3 = oc.ObsCollection.from_parquet(fname, extent=extent, tmin='2000',
+                                          tmax='2010')
+    assert obsc3.shape[0] == 4
+    return obsc3
+
+
+def test_obscollection_to_from_parquet_values(tmp_path):
+    index = pd.date_range('2010-12-29', '2011-01-02', freq='D')
+    o = obs.GroundwaterObs(pd.DataFrame({'stand_m_tov_nap': np.arange(5.)},
+                                        index=index),
+                           name='well1', x=1., y=2.,
+                           meta={'filters': {1, 2},
+                                 'levels': np.array([1.5, 2.5]),
+                                 'interval': pd.Timedelta('1D'),
+                                 'start': pd.Timestamp('2010-12-29'),
+                                 'end': pd.NaT})
+    obsc = oc.ObsCollection.from_list([o])
+    obsc['installed'] = pd.Timestamp('2000-01-01')
+    fname = str(tmp_path / 'test_values.parquet')
+    obsc.to_parquet(fname)
+
+    obsc2 = oc.ObsCollection.from_parquet(fname)
+    meta = obsc2.obs.iloc[0].meta
+    assert meta['filters'] == {1, 2}
+    assert meta['levels'].dtype == np.float64
+    assert (meta['levels'] == o.meta['levels']).all()
+    assert meta['interval'] == pd.Timedelta('1D')
+    assert meta['start'] == pd.Timestamp('2010-12-29')
+    assert meta['end'] is pd.NaT
+    assert obsc2.loc['well1', 'installed'] == pd.Timestamp('2000-01-01')
+
+    # tmax is the end of the period
+    obsc3 = oc.ObsCollection.from_parquet(fname, tmax='2010')
+    assert len(obsc3.obs.iloc[0]) == 3
+
+    # values that cannot be stored raise an error
+    o.meta['object'] = object()
+    with pytest.raises(TypeError):
+        oc.ObsCollection.from_list([o]).to_parquet(fname)
+    return obsc2
+
+
+def test_obscollection_to_from_memmap(tmp_path):
+    obsc = test_obscollection_dinozip_gw_keep_all_obs()
+    dirname = str(tmp_path / 'test_dino_memmap')
+    obsc.to_memmap(dirname)
+    obsc2 = oc.ObsCollection.from_memmap(dirname)
+    assert obsc2.shape == obsc.shape
+    # the observations are views on the memory-mapped arrays
+    o = obsc2.obs.iloc[1]
+    assert np.shares_memory(o.values, obsc2._store.values)
+    assert o.equals(obsc.to_columnar().obs.iloc[1])
+    return obsc2
+
+
 # %% PYSTORE
 
 def test_obscollection_to_pystore():
@@ -69,3 +69,82 @@ def test_obscollection_from_list():
     obs_col = oc.ObsCollection.from_list(o_list)
 
     return obs_col
+
+
+def test_obscollection_to_grid_forcing():
+    # measurements of two stations on a grid of 3 x 4 cells
+    index = pd.date_range('2020-1-1', periods=10)
+    o_list = []
+    for stn in [260, 344]:
+        df = pd.DataFrame({'RD': np.arange(10.) + stn}, index=index)
+        o_list.append(obs.KnmiObs(df, name=f'RD_{stn}', station=stn))
+    obs_col = oc.ObsCollection.from_list(o_list)
+    station_grid = np.array([[0, 0, 1, 1], [0, 1, 1, 1], [-1, 0, 0, 1]])
+    obs_col.meta['station_grid'] = {'RD': {'stations': np.array([344, 260]),
+                                           'grid': station_grid}}
+
+    gf = obs_col.to_grid_forcing('RD')
+    values = gf.get_values('2020-1-3', '2020-1-5')
+    assert values.shape == (3, 3, 4)
+    assert values[0, 0, 0] == 346. and values[0, 0, 3] == 262.
+    assert np.isnan(values[:, 2, 0]).all()
+    chunks = [chunk for _, chunk in gf.iter_chunks(chunksize=4)]
+    assert np.array_equal(np.concatenate(chunks)[2:5], values, equal_nan=True)
+
+    return gf
+
+
+def test_grid_forcing_tmin_tmax_strings():
+    # a date string includes the whole day, like partial string indexing
+    from hydropandas.grid_forcing import GridForcing
+    index = pd.date_range('2020-1-1 09:00', periods=10)
+    values = pd.DataFrame({260: np.arange(10.)}, index=index)
+    gf = GridForcing(values, np.zeros((2, 2), dtype=int))
+    assert gf.get_values('2020-1-3', '2020-1-5')[:, 0, 0].tolist() == [
+        2., 3., 4.]
+    assert len(gf.get_values(tmax='2020-1')) == 10
+    # timestamps are used as they are
+    assert gf.get_values(pd.Timestamp('2020-1-3 10:00'),
+                         pd.Timestamp('2020-1-5'))[:, 0, 0].tolist() == [3.]
+    chunks = [t for t, _ in gf.iter_chunks(2, '2020-1-3', '2020-1-5')]
+    assert chunks[0].append(chunks[1:]).equals(index[2:5])
+    return gf
+
+
+def test_obscollection_from_knmi_grid_meteo_vars(monkeypatch):
+    # the start and end dates are used for every meteo variable
+    import pytest
+    from hydropandas.io import io_knmi
+    index = pd.date_range('2020-1-1', periods=10)
+    calls = []
+
+    def get_station_grid(xmid, ymid, meteo_var):
+        return np.array([260]), np.zeros((len(ymid), len(xmid)), dtype=int)
+
+    def get_knmi_obslist(stns, meteo_vars, ObsClass, start, end, **kwargs):
+        calls.append((meteo_vars, start, end))
+        df = pd.DataFrame({meteo_vars[0]: np.arange(10.)}, index=index)
+        return [ObsClass(df, name=f'{meteo_vars[0]}_260', station=260)]
+
+    monkeypatch.setattr(io_knmi, 'get_station_grid', get_station_grid)
+    monkeypatch.setattr(io_knmi, 'get_knmi_obslist', get_knmi_obslist)
+    meteo_vars = ['RD', 'EV24', 'RH']
+    obs_col = oc.ObsCollection.from_knmi(xmid=np.arange(3.),
+                                         ymid=np.arange(2.),
+                                         meteo_vars=meteo_vars)
+    assert len(obs_col) == 3
+    assert [call[1:] for call in calls] == [([None], [None])] * 3
+    assert set(obs_col.meta['station_grid']) == set(meteo_vars)
+
+    calls.clear()
+    oc.ObsCollection.from_knmi(xmid=np.arange(3.), ymid=np.arange(2.),
+                               meteo_vars=meteo_vars, start='2020',
+                               end=['2021', '2022', '2023'])
+    assert [call[1:] for call in calls] == [
+        (['2020'], ['2021']), (['2020'], ['2022']), (['2020'], ['2023'])]
+    with pytest.raises(ValueError):
+        oc.ObsCollection.from_knmi(xmid=np.arange(3.), ymid=np.arange(2.),
+                                   meteo_vars=meteo_vars,
+                                   start=['2019', '2020'])
+
+    return obs_col
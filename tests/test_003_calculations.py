@@ -1,3 +1,4 @@
+import numpy as np
 import test_001_to_from as ttf
 
 
@@ -40,6 +41,143 @@ def test_obscollection_get_max():
     omax = gw.stats.get_max()
     return omax
 
+def test_obscollection_columnar_stats():
+    gw = ttf.test_obscollection_dinozip_gw_keep_all_obs()
+    gw_col = gw.to_columnar()
+    assert gw_col._get_store_positions() is not None
+    assert (gw.stats.n_observations == gw_col.stats.n_observations).all()
+    for stat in ['get_min', 'get_max', 'get_no_of_observations']:
+        s1 = getattr(gw.stats, stat)(after_date='2000', before_date='2010')
+        s2 = getattr(gw_col.stats, stat)(after_date='2000',
+                                         before_date='2010')
+        assert np.allclose(s1.astype(float), s2.astype(float),
+                           equal_nan=True)
+    return gw_col
+
+def test_obscollection_columnar_stats_changed_obs():
+    # an observation that is changed is no longer a view on the store
+    gw_col = test_obscollection_columnar_stats()
+    o = gw_col.obs.iloc[0]
+    o.drop(index=o.index[5:], inplace=True)
+    o.loc[o.index[0], 'stand_m_tov_nap'] = 100.
+    assert gw_col._get_store_positions() is None
+    gw = gw_col.copy()
+    gw._store = None
+    assert (gw_col.stats.n_observations == gw.stats.n_observations).all()
+    assert gw_col.stats.dates_last_obs.iloc[0] == o.index[-1]
+    assert gw_col.stats.get_max().iloc[0] == 100.
+    return gw_col
+
+
+def test_obscollection_columnar_stats_checks(monkeypatch):
+    # the store path only checks the observations that changed
+    import time
+    import pandas as pd
+    from hydropandas import observation as obs
+    from hydropandas import obs_collection as oc
+    from hydropandas.columnar import ColumnarStore
+    index = pd.date_range('2000-1-1', periods=200)
+    values = np.random.rand(200)
+    obs_list = [obs.GroundwaterObs(pd.DataFrame({'stand_m_tov_nap': values},
+                                                index=index), name=f'o{i}')
+                for i in range(10000)]
+    gw = oc.ObsCollection.from_list(obs_list)
+    start = time.perf_counter()
+    n_obs = gw.stats.n_observations
+    t_loop = time.perf_counter() - start
+
+    gw_col = gw.to_columnar()
+    checked = []
+    is_view = ColumnarStore.is_view
+
+    def count_is_view(self, i, o):
+        checked.append(i)
+        return is_view(self, i, o)
+
+    monkeypatch.setattr(ColumnarStore, 'is_view', count_is_view)
+    start = time.perf_counter()
+    assert (gw_col.stats.n_observations == n_obs).all()
+    t_store = time.perf_counter() - start
+    assert checked == [] and t_store < t_loop
+
+    # values that are changed in place are changed in the store
+    gw_col.obs.iloc[1].loc[index[0], 'stand_m_tov_nap'] = 100.
+    assert gw_col.stats.get_max().iloc[1] == 100.
+    assert checked == [1]
+
+    # a new index or column is detected
+    gw_col.obs.iloc[2].index = index + pd.Timedelta('1D')
+    assert gw_col._get_store_positions() is None
+    gw_col = gw.to_columnar()
+    gw_col.obs.iloc[3]['stand_m_tov_nap'] = values + 1.
+    assert gw_col._get_store_positions() is None
+    assert gw_col.stats.get_max().iloc[3] == values.max() + 1.
+    return gw_col
+
+def test_obscollection_active_in_period():
+    gw = ttf.test_obscollection_dinozip_gw_keep_all_obs()
+    active = gw.stats.active_in_period('2000', '2005')
+    for o, is_active in zip(gw.obs, active):
+        assert is_active == (not o.empty and o.index[0].year <= 2005 and
+                             o.index[-1].year >= 2000)
+    assert gw.stats.coverage.count_active('2000', '2005') == active.sum()
+
+    # the coverage is refreshed when an observation changes
+    o = gw.obs.iloc[0]
+    o.drop(o.index, inplace=True)
+    assert gw.stats.n_observations.iloc[0] == 0
+    return active
+
+def test_obscollection_coverage_refresh(monkeypatch):
+    # the coverage is only read again for observations that changed and the
+    # lazy observations are read once
+    import pandas as pd
+    from hydropandas import observation as obs
+    from hydropandas import obs_collection as oc
+    from hydropandas.extensions.stats import CoverageIndex
+    from hydropandas.lazy import LazyObs, ObsMemoryCache
+    index = pd.date_range('2000-1-1', periods=10)
+    loaded = []
+
+    def get_loader(i):
+        def loader():
+            loaded.append(i)
+            return obs.GroundwaterObs(pd.DataFrame({'stand_m_tov_nap': 1.},
+                                                   index=index[i:]))
+        return loader
+
+    cache = ObsMemoryCache(max_memory=1)
+    obs_list = [LazyObs(obs.GroundwaterObs(name=f'o{i}'), get_loader(i),
+                        cache) for i in range(5)]
+    gw = oc.ObsCollection.from_list(obs_list)
+    read = []
+    get_coverage = CoverageIndex._get_coverage
+
+    def count_get_coverage(o):
+        read.append(o.name)
+        return get_coverage(o)
+
+    monkeypatch.setattr(CoverageIndex, '_get_coverage',
+                        staticmethod(count_get_coverage))
+    assert gw.stats.n_observations.tolist() == [10, 9, 8, 7, 6]
+    assert sorted(loaded) == [0, 1, 2, 3, 4] and len(read) == 5
+    assert gw.stats.active_in_period('2000-1-10').all()
+    assert len(loaded) == 5 and len(read) == 5
+
+    # a changed observation is read again
+    o = gw.obs.iloc[4].load()
+    o.drop(o.index[:3], inplace=True)
+    assert gw.stats.n_observations.tolist() == [10, 9, 8, 7, 3]
+    assert read[5:] == ['o4']
+
+    # a new observation is read
+    gw.loc['o5'] = obs.GroundwaterObs(pd.DataFrame(
+        {'stand_m_tov_nap': 1.}, index=index), name='o5').to_collection_dict()
+    assert gw.stats.n_observations.tolist() == [10, 9, 8, 7, 3, 10]
+    assert read[6:] == ['o5']
+    return gw
+
+
 #%%
 
 
@@ -53,6 +191,24 @@ def test_get_nearest_point():
     return dino_gw
 
 
+def test_spatial_index():
+    dino_gw = ttf.test_obscollection_dinozip_gw()
+    sindex = dino_gw.geo.get_spatial_index()
+    assert sindex is dino_gw.geo.get_spatial_index()
+    x, y = dino_gw.x.values[0], dino_gw.y.values[0]
+    distance = np.sqrt((dino_gw.x - x)**2 + (dino_gw.y - y)**2).values
+    assert sindex.nearest(x, y)[1][0] == np.argmin(distance)
+    assert (sindex.within_radius(x, y, 1000.) ==
+            np.nonzero(distance <= 1000.)[0]).all()
+    extent = [210350, 213300, 473300, 474000]
+    assert len(sindex.within_bbox(*extent)) == 4
+
+    # the index is rebuilt when the coordinates change
+    dino_gw['x'] = dino_gw['x'] + 10.
+    assert sindex is not dino_gw.geo.get_spatial_index()
+    return sindex
+
+
 def test_get_surface_level_oc():
     try:
         from art_tools import obs_extension
@@ -25,6 +25,15 @@ def test_set_filter_num_location():
                                                if_exists='replace')
     return fews_gw_prod
 
+def test_set_metadata_values():
+    dino_gw = ttf.test_obscollection_dinozip_gw()
+    values = np.arange(len(dino_gw))
+    dino_gw._set_metadata_values('filternr', values, add_to_meta=True)
+    assert (dino_gw['filternr'] == values).all()
+    assert dino_gw.obs.iloc[-1].filternr == values[-1]
+    assert dino_gw.obs.iloc[-1].meta['filternr'] == values[-1]
+    return dino_gw
+
 def test_get_modellayers():
     modelname = 'tutorial1'
     ml = flopy.modflow.Modflow(modelname, exe_name='mf2005')
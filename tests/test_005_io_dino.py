@@ -41,6 +41,60 @@ def test_dino_csv():
 
     return measurements, meta
 
+def test_dino_parse_dates():
+    # dates in the format dd-mm-yyyy are parsed with numpy
+    import numpy as np
+    import pandas as pd
+    import pytest
+    dates = np.array(['28-11-1972', np.nan, '01-02-2015'], dtype=object)
+    parsed = io_dino._parse_dino_dates(dates)
+    expected = pd.to_datetime(['1972-11-28', None, '2015-02-01']).values
+    assert np.array_equal(parsed, expected, equal_nan=True)
+
+    # other formats raise a ValueError, so the baseline parser is used
+    for date in ['1972-11-28', '1-2-2015', '01/02/2015', '32-01-2015']:
+        with pytest.raises(ValueError):
+            io_dino._parse_dino_dates(np.array([date], dtype=object))
+
+
+def test_dino_csv_dates_fallback(tmp_path):
+    # files with dates in another format are read with the baseline parser
+    import re
+    fname = r'./tests/data/2019-Dino-test/Grondwaterstanden_Put/B33F0080001_1.csv'
+    measurements, meta = io_dino.read_dino_groundwater_csv(fname)
+    with open(fname) as fo:
+        text = fo.read()
+    for i, repl in enumerate([r'\1\4-\3-\2,', r'\1\2/\3/\4,']):
+        fname_other = str(tmp_path / f'dates_{i}.csv')
+        with open(fname_other, 'w') as fo:
+            fo.write(re.sub(r'^(B33F0080,001,)(\d\d)-(\d\d)-(\d{4}),', repl,
+                            text, flags=re.M))
+        measurements_other, meta_other = io_dino.read_dino_groundwater_csv(
+            fname_other)
+        assert measurements_other.index.equals(measurements.index)
+        assert measurements_other.equals(measurements)
+
+
+def test_dino_csv_dates_baseline(monkeypatch):
+    # the fast date parser gives the same result as the baseline parser
+    import os
+
+    def _raise(dates):
+        raise ValueError
+
+    dirname = r'./tests/data/2019-Dino-test/Grondwaterstanden_Put'
+    fnames = [os.path.join(dirname, fname) for fname in os.listdir(dirname)
+              if fname.endswith('_1.csv')]
+    fast = [io_dino.read_dino_groundwater_csv(fname)[0] for fname in fnames]
+    monkeypatch.setattr(io_dino, '_parse_dino_dates', _raise)
+    for fname, measurements in zip(fnames, fast):
+        baseline = io_dino.read_dino_groundwater_csv(fname)[0]
+        if baseline is None:
+            assert measurements is None
+        else:
+            assert measurements.equals(baseline), fname
+
+
 def test_dino_metadata():
     # download metadata
     dinorest = io_dino.DinoREST()
@@ -108,3 +162,132 @@ def test_dino_download_single_empty():
                                                            tmax="2040-01-01",
                                                            unit="NAP",
                                                            verbose=True)
+
+
+def test_dino_download_extent_parallel():
+    # download extent with 4 threads and at most 10 requests per second
+    extent = [117850, 117980, 439550, 439700]  # Schoonhoven zoomed
+    gw_col = io_dino.download_dino_within_extent(extent,
+                                                 ObsClass=obs.GroundwaterObs,
+                                                 layer='grondwatermonitoring',
+                                                 n_workers=4,
+                                                 rate_limit=10.,
+                                                 verbose=True)
+    return gw_col
+
+
+def test_call_with_retry():
+    # a request that fails twice is retried
+    from hydropandas.util import RateLimiter, _call_with_retry
+    import requests
+    errors = [requests.exceptions.ConnectionError(),
+              requests.exceptions.Timeout()]
+
+    def request():
+        if errors:
+            raise errors.pop()
+        return 'ok'
+
+    r = _call_with_retry(request, max_retries=2, backoff_factor=0.01,
+                         retry_if=io_dino._is_transient_error,
+                         rate_limiter=RateLimiter(100.))
+    assert r == 'ok'
+    return r
+
+
+def test_remote_cache(tmp_path):
+    # only the periods that are not in the cache are fetched
+    from hydropandas.remote_cache import RemoteCache
+    fname = r'./tests/data/2019-Dino-test/Grondwaterstanden_Put/B33F0080001_1.csv'
+    gw = obs.GroundwaterObs.from_dino(fname=fname)
+    fetched = []
+
+    def fetch(tmin, tmax):
+        fetched.append((tmin, tmax))
+        return gw.loc[tmin:tmax]
+
+    cache = RemoteCache(str(tmp_path))
+    key = ('dino', gw.name)
+    cache.read(key, fetch, '1990-01-01', '2000-01-01')
+    o = cache.read(key, fetch, '1995-01-01', '2005-01-01')
+    assert len(fetched) == 2 and fetched[1][0] == fetched[0][1]
+    assert o.equals(gw.loc['1995-01-01':'2005-01-01'])
+    assert o.name == gw.name
+    return o
+
+
+def test_remote_cache_metadata(tmp_path):
+    # the metadata of the cached observation is kept when a period is added
+    from hydropandas.remote_cache import RemoteCache
+    fname = r'./tests/data/2019-Dino-test/Grondwaterstanden_Put/B33F0080001_1.csv'
+    gw = obs.GroundwaterObs.from_dino(fname=fname)
+
+    def fetch(tmin, tmax):
+        if tmin.year < 2000:
+            return gw.loc[tmin:tmax]
+        # a download without metadata
+        return obs.GroundwaterObs(gw.loc[tmin:tmax], name=gw.name)
+
+    cache = RemoteCache(str(tmp_path))
+    key = ('dino', gw.name)
+    cache.read(key, fetch, '1990-01-01', '2000-01-01')
+    o = cache.read(key, fetch, '1990-01-01', '2005-01-01')
+    assert o.equals(gw.loc['1990-01-01':'2005-01-01'])
+    assert o.x == gw.x and o.filename == gw.filename
+    assert o.meta['locatie'] == gw.meta['locatie']
+    return o
+
+
+def test_remote_cache_concurrent(tmp_path):
+    # four threads request the same observation, it is fetched once
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from hydropandas.remote_cache import RemoteCache
+    fname = r'./tests/data/2019-Dino-test/Grondwaterstanden_Put/B33F0080001_1.csv'
+    gw = obs.GroundwaterObs.from_dino(fname=fname)
+    fetched = []
+
+    def fetch(tmin, tmax):
+        fetched.append((tmin, tmax))
+        time.sleep(0.2)
+        return gw.loc[tmin:tmax]
+
+    cache = RemoteCache(str(tmp_path), lock_timeout=60)
+    with ThreadPoolExecutor(4) as executor:
+        obs_list = list(executor.map(
+            lambda i: cache.read(('dino', gw.name), fetch, '1990-01-01',
+                                 '2000-01-01'), range(4)))
+    assert len(fetched) == 1
+    assert all(o.equals(obs_list[0]) for o in obs_list)
+    return obs_list
+
+
+def test_remote_cache_clear_locks(tmp_path):
+    # the lock files are removed, unless the lock is held
+    import os
+    from hydropandas.remote_cache import RemoteCache
+    from hydropandas.util import FileLock
+    fname = r'./tests/data/2019-Dino-test/Grondwaterstanden_Put/B33F0080001_1.csv'
+    gw = obs.GroundwaterObs.from_dino(fname=fname)
+    cache = RemoteCache(str(tmp_path))
+    key = ('dino', gw.name)
+    cache.read(key, lambda tmin, tmax: gw.loc[tmin:tmax], '1990-01-01',
+               '2000-01-01')
+    lock_fname = cache._get_entry_fname(key) + '.lock'
+    assert os.path.isfile(lock_fname)
+    with FileLock(lock_fname):
+        cache.clear()
+        assert os.listdir(tmp_path) == [os.path.basename(lock_fname)]
+    cache.clear()
+    assert os.listdir(tmp_path) == []
+
+    # the least recently used entries are removed with their lock file
+    cache.read(key, lambda tmin, tmax: gw.loc[tmin:tmax], '1990-01-01',
+               '2000-01-01')
+    cache.max_size = 1.5 * os.path.getsize(cache._get_entry_fname(key))
+    key2 = ('dino', 'other')
+    cache.read(key2, lambda tmin, tmax: gw.loc[tmin:tmax], '1990-01-01',
+               '2000-01-01')
+    fname2 = cache._get_entry_fname(key2)
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(fname2),
+                                            os.path.basename(fname2) + '.lock']
@@ -59,6 +59,290 @@ def test_fill_missing_measurements_rd_278():
                                                                      verbose=True)
     return knmi_df, variables, stations
 
+
+def test_fill_missing_measurements_batch_rd_892():
+    # download the 10 nearest stations per request to fill the gaps
+    knmi_df, variables, stations = io_knmi.fill_missing_measurements(892,
+                                                                     meteo_var='RD',
+                                                                     start='1952',
+                                                                     end='1960',
+                                                                     raise_exceptions=False,
+                                                                     verbose=True,
+                                                                     batch_size=10)
+    return knmi_df, variables, stations
+
+def test_fill_missing_measurements_batch_offline(monkeypatch):
+    # every missing measurement is filled with the nearest station that has
+    # a measurement on that day
+    from hydropandas.util import SpatialIndex
+    stations = pd.DataFrame({'x': [0., 1., 2., 3., 4.], 'y': 0.},
+                            index=[1, 2, 3, 4, 5])
+    monkeypatch.setattr(io_knmi, '_get_station_catalogue',
+                        lambda meteo_var: (stations,
+                                           SpatialIndex(stations.x,
+                                                        stations.y)))
+    index = pd.date_range('2020-1-1', periods=5)
+    nan = np.nan
+    downloads = {
+        2: [nan, 21., nan, nan, nan],
+        3: [nan, 31., 32., nan, nan],
+        # station 4 cannot be downloaded
+        5: [nan, 51., nan, 53., nan]}
+    requested = []
+
+    def download_knmi_data_multi(stns, meteo_var, **kwargs):
+        requested.append(stns)
+        knmi_df = pd.DataFrame({stn: downloads[stn] for stn in stns
+                                if stn in downloads}, index=index)
+        return knmi_df, {}
+
+    monkeypatch.setattr(io_knmi, 'download_knmi_data_multi',
+                        download_knmi_data_multi)
+    knmi_df = pd.DataFrame({'RD': [1., nan, nan, nan, nan]}, index=index)
+    knmi_df = io_knmi._fill_missing_measurements_batch(
+        knmi_df, 1, 'RD', index[0], index[-1], ignore=[1], batch_size=2)
+    assert requested == [[2, 3], [4, 5]]
+    assert np.array_equal(knmi_df['RD'].values, [1., 21., 32., 53., nan],
+                          equal_nan=True)
+    assert knmi_df['station_opvulwaarde'].tolist()[1:4] == ['2', '3', '5']
+    assert knmi_df['station_opvulwaarde'].iloc[[0, 4]].isna().all()
+    return knmi_df
+
+
+def _stub_knmi_update(monkeypatch, downloads):
+    # knmi stations 260, 270 and 280 on the x-axis, the downloads are the
+    # daily measurements from 2020-1-3 of each station
+    from hydropandas.util import SpatialIndex
+    stations = pd.DataFrame({'x': [0., 1., 2.], 'y': 0.},
+                            index=[260, 270, 280])
+    monkeypatch.setattr(io_knmi, '_get_station_catalogue',
+                        lambda meteo_var: (stations,
+                                           SpatialIndex(stations.x,
+                                                        stations.y)))
+    requested = []
+
+    def download_knmi_data_multi(stns, meteo_var, **kwargs):
+        requested.append(stns)
+        knmi_df = pd.DataFrame({stn: downloads[stn] for stn in stns
+                                if stn in downloads},
+                               index=pd.date_range('2020-1-3', periods=6),
+                               dtype=float)
+        return knmi_df, {}
+
+    monkeypatch.setattr(io_knmi, 'download_knmi_data_multi',
+                        download_knmi_data_multi)
+
+    # the last measurement is on 2020-1-4
+    ev24 = pd.DataFrame({'EV24': [1., 2., 3., 4., np.nan]},
+                        index=pd.date_range('2020-1-1', periods=5))
+    o = obs.KnmiObs(ev24, name='EV24_DE-BILT', x=0., y=0., station=260,
+                    meta={'EV24': 'Referentiegewasverdamping'})
+    return o, requested
+
+
+def test_update_knmi_obslist_offline(monkeypatch):
+    # the measurements after the last measurement replace the missing
+    # values, the overlapping downloaded measurements are ignored
+    nan = np.nan
+    o, requested = _stub_knmi_update(
+        monkeypatch, {260: [30., 40., 50., nan, 70., nan]})
+    o_new = io_knmi.update_knmi_obslist([o], end='2020-1-10',
+                                        fill_missing_obs=False)[0]
+    assert requested == [[260]]
+    # the measurements not available yet are downloaded next time
+    assert o_new.index.equals(pd.date_range('2020-1-1', periods=7))
+    assert np.array_equal(o_new['EV24'].values,
+                          [1., 2., 3., 4., 50., nan, 70.], equal_nan=True)
+    update = o_new.meta['updates'][0]
+    assert (update['start'], update['end'], update['n']) == (
+        '2020-01-05T00:00:00', '2020-01-07T00:00:00', 3)
+    assert (o_new.station, o_new.x, o_new.name) == (260, 0., o.name)
+    assert o_new.meta['EV24'] == 'Referentiegewasverdamping'
+    # the original observation is unchanged
+    assert len(o) == 5 and 'updates' not in o.meta
+    return o_new
+
+
+def test_update_knmi_obslist_no_new_data(monkeypatch):
+    nan = np.nan
+    o, requested = _stub_knmi_update(
+        monkeypatch, {260: [30., 40., nan, nan, nan, nan]})
+    o_new = io_knmi.update_knmi_obslist([o], end='2020-1-10',
+                                        fill_missing_obs=False)[0]
+    assert o_new is o
+    assert 'updates' not in o.meta
+
+    # a station without data
+    o, requested = _stub_knmi_update(monkeypatch, {})
+    assert io_knmi.update_knmi_obslist([o], end='2020-1-10',
+                                       fill_missing_obs=False)[0] is o
+    return o
+
+
+def test_update_knmi_obslist_fill_missing_obs(monkeypatch):
+    # the missing new measurements are filled with the nearest station that
+    # has a measurement
+    nan = np.nan
+    o, requested = _stub_knmi_update(
+        monkeypatch, {260: [30., 40., 50., nan, 70., nan],
+                      270: [nan, nan, nan, 61., nan, nan],
+                      280: [nan, nan, nan, 62., nan, 82.]})
+    o_new = io_knmi.update_knmi_obslist([o], end='2020-1-10')[0]
+    assert requested == [[260], [270, 280]]
+    assert np.array_equal(o_new['EV24'].values,
+                          [1., 2., 3., 4., 50., 61., 70., 82.])
+    assert o_new['station_opvulwaarde'].tolist()[5:] == ['270', nan, '280']
+    assert o_new['station_opvulwaarde'].iloc[:5].isna().all()
+    assert o_new.meta['updates'][0]['n'] == 4
+    return o_new
+
+
+def test_update_knmi_inplace(monkeypatch):
+    nan = np.nan
+    o, requested = _stub_knmi_update(
+        monkeypatch, {260: [30., 40., 50., nan, 70., nan],
+                      270: [nan, nan, nan, 61., nan, 81.]})
+    o_new = o.update_knmi(end='2020-1-10')
+    assert len(o) == 5 and 'updates' not in o.meta
+
+    assert o.update_knmi(end='2020-1-10', inplace=True) is None
+    assert isinstance(o, obs.KnmiObs)
+    assert o.index.equals(o_new.index)
+    assert np.array_equal(o['EV24'].values, o_new['EV24'].values)
+    assert o['station_opvulwaarde'].tolist()[5:] == ['270', nan, '270']
+    assert o.meta['updates'][0]['n'] == 4
+    assert (o.station, o.x, o.y) == (260, 0., 0.)
+    # an observation without new measurements is not changed
+    meta = o.meta
+    o.update_knmi(end='2020-1-8', inplace=True)
+    assert len(o) == 8 and o.meta is meta
+    return o
+
+
+def _knmi_hourly_text(values):
+    # an hourly knmi file with the values in 0.1 mm per station, for the
+    # hours 1 to 24 of 2020-1-1 and 2020-1-2, nan is an empty field
+    lines = ['# BRON: KONINKLIJK NEDERLANDS METEOROLOGISCH INSTITUUT (KNMI)',
+             '# ',
+             '# STN         LON(east)   LAT(north)  ALT(m)      NAME',
+             '# 260         5.180       52.100      1.90        De Bilt',
+             '# ',
+             '# YYYYMMDD = datum (YYYY=jaar, MM=maand, DD=dag); ',
+             '# HH       = tijd (HH=uur, UT.12 UT=13 MET, 14 MEZT.); ',
+             '# RH       = Uursom van de neerslag (in 0.1 mm) '
+             '(-1 voor <0.05 mm); ',
+             '# ',
+             '# STN,YYYYMMDD,   HH,   RH',
+             '# ']
+    for stn, stn_values in values.items():
+        for i, value in enumerate(stn_values):
+            date = 20200101 + i // 24
+            value = '     ' if np.isnan(value) else f'{value:5.0f}'
+            lines.append(f'  {stn},{date},{i % 24 + 1:5d},{value}')
+    return '\n'.join(lines) + '\n'
+
+
+def _knmi_hourly_values():
+    rng = np.random.default_rng(1)
+    values = {260: rng.integers(-1, 40, 48).astype(float),
+              270: rng.integers(-1, 40, 48).astype(float)}
+    values[260][[0, 23, 30]] = np.nan
+    # no measurements on the second day
+    values[270][24:] = np.nan
+    return values
+
+
+def test_read_knmi_hourly_offline(monkeypatch):
+    from io import StringIO
+    values = _knmi_hourly_values()
+    text = _knmi_hourly_text({260: values[260]})
+    grown = []
+
+    def _grow(arr, size):
+        grown.append(size)
+        return grow(arr, size)
+
+    grow = io_knmi._grow
+    monkeypatch.setattr(io_knmi, '_grow', _grow)
+    # the arrays for 5 measurements grow while the chunks are read
+    df, variables, stations = io_knmi.read_knmi_hourly(
+        StringIO(text), chunksize=7, nrows=5)
+    assert grown and max(grown) >= 48
+    assert stations.index.tolist() == ['260']
+    assert variables['RH'] == 'Uursom van de neerslag (in m) ' \
+        '(-1 voor <0.05 m);'
+
+    # hour HH is the period from HH-1 to HH UT, in UT+1 the last hour of a
+    # day is on the next day
+    assert len(df) == 48
+    assert df.index[0] == pd.Timestamp('2020-1-1 02:00')
+    assert df.index[23] == pd.Timestamp('2020-1-2 01:00')
+    assert df.index[-1] == pd.Timestamp('2020-1-3 01:00')
+    # from 0.1 mm to m
+    assert np.allclose(df['RH'].values, values[260] * 1e-4, equal_nan=True)
+    assert (df['STN'] == 260).all()
+
+    # the same timestamps as the daily meteorological data
+    resampled = df['RH'].resample('D', closed='right', label='right',
+                                  offset='1h')
+    expected = {'sum': resampled.sum(min_count=1), 'mean': resampled.mean(),
+                'min': resampled.min(), 'max': resampled.max()}
+    for aggregate, series in expected.items():
+        daily, _, __ = io_knmi.read_knmi_hourly(
+            StringIO(text), aggregate=aggregate, chunksize=7)
+        assert daily.index.equals(pd.DatetimeIndex(['2020-1-2 01:00',
+                                                    '2020-1-3 01:00']))
+        assert np.allclose(daily['RH'].values, series.values)
+    return df
+
+
+def test_download_knmi_data_multi_hourly_offline(monkeypatch):
+    # the hourly measurements of multiple stations are streamed to the
+    # parser
+    from io import BytesIO
+    values = _knmi_hourly_values()
+    text = _knmi_hourly_text(values)
+    requests = []
+
+    class Response:
+        def __init__(self):
+            self.raw = BytesIO(text.encode('latin-1'))
+
+    def get(url, params=None, stream=False):
+        requests.append((params, stream))
+        return Response()
+
+    monkeypatch.setattr(io_knmi.requests, 'get', get)
+    stream = io_knmi._get_knmi_stream('url', {'stns': '260'})
+    assert stream.read() == text
+    assert requests == [({'stns': '260'}, True)]
+
+    for aggregate in [None, 'sum', 'mean', 'min', 'max']:
+        knmi_df, variables = io_knmi.download_knmi_data_multi(
+            [260, 270], 'RH', start='2020-1-1', end='2020-1-2',
+            interval='hourly', aggregate=aggregate)
+        assert requests[-1] == ({'start': '2019123101', 'end': '2020010224',
+                                 'vars': 'RH', 'stns': '260:270'}, True)
+        assert knmi_df.columns.tolist() == [260, 270]
+        for stn in [260, 270]:
+            series = pd.Series(values[stn] * 1e-4,
+                               index=pd.date_range('2020-1-1 02:00',
+                                                   periods=48, freq='H'))
+            if aggregate is not None:
+                resampled = series.resample('D', closed='right',
+                                            label='right', offset='1h')
+                if aggregate == 'sum':
+                    series = resampled.sum(min_count=1)
+                else:
+                    series = resampled.agg(aggregate)
+            assert knmi_df.index.equals(series.index)
+            assert np.allclose(knmi_df[stn].values, series.values,
+                               equal_nan=True)
+    # no measurements of station 270 on the second day
+    assert np.isnan(knmi_df.loc['2020-1-3 01:00', 270])
+    return knmi_df
+
+
 def test_obslist_from_grid():
     xmid = np.array([104150., 104550.])
     ymid = np.array([510150., 510550.])
@@ -87,4 +371,76 @@ def test_obslist_from_stns():
                                         end=['2015', '2015'],
                                         verbose=True)
     
-    return obs_list
\ No newline at end of file
+    return obs_list
+
+def test_get_nearest_stations_ignore():
+    # the stations are read once and the nearest stations are found with
+    # a spatial index
+    stations = io_knmi.get_stations(meteo_var='EV24')
+    stns = io_knmi.get_nearest_stations_xy(155000, 463000, 'EV24', n=3)
+    stns_ignore = io_knmi.get_nearest_stations_xy(155000, 463000, 'EV24',
+                                                  n=2, ignore=stns[:1])
+    assert stns_ignore == stns[1:]
+    assert io_knmi.get_stations(meteo_var='EV24').equals(stations)
+    return stns
+
+
+def test_get_station_grid(monkeypatch):
+    # the nearest station of every cell as an index in the unique stations,
+    # compared with the nearest station of every cell computed by brute force
+    from hydropandas.util import SpatialIndex
+    rng = np.random.default_rng(1)
+    stations = pd.DataFrame({'x': rng.uniform(100000., 200000., 8),
+                             'y': rng.uniform(400000., 500000., 8)},
+                            index=[210, 235, 240, 260, 270, 280, 290, 310])
+    monkeypatch.setattr(io_knmi, '_get_station_catalogue',
+                        lambda meteo_var: (stations,
+                                           SpatialIndex(stations.x,
+                                                        stations.y)))
+    xmid = np.linspace(100000., 200000., 50)
+    ymid = np.linspace(400000., 500000., 40)
+    for ignore in [None, [260, 290]]:
+        stns, station_grid = io_knmi.get_station_grid(xmid, ymid,
+                                                      meteo_var='RD',
+                                                      ignore=ignore,
+                                                      chunksize=120)
+        assert station_grid.shape == (40, 50)
+        candidates = stations.drop(ignore or [])
+        xcell, ycell = np.meshgrid(xmid, ymid)
+        dist = np.hypot(xcell[..., np.newaxis] - candidates.x.values,
+                        ycell[..., np.newaxis] - candidates.y.values)
+        nearest = candidates.index.values[dist.argmin(axis=-1)]
+        assert (stns[station_grid] == nearest).all()
+        assert set(stns) == set(np.unique(nearest))
+        assert list(stns) == list(io_knmi.get_nearest_station_grid(
+            xmid, ymid, ignore=ignore))
+    return stns, station_grid
+
+
+def test_update_knmi_obslist():
+    # only the measurements after the last measurement are downloaded
+    stns = [344, 260]
+    obs_list = io_knmi.get_knmi_obslist(stns=stns, meteo_vars=['EV24'],
+                                        start=['2010'],
+                                        ObsClass=obs.KnmiObs,
+                                        end=['2011'])
+    obs_list = io_knmi.update_knmi_obslist(obs_list, end='2012')
+    assert all(len(o.meta['updates']) == 1 for o in obs_list)
+    return obs_list
+
+
+def test_download_rh_260_hourly():
+    knmi_df, variables, stations = io_knmi.download_knmi_data(260,
+                                                              meteo_var='RH',
+                                                              start='2010',
+                                                              end='2011',
+                                                              interval='hourly',
+                                                              verbose=False)
+    # aggregated to daily values while the hourly data is read
+    knmi_df_daily, _, __ = io_knmi.download_knmi_data(260, meteo_var='RH',
+                                                      start='2010',
+                                                      end='2011',
+                                                      interval='hourly',
+                                                      aggregate='sum')
+    assert len(knmi_df) > 24 * len(knmi_df_daily) - 48
+    return knmi_df, variables, stations